@@ -1,14 +1,29 @@
 """Inventory REST API endpoints for machine consumables."""
 
 import logging
+from typing import Dict, List, Optional
 
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, HTTPException, Query, Request
+from pydantic import BaseModel
+
+from app.core.errors import InsufficientInventoryError
+from app.services.batch_change_planner import inventory_vector, plan_change_batch
+from app.services.change_calculator import calculate_change
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/inventory", tags=["inventory"])
 
 
+class PlanBatchRequest(BaseModel):
+    amounts: List[int]
+    # What-if inventory: given counts override the current machine inventory
+    # per denomination (0 removes one); omitted denominations keep theirs
+    bill_counts: Optional[Dict[str, int]] = None
+    coin_counts: Optional[Dict[str, int]] = None
+    include_plans: bool = False  # Materialize per-amount dispense plans
+
+
 @router.get("/")
 async def get_inventory(request: Request):
     """Get full inventory state with alerts."""
@@ -29,3 +44,85 @@ async def get_acceptable_denominations(request: Request):
     return {
         "denominations": machine_status.get_acceptable_denominations(),
     }
+
+
+@router.get("/payable")
+async def get_payable(request: Request, amount: int = Query(..., ge=0)):
+    """Check whether an amount can be paid out exactly with current inventory.
+
+    Served from the incrementally maintained feasibility index; amounts
+    above the index ceiling fall back to the change calculator.
+    """
+    machine_status = request.app.state.machine_status
+    payable = machine_status.is_payable(amount)
+    if payable is None:
+        snapshot = machine_status.snapshot()
+        try:
+            calculate_change(
+                amount,
+                snapshot.consumables.bill_dispenser_counts,
+                snapshot.consumables.coin_counts,
+            )
+            payable = True
+        except InsufficientInventoryError:
+            payable = False
+    return {"amount": amount, "payable": payable}
+
+
+@router.get("/payable-range")
+async def get_payable_range(
+    request: Request,
+    step: int = Query(1, ge=1),
+    limit: Optional[int] = Query(None, ge=0),
+):
+    """Get the maximum payable amount and blocked amounts for the amount screen.
+
+    Amounts are multiples of `step` up to `limit` (default: index ceiling).
+    Amounts above max_payable are all blocked and not listed.
+    """
+    machine_status = request.app.state.machine_status
+    return machine_status.get_payable_range(step=step, limit=limit).model_dump()
+
+
+@router.get("/plan-cache")
+async def get_plan_cache_stats(request: Request):
+    """Get change plan cache hit/miss counters for monitoring."""
+    return request.app.state.change_plan_cache.stats()
+
+
+@router.post("/plan-batch")
+async def plan_batch(request: Request, body: PlanBatchRequest):
+    """Plan change for many amounts at once (refill planning / dashboard).
+
+    Returns column-wise feasibility and minimum item counts; per-amount
+    dispense plans are only built when include_plans is set.
+    """
+    settings = request.app.state.settings
+    too_large = [a for a in body.amounts if a > settings.payable_index_ceiling]
+    if too_large:
+        raise HTTPException(
+            status_code=400,
+            detail=(
+                f"Amounts above {settings.payable_index_ceiling} "
+                f"not supported: {too_large[:10]}"
+            ),
+        )
+
+    machine_status = request.app.state.machine_status
+    version, bills, coins = machine_status.dispense_inventory()
+    bills.update(body.bill_counts or {})
+    coins.update(body.coin_counts or {})
+
+    batch = plan_change_batch(body.amounts, inventory_vector(bills, coins))
+    result = {
+        "inventory_version": version,
+        "amounts": body.amounts,
+        "feasible": batch.feasible.tolist(),
+        "item_counts": batch.item_counts.tolist(),
+    }
+    if body.include_plans:
+        result["plans"] = [
+            plan.model_dump() if plan is not None else None
+            for plan in batch.plans()
+        ]
+    return result
@@ -7,6 +7,8 @@ from app.api.health import router as health_router
 from app.api.inventory import router as inventory_router
 from app.api.status import router as status_router
 from app.api.transaction import router as transaction_router
+from app.api.ws import parse_topics
+from app.models.events import WSEvent, WSEventType
 
 logger = logging.getLogger(__name__)
 
@@ -20,7 +22,35 @@ api_router.include_router(inventory_router)
 @api_router.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     ws_manager = websocket.app.state.ws_manager
-    await ws_manager.connect(websocket)
+    # Optional initial subscription: /ws?topics=transaction,cash
+    topics = None
+    if "topics" in websocket.query_params:
+        try:
+            topics = parse_topics(
+                t for t in websocket.query_params["topics"].split(",") if t
+            )
+        except ValueError as e:
+            logger.warning(f"Rejected WebSocket client: {e}")
+            await websocket.close(code=1008)
+            return
+    # Resume handshake: /ws?resume_from=<last seq>&stream=<stream id>
+    resume_from = None
+    if "resume_from" in websocket.query_params:
+        try:
+            resume_from = int(websocket.query_params["resume_from"])
+        except ValueError:
+            await websocket.close(code=1008)
+            return
+    # A "state" subscriber joins the patch fan-out in send_snapshot(), once
+    # its snapshot is queued
+    await ws_manager.connect(
+        websocket,
+        topics - {"state"} if topics else topics,
+        resume_from=resume_from,
+        stream=websocket.query_params.get("stream"),
+    )
+    if topics and "state" in topics:
+        await websocket.app.state.state_sync.send_snapshot(websocket)
     try:
         while True:
             raw = await websocket.receive_text()
@@ -46,7 +76,10 @@ async def _handle_ws_action(
     orchestrator = websocket.app.state.transaction_orchestrator
     settings = websocket.app.state.settings
 
-    if action == "SIMULATE_BILL_INSERT" and settings.use_mock_hardware:
+    if action in ("SUBSCRIBE", "UNSUBSCRIBE"):
+        await _handle_subscription(websocket, action, data)
+
+    elif action == "SIMULATE_BILL_INSERT" and settings.use_mock_hardware:
         denom = data.get("denom")
         if denom and orchestrator.has_active_transaction:
             try:
@@ -77,3 +110,29 @@ async def _handle_ws_action(
                 await orchestrator.handle_coin_inserted(denom=denom, total=0)
             except Exception as e:
                 logger.error(f"WS SIMULATE_COIN_INSERT error: {e}")
+
+
+async def _handle_subscription(
+    websocket: WebSocket, action: str, data: dict
+) -> None:
+    """Update the client's topics and reply with the resulting set."""
+    ws_manager = websocket.app.state.ws_manager
+    topics = data.get("topics", [])
+    if isinstance(topics, str):
+        topics = [topics]
+    payload = {}
+    try:
+        if action == "SUBSCRIBE":
+            current = ws_manager.subscribe(websocket, topics)
+        else:
+            current = ws_manager.unsubscribe(websocket, topics)
+    except (TypeError, ValueError) as e:
+        current = ws_manager.subscribe(websocket, [])
+        payload["error"] = str(e)
+    payload["topics"] = current
+    await ws_manager.send(
+        websocket, WSEvent(type=WSEventType.SUBSCRIPTIONS, payload=payload)
+    )
+    # (Re)subscribing to state always starts from a fresh snapshot
+    if action == "SUBSCRIBE" and "error" not in payload and "state" in topics:
+        await websocket.app.state.state_sync.send_snapshot(websocket)
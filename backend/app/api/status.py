@@ -7,3 +7,21 @@ router = APIRouter(tags=["status"])
 async def get_status(request: Request):
     status = request.app.state.machine_status
     return status.snapshot().model_dump(mode="json")
+
+
+@router.get("/status/serial")
+async def get_serial_status(request: Request):
+    """Serial link state and command scheduler queue-wait metrics."""
+    return request.app.state.serial_manager.stats()
+
+
+@router.get("/status/events")
+async def get_event_queue_status(request: Request):
+    """Serial event queue high-watermark and overflow counters."""
+    return request.app.state.serial_manager.event_queue_stats()
+
+
+@router.get("/status/ws")
+async def get_ws_status(request: Request):
+    """WebSocket client queue depths, drops and evictions."""
+    return request.app.state.ws_manager.stats()
@@ -1,40 +1,364 @@
-"""WebSocket endpoint and connection manager for real-time event broadcast."""
+"""WebSocket endpoint and connection manager for real-time event broadcast.
 
+Each client gets a bounded outbound queue drained by its own writer task,
+so broadcast() only serializes the event once and enqueues the text; a
+slow or half-dead client never stalls the caller or the other clients.
+When a client's queue is full, the slow-client policy decides:
+- evict: close the client (code 1013, "try again later"); it reconnects.
+- drop_oldest: discard its oldest queued message and count the drop.
+A send that takes longer than send_timeout evicts the client either way.
+
+Clients subscribe to topics (see WS_TOPICS), by default all but the
+opt-in ones. An event is serialized once per distinct subscription set
+that wants it, and an EVENT_BATCH is trimmed to the entries each set wants.
+
+Every broadcast is stamped with a sequence number (per stream: a random
+id that changes when the backend restarts) and kept in a fixed-size ring
+buffer. A reconnecting client passes the last seq it saw with its stream
+id; connect() then replays the buffered events it missed, filtered by its
+topics, as one EVENT_BATCH whose entries carry their seq, followed by a
+HELLO with the current stream and seq. HELLO's `gap` is true when events
+were missed that can no longer be replayed (buffer overrun, restart, or
+first connect), in which case the client should refetch state over REST.
+Seq gaps are normal for clients with topic filters. STATE_PATCH events
+are neither numbered nor buffered: they would crowd out the events replay
+exists for, and a state subscriber resyncs from a fresh snapshot anyway.
+"""
+
+import asyncio
 import logging
-from typing import List
+import secrets
+from collections import deque
+from typing import Deque, Dict, FrozenSet, Iterable, List, Optional, Tuple
 
 from fastapi import WebSocket
 
-from app.models.events import WSEvent
+from app.models.events import (
+    EVENT_TOPICS,
+    OPT_IN_TOPICS,
+    WS_TOPICS,
+    WSEvent,
+    WSEventType,
+)
 
 logger = logging.getLogger(__name__)
 
+SLOW_CLIENT_POLICIES = ("evict", "drop_oldest")
+# "Try Again Later": server-side overload
+_CLOSE_SLOW_CLIENT = 1013
+ALL_TOPICS: FrozenSet[str] = frozenset(WS_TOPICS)
+DEFAULT_TOPICS: FrozenSet[str] = ALL_TOPICS - frozenset(OPT_IN_TOPICS)
+# Broadcast without a seq and kept out of the replay buffer
+_UNREPLAYED_TYPES = frozenset({WSEventType.STATE_PATCH})
+
+
+def parse_topics(topics: Iterable[str]) -> FrozenSet[str]:
+    """Validate topic names.
+
+    Raises:
+        ValueError: If a topic is not in WS_TOPICS.
+    """
+    parsed = frozenset(topics)
+    unknown = parsed - ALL_TOPICS
+    if unknown:
+        raise ValueError(
+            f"Unknown WebSocket topic: {', '.join(sorted(unknown))} "
+            f"(expected one of {', '.join(WS_TOPICS)})"
+        )
+    return parsed
+
+
+def _wanted(event_type: str, topics: FrozenSet[str]) -> bool:
+    return EVENT_TOPICS.get(event_type) in topics
+
+
+class _Client:
+    """Outbound state for one connected socket."""
+
+    def __init__(
+        self, websocket: WebSocket, queue_size: int, topics: FrozenSet[str]
+    ):
+        self.websocket = websocket
+        self.topics = topics
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.writer: Optional[asyncio.Task] = None
+        self.sent = 0
+        self.dropped = 0
+        self.max_depth = 0
+
 
 class ConnectionManager:
-    def __init__(self):
-        self._connections: List[WebSocket] = []
+    def __init__(
+        self,
+        send_queue_size: int = 256,
+        send_timeout: float = 5.0,
+        slow_client_policy: str = "evict",
+        replay_buffer_size: int = 1024,
+    ):
+        if slow_client_policy not in SLOW_CLIENT_POLICIES:
+            raise ValueError(
+                f"Unknown slow client policy: {slow_client_policy} "
+                f"(expected one of {', '.join(SLOW_CLIENT_POLICIES)})"
+            )
+        # Room for a replay and its HELLO
+        self._queue_size = max(2, send_queue_size)
+        self._send_timeout = send_timeout
+        self._policy = slow_client_policy
+        self.stream_id = secrets.token_hex(4)
+        self._seq = 0
+        self._history: Deque[WSEvent] = deque(maxlen=max(1, replay_buffer_size))
+        # Keyed by id(): starlette WebSockets are Mappings, so not hashable
+        self._clients: Dict[int, _Client] = {}
+        self.broadcasts = 0
+        self.evictions = 0
+        self.dropped = 0
+        # Client deliveries skipped because of topic subscriptions
+        self.filtered = 0
+        self.resumes = 0
+        self.replayed = 0
+
+    async def connect(
+        self,
+        websocket: WebSocket,
+        topics: Optional[FrozenSet[str]] = None,
+        resume_from: Optional[int] = None,
+        stream: Optional[str] = None,
+    ) -> None:
+        """Register a client; with `resume_from`, replay what it missed.
 
-    async def connect(self, websocket: WebSocket) -> None:
+        Replay happens before the client is registered for broadcasts and
+        without yielding, so it is neither duplicated nor reordered.
+        """
         await websocket.accept()
-        self._connections.append(websocket)
-        logger.info(f"WebSocket client connected. Total: {len(self._connections)}")
+        client = _Client(
+            websocket,
+            self._queue_size,
+            DEFAULT_TOPICS if topics is None else topics,
+        )
+        if resume_from is not None:
+            replayed, gap = self._replay(client, resume_from, stream)
+            client.queue.put_nowait(WSEvent(
+                type=WSEventType.HELLO,
+                payload={
+                    "stream": self.stream_id,
+                    "seq": self._seq,
+                    "replayed": replayed,
+                    "gap": gap,
+                },
+            ).model_dump_json())
+        client.writer = asyncio.create_task(self._write_loop(client))
+        self._clients[id(websocket)] = client
+        logger.info(f"WebSocket client connected. Total: {len(self._clients)}")
 
     def disconnect(self, websocket: WebSocket) -> None:
-        if websocket in self._connections:
-            self._connections.remove(websocket)
-        logger.info(f"WebSocket client disconnected. Total: {len(self._connections)}")
+        client = self._clients.pop(id(websocket), None)
+        if client and client.writer and client.writer is not asyncio.current_task():
+            client.writer.cancel()
+        logger.info(f"WebSocket client disconnected. Total: {len(self._clients)}")
+
+    def subscribe(self, websocket: WebSocket, topics: Iterable[str]) -> List[str]:
+        """Add topics to a client's subscriptions; returns the new set."""
+        client = self._clients.get(id(websocket))
+        if client is None:
+            return []
+        client.topics = client.topics | parse_topics(topics)
+        return sorted(client.topics)
+
+    def unsubscribe(self, websocket: WebSocket, topics: Iterable[str]) -> List[str]:
+        """Remove topics from a client's subscriptions; returns the new set."""
+        client = self._clients.get(id(websocket))
+        if client is None:
+            return []
+        client.topics = client.topics - parse_topics(topics)
+        return sorted(client.topics)
+
+    def has_subscribers(self, topic: str) -> bool:
+        return any(topic in client.topics for client in self._clients.values())
+
+    async def send(self, websocket: WebSocket, event: WSEvent) -> None:
+        """Queue `event` for one client, regardless of its topics."""
+        client = self._clients.get(id(websocket))
+        if client is not None:
+            self._enqueue(client, event.model_dump_json())
 
     async def broadcast(self, event: WSEvent) -> None:
-        message = event.model_dump_json()
-        stale = []
-        for ws in self._connections:
+        """Queue `event` for subscribed clients without waiting on any socket.
+
+        Stamps event.seq and records the event for replay, except for
+        _UNREPLAYED_TYPES.
+        """
+        if event.type not in _UNREPLAYED_TYPES:
+            self._seq += 1
+            event.seq = self._seq
+            self._history.append(event)
+        if not self._clients:
+            return
+        self.broadcasts += 1
+        # Subscription set -> message (None: nothing wanted)
+        rendered: Dict[FrozenSet[str], Optional[str]] = {}
+        full: Optional[str] = None
+        for client in list(self._clients.values()):
+            if client.topics not in rendered:
+                selected = self._select(event, client.topics)
+                if selected is event:
+                    if full is None:
+                        full = event.model_dump_json()
+                    rendered[client.topics] = full
+                else:
+                    rendered[client.topics] = (
+                        selected.model_dump_json() if selected else None
+                    )
+            message = rendered[client.topics]
+            if message is None:
+                self.filtered += 1
+                continue
+            self._enqueue(client, message)
+
+    async def shutdown(self) -> None:
+        """Stop all writer tasks (application shutdown)."""
+        writers = [c.writer for c in self._clients.values() if c.writer]
+        self._clients.clear()
+        for writer in writers:
+            writer.cancel()
+        await asyncio.gather(*writers, return_exceptions=True)
+
+    @staticmethod
+    def _select(event: WSEvent, topics: FrozenSet[str]) -> Optional[WSEvent]:
+        """The part of `event` a client subscribed to `topics` receives."""
+        if event.type != WSEventType.EVENT_BATCH:
+            return event if _wanted(event.type, topics) else None
+        entries = event.payload.get("events", [])
+        kept = [entry for entry in entries if _wanted(entry["type"], topics)]
+        if len(kept) == len(entries):
+            return event
+        if not kept:
+            return None
+        if len(kept) == 1:
+            return WSEvent(
+                type=kept[0]["type"],
+                payload=kept[0]["payload"],
+                timestamp=event.timestamp,
+                seq=event.seq,
+            )
+        return WSEvent(
+            type=WSEventType.EVENT_BATCH,
+            payload={"events": kept},
+            timestamp=event.timestamp,
+            seq=event.seq,
+        )
+
+    def _replay(
+        self, client: _Client, resume_from: int, stream: Optional[str]
+    ) -> Tuple[int, bool]:
+        """Queue buffered events after `resume_from`; returns (count, gap).
+
+        The client's queue is still empty; the replay goes out as a single
+        message so it cannot overflow it however much was missed.
+        """
+        if stream != self.stream_id:
+            return 0, True
+        self.resumes += 1
+        oldest = self._history[0].seq if self._history else self._seq + 1
+        gap = resume_from + 1 < oldest or resume_from > self._seq
+        entries: List[dict] = []
+        for event in self._history:
+            if event.seq <= resume_from:
+                continue
+            selected = self._select(event, client.topics)
+            if selected is None:
+                continue
+            if selected.type == WSEventType.EVENT_BATCH:
+                entries.extend(
+                    {**entry, "seq": event.seq}
+                    for entry in selected.payload["events"]
+                )
+            else:
+                entries.append({
+                    "type": selected.type.value,
+                    "payload": selected.payload,
+                    "seq": event.seq,
+                })
+        if entries:
+            client.queue.put_nowait(WSEvent(
+                type=WSEventType.EVENT_BATCH,
+                payload={"events": entries, "replay": True},
+            ).model_dump_json())
+            self.replayed += len(entries)
+        return len(entries), gap
+
+    def _enqueue(self, client: _Client, message: str) -> None:
+        if client.queue.full():
+            if self._policy == "evict":
+                self._evict(client, "send queue full")
+                return
+            client.queue.get_nowait()
+            client.dropped += 1
+            self.dropped += 1
+        client.queue.put_nowait(message)
+        client.max_depth = max(client.max_depth, client.queue.qsize())
+
+    async def _write_loop(self, client: _Client) -> None:
+        websocket = client.websocket
+        while True:
+            message = await client.queue.get()
             try:
-                await ws.send_text(message)
+                # asyncio.timeout() rather than wait_for(): wait_for() can
+                # swallow a cancel() that races with the send completing
+                async with asyncio.timeout(self._send_timeout):
+                    await websocket.send_text(message)
+            except TimeoutError:
+                self._evict(client, f"send timed out after {self._send_timeout}s")
+                return
             except Exception:
-                stale.append(ws)
-        for ws in stale:
-            self.disconnect(ws)
+                # Socket already gone; the endpoint's receive loop may not
+                # have noticed yet
+                self.disconnect(websocket)
+                return
+            client.sent += 1
+
+    def _evict(self, client: _Client, reason: str) -> None:
+        websocket = client.websocket
+        if self._clients.get(id(websocket)) is not client:
+            return
+        self.evictions += 1
+        logger.warning(f"Evicting slow WebSocket client: {reason}")
+        self.disconnect(websocket)
+        asyncio.get_running_loop().create_task(self._close(websocket))
+
+    @staticmethod
+    async def _close(websocket: WebSocket) -> None:
+        try:
+            await websocket.close(code=_CLOSE_SLOW_CLIENT)
+        except Exception:
+            pass
 
     @property
     def client_count(self) -> int:
-        return len(self._connections)
+        return len(self._clients)
+
+    def stats(self) -> dict:
+        """Per-client queue depth and send/drop counters."""
+        clients: List[dict] = [
+            {
+                "topics": sorted(client.topics),
+                "queued": client.queue.qsize(),
+                "max_queued": client.max_depth,
+                "sent": client.sent,
+                "dropped": client.dropped,
+            }
+            for client in self._clients.values()
+        ]
+        return {
+            "clients": clients,
+            "queue_size": self._queue_size,
+            "slow_client_policy": self._policy,
+            "broadcasts": self.broadcasts,
+            "evictions": self.evictions,
+            "dropped": self.dropped,
+            "filtered": self.filtered,
+            "stream": self.stream_id,
+            "seq": self._seq,
+            "replay_buffered": len(self._history),
+            "resumes": self.resumes,
+            "replayed": self.replayed,
+        }
@@ -1,4 +1,5 @@
 from functools import lru_cache
+from typing import Optional
 
 from pydantic_settings import BaseSettings
 
@@ -9,6 +10,32 @@ class Settings(BaseSettings):
     serial_port_coin: str = "/dev/coinnect_coin"
     baud_rate: int = 115200
     serial_timeout: int = 5
+    # Serial reader: poll (thread polling in_waiting, default), or opt in to
+    # blocking (thread woken by read()) or asyncio (fd watcher)
+    serial_reader_mode: str = "poll"
+    # Serial framing: json, or msgpack (negotiated, falls back to json)
+    serial_framing: str = "json"
+    # Reconnect backoff after a lost link: doubles from initial up to max (s)
+    serial_reconnect_initial_delay: float = 0.5
+    serial_reconnect_max_delay: float = 30.0
+    # Commands awaiting a response per port; the rest queue by priority.
+    # Above 1 only for firmware that echoes command ids
+    serial_max_in_flight: int = 1
+    # Raw serial traffic capture directory ("" disables recording)
+    serial_capture_dir: str = ""
+    serial_capture_max_bytes: int = 8 * 1024 * 1024
+    serial_capture_max_files: int = 10
+    # Replay the latest capture in this directory instead of opening ports
+    serial_replay_dir: str = ""
+    # Replay speed: 1.0 = recorded timing, 10.0 = 10x faster, 0 = no delays
+    serial_replay_speed: float = 1.0
+
+    # Serial event queue bound; 0 keeps it unbounded. When bounded, COIN_IN
+    # is never dropped, DOOR_STATE/TAMPER repeats coalesce, KEYPAD is dropped
+    event_queue_capacity: int = 0
+    # Max events the dispatcher applies per wakeup; > 1 drains ready events
+    # in batches and sends one WebSocket message per batch
+    event_batch_size: int = 1
 
     # Mock serial
     use_mock_serial: bool = False
@@ -21,6 +48,14 @@ class Settings(BaseSettings):
     environment: str = "development"
     enable_docs: bool = True
 
+    # WebSocket fan-out: per-client outbound queue length, per-send timeout
+    # (s), and what to do when a client's queue is full (evict, drop_oldest)
+    ws_send_queue_size: int = 256
+    ws_send_timeout: float = 5.0
+    ws_slow_client_policy: str = "evict"
+    # Recent broadcasts kept for replay to reconnecting clients (resume_from)
+    ws_replay_buffer_size: int = 1024
+
     # Logging
     log_level: str = "INFO"
 
@@ -59,12 +94,63 @@ class Settings(BaseSettings):
     bill_store_duration: float = 2.0
     bill_eject_duration: float = 1.5
 
+    # Send coin portions matching the firmware's greedy breakdown as one
+    # COIN_CHANGE command instead of per-denomination COIN_DISPENSE
+    coin_change_offload: bool = False
+
+    # Dispense bills and coins concurrently for mixed payouts
+    parallel_dispense: bool = False
+
+    # Change dispensing policy: min_items, balance
+    dispense_policy: str = "min_items"
+
+    # Change feasibility index ceiling (PHP)
+    payable_index_ceiling: int = 50000
+
+    # Memoized change plans (entries, per inventory version)
+    change_plan_cache_size: int = 128
+
+    # Transaction state persistence: two_phase (WAL entry committed PENDING,
+    # then COMPLETED) or group (WAL entry and record update in one commit)
+    transaction_commit_mode: str = "two_phase"
+
     # Storage slot capacity
     storage_slot_capacity: int = 100
 
+    # Inventory ledger directory ("" keeps consumable counts in memory only);
+    # records between compacted checkpoints; fsync records (in the
+    # background, at most every interval seconds)
+    inventory_ledger_dir: str = ""
+    inventory_ledger_checkpoint_every: int = 1000
+    inventory_ledger_fsync: bool = True
+    inventory_ledger_fsync_interval: float = 0.05
+
     # Database
     db_url: str = "sqlite+aiosqlite:///./coinnect.db"
 
+    # SQLite storage profile: default (SQLite's own settings), durable,
+    # balanced, fast. The last three switch the database file to WAL, which
+    # persists in the file (see app/core/database.py)
+    sqlite_profile: str = "default"
+
+    # Per-PRAGMA overrides of the profile ("" / None keeps the profile's)
+    sqlite_synchronous: str = ""
+    sqlite_mmap_size: Optional[int] = None
+    sqlite_cache_size: Optional[int] = None
+    sqlite_busy_timeout_ms: Optional[int] = None
+
+    # Seconds between background WAL checkpoints (0 disables)
+    sqlite_checkpoint_interval: float = 300.0
+
+    # wal_entries compaction: COMPLETED entries of transactions that ended
+    # more than retention days ago are deleted every interval seconds
+    # (0, the default, disables it since it deletes history), appended first
+    # to the archive file if one is set
+    wal_retention_days: float = 30.0
+    wal_compaction_interval: float = 0.0
+    wal_compaction_batch_size: int = 500
+    wal_archive_path: str = ""
+
     model_config = {"env_file": ".env", "env_file_encoding": "utf-8"}
 
 
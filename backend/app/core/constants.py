@@ -46,6 +46,7 @@ class ErrorCode(str, Enum):
     TIMEOUT = "TIMEOUT"
     MOTOR_FAULT = "MOTOR_FAULT"
     LOCKED_OUT = "LOCKED_OUT"
+    INVALID_MODE = "INVALID_MODE"
 
 
 class ControllerType(str, Enum):
@@ -0,0 +1,117 @@
+"""Bounded serial event queue with per-event-type overflow policies.
+
+Reader threads feed events with put_nowait() via call_soon_threadsafe, so
+the producer can never wait; instead each event type has a policy:
+
+- keep: always enqueued, even past capacity (COIN_IN is money; READY and
+  link events are rare). Enqueues past capacity are counted.
+- coalesce: state events (DOOR_STATE, TAMPER). While an event with the same
+  type, controller and sensor is still queued, a newer one overwrites it in
+  place, so each key holds at most one queue slot and the latest state wins.
+- drop: discarded while the queue is at capacity (KEYPAD, unknown types).
+
+Coalescing mutates the queued dict, so consumers must not hold on to events
+they have not dequeued yet.
+"""
+
+import asyncio
+import logging
+from collections import Counter
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+POLICY_KEEP = "keep"
+POLICY_COALESCE = "coalesce"
+POLICY_DROP = "drop"
+
+DEFAULT_EVENT_POLICIES: Dict[str, str] = {
+    "COIN_IN": POLICY_KEEP,
+    "READY": POLICY_KEEP,
+    "DEVICE_DISCONNECTED": POLICY_KEEP,
+    "DEVICE_CONNECTED": POLICY_KEEP,
+    "DOOR_STATE": POLICY_COALESCE,
+    "TAMPER": POLICY_COALESCE,
+    "KEYPAD": POLICY_DROP,
+}
+
+
+class BoundedEventQueue(asyncio.Queue):
+    """asyncio.Queue of event dicts that applies overflow policies."""
+
+    def __init__(
+        self,
+        capacity: int = 1000,
+        policies: Optional[Dict[str, str]] = None,
+    ):
+        # Unbounded underneath; capacity is enforced per policy
+        super().__init__()
+        self._capacity = max(1, capacity)
+        self._policies = {**DEFAULT_EVENT_POLICIES, **(policies or {})}
+        # Coalescing key -> the queued event dict it may overwrite
+        self._slots: Dict[Tuple, dict] = {}
+        self.high_watermark = 0
+        self.enqueued: Counter = Counter()
+        self.coalesced: Counter = Counter()
+        self.dropped: Counter = Counter()
+        self.over_capacity: Counter = Counter()
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    def put_nowait(self, item: dict) -> None:
+        event_type = item.get("event", "UNKNOWN")
+        policy = self._policies.get(event_type, POLICY_DROP)
+        full = self.qsize() >= self._capacity
+
+        if policy == POLICY_COALESCE:
+            slot = self._slots.get(self._coalesce_key(item))
+            if slot is not None:
+                slot.clear()
+                slot.update(item)
+                self.coalesced[event_type] += 1
+                return
+        elif policy == POLICY_DROP and full:
+            self.dropped[event_type] += 1
+            if self.dropped[event_type] % 100 == 1:
+                logger.warning(
+                    f"Event queue full ({self._capacity}); dropped "
+                    f"{self.dropped[event_type]} {event_type} event(s)"
+                )
+            return
+
+        if full:
+            self.over_capacity[event_type] += 1
+        super().put_nowait(item)
+        self.enqueued[event_type] += 1
+        self.high_watermark = max(self.high_watermark, self.qsize())
+
+    def _put(self, item: dict) -> None:
+        super()._put(item)
+        if self._policies.get(item.get("event")) == POLICY_COALESCE:
+            self._slots[self._coalesce_key(item)] = item
+
+    def _get(self) -> dict:
+        item = super()._get()
+        if self._policies.get(item.get("event")) == POLICY_COALESCE:
+            key = self._coalesce_key(item)
+            if self._slots.get(key) is item:
+                del self._slots[key]
+        return item
+
+    @staticmethod
+    def _coalesce_key(item: dict) -> Tuple:
+        return (item.get("event"), item.get("_controller"), item.get("sensor"))
+
+    def stats(self) -> dict:
+        """Occupancy and per-event-type overflow counters."""
+        return {
+            "capacity": self._capacity,
+            "size": self.qsize(),
+            "high_watermark": self.high_watermark,
+            "enqueued": dict(self.enqueued),
+            "coalesced": dict(self.coalesced),
+            "dropped": dict(self.dropped),
+            "over_capacity": dict(self.over_capacity),
+        }
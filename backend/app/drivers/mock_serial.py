@@ -3,13 +3,26 @@
 Drop-in replacement for pyserial.Serial. Two modes:
 - Simple (mock_delay=0): instant canned responses, no state tracking.
 - Realistic (mock_delay>0): simulates timing, internal state, and faults.
+
+Reads block like pyserial (timeout=None waits forever, 0 never waits) and
+wake as soon as a response or event is buffered. fileno() returns a pipe
+that is readable while data is buffered, so the port can be watched with
+select() or loop.add_reader().
+
+Like protocol-v2 firmware, VERSION advertises "msgpack" in `caps` (when
+the msgpack package is installed) and FRAMING switches the link to
+binary frames (see serial_framing).
+
+inject_disconnect() simulates the USB cable being pulled: the instance
+stays "open" but every read and write raises OSError, as pyserial does.
+While a port name is unplug()ed, opening it raises OSError as well.
 """
 
 import json
+import os
 import threading
 import time
-from io import BytesIO
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set
 
 from app.core.constants import (
     DENOM_TO_SLOT,
@@ -18,9 +31,19 @@ from app.core.constants import (
     CoinDenom,
     ControllerType,
 )
+from app.drivers.serial_framing import (
+    FRAMING_JSON,
+    FRAMING_MSGPACK,
+    FrameDecoder,
+    encode_frame,
+    msgpack_available,
+)
 
 
 class MockSerial:
+    # Port names that currently fail to open (see unplug()/replug())
+    _unplugged_ports: Set[str] = set()
+
     def __init__(
         self,
         port: str = "",
@@ -28,14 +51,28 @@ class MockSerial:
         timeout: Optional[float] = None,
         mock_delay: float = 0.0,
     ):
+        if port in MockSerial._unplugged_ports:
+            raise OSError(f"could not open port {port}: device unplugged")
         self.port = port
         self.baudrate = baudrate
         self.timeout = timeout
         self.mock_delay = mock_delay
         self.is_open = True
 
-        self._read_buffer = BytesIO()
+        self._read_buffer = bytearray()
         self._lock = threading.Lock()
+        self._data_ready = threading.Condition(self._lock)
+        # Wake-up pipe for fileno(); holds one byte while data is buffered
+        self._wake_r: Optional[int] = None
+        self._wake_w: Optional[int] = None
+        self._wake_set = False
+        self._read_cancelled = False
+        self._disconnected = False
+
+        # Link framing; switched by the FRAMING command
+        self._framing = FRAMING_JSON
+        self._framing_next: Optional[str] = None
+        self._frame_decoder = FrameDecoder()
 
         # Determine controller identity from port name
         port_lower = port.lower()
@@ -59,14 +96,17 @@ class MockSerial:
     @property
     def in_waiting(self) -> int:
         with self._lock:
-            pos = self._read_buffer.tell()
-            self._read_buffer.seek(0, 2)
-            end = self._read_buffer.tell()
-            self._read_buffer.seek(pos)
-            return end - pos
+            self._check_link()
+            return len(self._read_buffer)
 
     def write(self, data: bytes) -> int:
         with self._lock:
+            self._check_link()
+            if self._framing == FRAMING_MSGPACK:
+                for cmd_json in self._frame_decoder.feed(data):
+                    self._handle_command(cmd_json)
+                return len(data)
+
             try:
                 line = data.decode("utf-8").strip()
                 cmd_json = json.loads(line)
@@ -74,38 +114,66 @@ class MockSerial:
                 self._buffer_response({"status": "ERROR", "code": "PARSE_ERROR"})
                 return len(data)
 
-            responses = self._dispatch_command(cmd_json)
-            for resp in responses:
-                self._buffer_response(resp)
-
+            self._handle_command(cmd_json)
             return len(data)
 
+    def _handle_command(self, cmd_json: dict) -> None:
+        responses = self._dispatch_command(cmd_json)
+        for resp in responses:
+            # Echo the correlation ID like protocol-v2 firmware
+            if "id" in cmd_json:
+                resp["id"] = cmd_json["id"]
+            self._buffer_response(resp)
+
+        # FRAMING takes effect after its (old-framing) response
+        if self._framing_next is not None:
+            self._framing = self._framing_next
+            self._framing_next = None
+
     def readline(self) -> bytes:
-        # Block until a line is available or timeout
-        deadline = time.monotonic() + (self.timeout or 5.0)
-        while time.monotonic() < deadline:
-            with self._lock:
-                line = self._read_buffer.readline()
-                if line and line.endswith(b"\n"):
-                    # Compact buffer: move remaining data to start
-                    remaining = self._read_buffer.read()
-                    self._read_buffer = BytesIO(remaining)
-                    return line
-                # Reset position if we didn't get a full line
-                self._read_buffer.seek(0)
-            time.sleep(0.01)
-        return b""
+        # Block until a full line is available or timeout
+        with self._lock:
+            self._check_link()
+            if not self._wait_for(lambda: b"\n" in self._read_buffer):
+                return b""
+            end = self._read_buffer.index(b"\n") + 1
+            return self._take(end)
 
     def read(self, size: int = 1) -> bytes:
+        # Block until at least one byte is available or timeout
         with self._lock:
-            return self._read_buffer.read(size)
+            self._check_link()
+            if not self._wait_for(lambda: len(self._read_buffer) > 0):
+                return b""
+            return self._take(size)
+
+    def cancel_read(self) -> None:
+        """Wake a blocked read()/readline(), like pyserial on POSIX."""
+        with self._lock:
+            self._read_cancelled = True
+            self._data_ready.notify_all()
+
+    def fileno(self) -> int:
+        with self._lock:
+            if self._wake_r is None:
+                self._wake_r, self._wake_w = os.pipe()
+                self._wake_set = False
+                self._update_wake()
+            return self._wake_r
 
     def close(self) -> None:
-        self.is_open = False
+        with self._lock:
+            self.is_open = False
+            self._data_ready.notify_all()
+            for fd in (self._wake_r, self._wake_w):
+                if fd is not None:
+                    os.close(fd)
+            self._wake_r = self._wake_w = None
 
     def reset_input_buffer(self) -> None:
         with self._lock:
-            self._read_buffer = BytesIO()
+            self._read_buffer.clear()
+            self._update_wake()
 
     # --- Fault injection API ---
 
@@ -118,6 +186,28 @@ class MockSerial:
         with self._lock:
             self._buffer_response(event)
 
+    def inject_disconnect(self) -> None:
+        """Simulate the device dropping off the bus.
+
+        Blocked and future reads/writes raise OSError, and fileno() turns
+        readable so an event-loop reader notices immediately.
+        """
+        with self._lock:
+            self._disconnected = True
+            self._data_ready.notify_all()
+            if self._wake_w is not None and not self._wake_set:
+                os.write(self._wake_w, b"x")
+                self._wake_set = True
+
+    @classmethod
+    def unplug(cls, port: str) -> None:
+        """Make opening `port` fail until replug()."""
+        cls._unplugged_ports.add(port)
+
+    @classmethod
+    def replug(cls, port: str) -> None:
+        cls._unplugged_ports.discard(port)
+
     def set_state(self, **kwargs) -> None:
         """Override internal state for testing."""
         for key, value in kwargs.items():
@@ -128,12 +218,56 @@ class MockSerial:
     # --- Internal dispatch ---
 
     def _buffer_response(self, data: dict) -> None:
-        """Add a JSON response line to the read buffer."""
-        line = json.dumps(data) + "\n"
-        current_pos = self._read_buffer.tell()
-        self._read_buffer.seek(0, 2)  # seek to end
-        self._read_buffer.write(line.encode("utf-8"))
-        self._read_buffer.seek(current_pos)
+        """Add a response/event to the read buffer (lock held)."""
+        if self._framing == FRAMING_MSGPACK:
+            self._read_buffer.extend(encode_frame(data))
+        else:
+            line = json.dumps(data) + "\n"
+            self._read_buffer.extend(line.encode("utf-8"))
+        self._data_ready.notify_all()
+        self._update_wake()
+
+    def _wait_for(self, predicate) -> bool:
+        """Wait (lock held) until predicate() holds, honoring self.timeout."""
+        if self.timeout == 0:
+            return predicate()
+        self._data_ready.wait_for(
+            lambda: (
+                predicate()
+                or self._read_cancelled
+                or self._disconnected
+                or not self.is_open
+            ),
+            timeout=self.timeout,
+        )
+        self._read_cancelled = False
+        self._check_link()
+        return predicate()
+
+    def _check_link(self) -> None:
+        """Raise like pyserial once the device is gone (lock held)."""
+        if self._disconnected:
+            raise OSError(f"device disconnected: {self.port}")
+        if not self.is_open:
+            raise OSError(f"port not open: {self.port}")
+
+    def _take(self, size: int) -> bytes:
+        """Remove and return up to `size` bytes from the buffer (lock held)."""
+        chunk = bytes(self._read_buffer[:size])
+        del self._read_buffer[:size]
+        self._update_wake()
+        return chunk
+
+    def _update_wake(self) -> None:
+        """Keep the wake-up pipe readable iff data is buffered (lock held)."""
+        if self._wake_w is None or self._disconnected:
+            return
+        if self._read_buffer and not self._wake_set:
+            os.write(self._wake_w, b"x")
+            self._wake_set = True
+        elif not self._read_buffer and self._wake_set:
+            os.read(self._wake_r, 1)
+            self._wake_set = False
 
     def _dispatch_command(self, cmd_json: dict) -> List[dict]:
         # Check for injected fault
@@ -162,6 +296,7 @@ class MockSerial:
             "SECURITY_STATUS": self._handle_security_status,
             "PING": self._handle_ping,
             "VERSION": self._handle_version,
+            "FRAMING": self._handle_framing,
             "RESET": self._handle_reset,
         }
 
@@ -296,8 +431,19 @@ class MockSerial:
             "status": "OK",
             "version": "2.0.0",
             "controller": self._controller.value,
+            "caps": [FRAMING_MSGPACK] if msgpack_available() else [],
         }]
 
+    def _handle_framing(self, cmd: dict) -> List[dict]:
+        mode = cmd.get("mode")
+        supported = [FRAMING_JSON] + (
+            [FRAMING_MSGPACK] if msgpack_available() else []
+        )
+        if mode not in supported:
+            return [{"status": "ERROR", "code": "INVALID_MODE"}]
+        self._framing_next = mode
+        return [{"status": "OK", "mode": mode}]
+
     def _handle_reset(self, cmd: dict) -> List[dict]:
         self._homed = False
         self._current_position = 0
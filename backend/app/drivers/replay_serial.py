@@ -0,0 +1,176 @@
+"""Serial port that plays back a capture from SerialRecorder.
+
+Drop-in replacement for pyserial.Serial (like MockSerial), for reproducing
+field incidents and load-testing the backend without hardware.
+
+Playback is paced by the host's writes so it stays deterministic: received
+bytes recorded after the n-th transmitted chunk are only released once the
+host has written its n-th chunk, and then with their original delay after
+it divided by `speed` (speed=0 releases them immediately). Bytes recorded
+before the first command (boot events) are timed from when the port opens.
+Received bytes are replayed verbatim, including correlation IDs, so the
+host should issue the same command sequence as the recorded session;
+writes that differ from the recorded ones are counted in `mismatches`.
+
+fileno() is not provided, so use the "blocking" or "poll" reader modes.
+"""
+
+import threading
+import time
+from typing import List, Optional, Sequence, Tuple, Union
+
+from app.drivers.serial_recorder import (
+    DIRECTION_RX,
+    DIRECTION_TX,
+    read_captures,
+)
+
+
+class ReplaySerial:
+    def __init__(
+        self,
+        captures: Union[str, Sequence[str]],
+        speed: float = 1.0,
+        port: str = "",
+        baudrate: int = 115200,
+        timeout: Optional[float] = None,
+    ):
+        if speed < 0:
+            raise ValueError(f"Replay speed must be >= 0, got {speed}")
+        if isinstance(captures, str):
+            captures = [captures]
+        self.port = port
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self.speed = speed
+        self.is_open = True
+
+        # (gate, delay_s, data): released delay_s after the gate-th host
+        # write (gate 0 = port open)
+        self._script: List[Tuple[int, float, bytes]] = []
+        self._expected_writes: List[bytes] = []
+        anchor_ns = 0
+        for record in read_captures(captures):
+            if record.direction == DIRECTION_TX:
+                self._expected_writes.append(record.data)
+                anchor_ns = record.offset_ns
+            elif record.direction == DIRECTION_RX:
+                delay = (record.offset_ns - anchor_ns) / 1e9
+                self._script.append((
+                    len(self._expected_writes),
+                    delay / speed if speed else 0.0,
+                    record.data,
+                ))
+
+        self._read_buffer = bytearray()
+        self._lock = threading.Lock()
+        self._data_ready = threading.Condition(self._lock)
+        self._read_cancelled = False
+        self._cursor = 0
+        # Monotonic time of port open, then of each host write
+        self._gate_times: List[float] = [time.monotonic()]
+        self.mismatches = 0
+
+    @property
+    def finished(self) -> bool:
+        """Every recorded byte has been released to the reader."""
+        with self._lock:
+            return self._cursor >= len(self._script)
+
+    @property
+    def in_waiting(self) -> int:
+        with self._lock:
+            self._check_open()
+            self._release_due(time.monotonic())
+            return len(self._read_buffer)
+
+    def write(self, data: bytes) -> int:
+        with self._lock:
+            self._check_open()
+            written = len(self._gate_times) - 1
+            if (
+                written >= len(self._expected_writes)
+                or self._expected_writes[written] != data
+            ):
+                self.mismatches += 1
+            self._gate_times.append(time.monotonic())
+            self._data_ready.notify_all()
+            return len(data)
+
+    def readline(self) -> bytes:
+        with self._lock:
+            self._check_open()
+            if not self._wait_for(lambda: b"\n" in self._read_buffer):
+                return b""
+            end = self._read_buffer.index(b"\n") + 1
+            return self._take(end)
+
+    def read(self, size: int = 1) -> bytes:
+        with self._lock:
+            self._check_open()
+            if not self._wait_for(lambda: len(self._read_buffer) > 0):
+                return b""
+            return self._take(size)
+
+    def cancel_read(self) -> None:
+        with self._lock:
+            self._read_cancelled = True
+            self._data_ready.notify_all()
+
+    def close(self) -> None:
+        with self._lock:
+            self.is_open = False
+            self._data_ready.notify_all()
+
+    def reset_input_buffer(self) -> None:
+        with self._lock:
+            self._read_buffer.clear()
+
+    # --- Internal ---
+
+    def _check_open(self) -> None:
+        if not self.is_open:
+            raise OSError(f"port not open: {self.port}")
+
+    def _release_due(self, now: float) -> Optional[float]:
+        """Move due bytes to the read buffer (lock held).
+
+        Returns when the next record falls due, or None if it is waiting
+        on a host write (or the capture is exhausted).
+        """
+        while self._cursor < len(self._script):
+            gate, delay, data = self._script[self._cursor]
+            if gate >= len(self._gate_times):
+                return None
+            due = self._gate_times[gate] + delay
+            if due > now:
+                return due
+            self._read_buffer.extend(data)
+            self._cursor += 1
+        return None
+
+    def _wait_for(self, predicate) -> bool:
+        """Wait (lock held) until predicate() holds, honoring self.timeout."""
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        while True:
+            now = time.monotonic()
+            next_due = self._release_due(now)
+            if predicate():
+                return True
+            if self._read_cancelled or not self.is_open:
+                self._read_cancelled = False
+                return False
+            if deadline is not None and now >= deadline:
+                return False
+            wait_until = min(
+                (t for t in (next_due, deadline) if t is not None),
+                default=None,
+            )
+            self._data_ready.wait(
+                None if wait_until is None else max(0.0, wait_until - now)
+            )
+
+    def _take(self, size: int) -> bytes:
+        chunk = bytes(self._read_buffer[:size])
+        del self._read_buffer[:size]
+        return chunk
@@ -0,0 +1,112 @@
+"""Binary framing for the Arduino serial link (MessagePack + CRC).
+
+The link starts in JSON-lines mode. Controllers that advertise "msgpack" in
+their VERSION `caps` can be switched with a FRAMING command; the FRAMING
+response is still a JSON line, everything after it in both directions is
+framed as:
+
+    0xA5 | length (uint16, big-endian) | MessagePack payload | CRC16 (BE)
+
+The CRC is CRC-16/CCITT-FALSE (poly 0x1021, init 0xFFFF) over the payload.
+A bad magic byte, oversized length or CRC mismatch drops bytes until the
+next magic byte, so the decoder resynchronizes after line noise.
+
+msgpack is an optional dependency; without it only JSON framing is offered.
+"""
+
+import binascii
+import logging
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+FRAMING_JSON = "json"
+FRAMING_MSGPACK = "msgpack"
+
+FRAME_MAGIC = 0xA5
+# Largest payload accepted; Arduino RX buffers are far smaller than this
+MAX_PAYLOAD = 1024
+_HEADER_SIZE = 3
+_CRC_SIZE = 2
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - exercised only without msgpack
+    msgpack = None
+
+
+def msgpack_available() -> bool:
+    return msgpack is not None
+
+
+def crc16(data: bytes) -> int:
+    """CRC-16/CCITT-FALSE."""
+    return binascii.crc_hqx(data, 0xFFFF)
+
+
+def encode_frame(message: dict) -> bytes:
+    """Encode one message as a binary frame."""
+    payload = msgpack.packb(message, use_bin_type=True)
+    if len(payload) > MAX_PAYLOAD:
+        raise ValueError(f"Frame payload too large: {len(payload)} bytes")
+    return (
+        bytes([FRAME_MAGIC])
+        + len(payload).to_bytes(2, "big")
+        + payload
+        + crc16(payload).to_bytes(2, "big")
+    )
+
+
+class FrameDecoder:
+    """Incremental decoder: feed raw bytes, get complete messages back."""
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self.dropped_bytes = 0
+
+    def feed(self, chunk: bytes) -> List[dict]:
+        self._buffer.extend(chunk)
+        messages: List[dict] = []
+        while True:
+            message = self._next_message()
+            if message is None:
+                return messages
+            messages.append(message)
+
+    def _next_message(self) -> Optional[dict]:
+        buf = self._buffer
+        while buf:
+            if buf[0] != FRAME_MAGIC:
+                self._resync()
+                continue
+            if len(buf) < _HEADER_SIZE:
+                return None
+            length = int.from_bytes(buf[1:3], "big")
+            if length > MAX_PAYLOAD:
+                self._resync()
+                continue
+            end = _HEADER_SIZE + length + _CRC_SIZE
+            if len(buf) < end:
+                return None
+            payload = bytes(buf[_HEADER_SIZE:_HEADER_SIZE + length])
+            if crc16(payload) != int.from_bytes(buf[end - _CRC_SIZE:end], "big"):
+                logger.warning("Serial frame CRC mismatch, resyncing")
+                self._resync()
+                continue
+            del buf[:end]
+            try:
+                message = msgpack.unpackb(payload, raw=False)
+            except Exception as e:
+                logger.warning(f"Undecodable serial frame: {e}")
+                continue
+            if isinstance(message, dict):
+                return message
+            logger.warning(f"Serial frame is not a map: {message!r}")
+        return None
+
+    def _resync(self) -> None:
+        """Drop bytes up to the next magic byte after the current position."""
+        next_magic = self._buffer.find(bytes([FRAME_MAGIC]), 1)
+        dropped = len(self._buffer) if next_magic < 0 else next_magic
+        del self._buffer[:dropped]
+        self.dropped_bytes += dropped
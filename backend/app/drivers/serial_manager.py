@@ -3,25 +3,232 @@
 Each serial port gets a dedicated reader thread that pushes parsed JSON into
 an asyncio.Queue. Commands are sent via thread-safe locked writes, with
 responses routed back through asyncio.Future objects.
+
+How incoming bytes are read is selected by `reader_mode`:
+- "poll" (default): reader thread polling in_waiting every 10 ms.
+- "blocking": reader thread blocks in read() and wakes when bytes arrive.
+  The port's read timeout becomes _BLOCKING_READ_TIMEOUT; serial_timeout
+  still bounds each command through send_command().
+- "asyncio": no thread; the port's file descriptor is watched with
+  loop.add_reader() and lines are parsed on the event loop (POSIX only).
+The faster readers change how the port is read, so they are opt-in.
+
+With framing="msgpack", connect() asks the controller for its VERSION caps
+and, if it supports binary framing, switches the link to length-prefixed
+MessagePack frames with a CRC (see serial_framing); otherwise the link stays
+on JSON lines. Binary framing needs a "blocking" or "asyncio" reader.
+
+Every command is tagged with a per-port correlation `id` and its future is
+kept in a pending map. Responses echoing an `id` resolve that command. A
+response without one (firmware predating correlation IDs) resolves the
+pending command only when there is exactly one; with several pending it
+cannot be matched safely and is dropped, so those commands time out.
+Pipelining (`max_in_flight` > 1) is therefore only for firmware known to
+echo ids.
+
+A read or write error marks the link lost: pending commands are failed,
+a DEVICE_DISCONNECTED event is queued, and a supervisor task reopens the
+port with exponential backoff, renegotiates framing (before the link counts
+as up, so no command goes out in the old framing) and queues
+DEVICE_CONNECTED. Commands in RETRYABLE_COMMANDS only read state, so they
+wait for the link and are re-sent within their timeout; anything else
+(DISPENSE, SORT, ...) fails with SerialError, since whether the controller
+acted on it is unknown.
+
+At most `max_in_flight` commands per port await a response at once; the
+rest wait in a CommandScheduler and are admitted by priority class
+(payout > security > status > diagnostics), then earliest deadline, so a
+burst of health checks cannot push a DISPENSE to the back of the line.
+A command whose timeout expires while queued is never sent.
+
+An optional SerialRecorder captures every chunk written and read; with
+`replay_dir` set, the port is replaced by a ReplaySerial playing back the
+latest capture for this controller.
 """
 
 import asyncio
+import heapq
+import itertools
 import json
 import logging
 import threading
 import time
-from typing import Optional
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
 
 from app.core.config import Settings
 from app.core.constants import ControllerType
 from app.core.errors import HardwareError, SerialError
 from app.core.errors import TimeoutError as HWTimeoutError
+from app.drivers.event_queue import BoundedEventQueue
+from app.drivers.serial_framing import (
+    FRAMING_JSON,
+    FRAMING_MSGPACK,
+    FrameDecoder,
+    encode_frame,
+    msgpack_available,
+)
+from app.drivers.serial_recorder import (
+    DIRECTION_RX,
+    DIRECTION_TX,
+    SerialRecorder,
+    capture_files,
+)
 
 logger = logging.getLogger(__name__)
 
+READER_MODES = ("blocking", "asyncio", "poll")
+FRAMINGS = (FRAMING_JSON, FRAMING_MSGPACK)
+
+# Read-only commands that are safe to re-send after a reconnect
+RETRYABLE_COMMANDS = frozenset({
+    "PING",
+    "VERSION",
+    "SORT_STATUS",
+    "DISPENSE_STATUS",
+    "SECURITY_STATUS",
+})
+
+# Scheduling classes, highest priority first
+PRIORITY_CLASSES = ("payout", "security", "status", "diagnostics")
+COMMAND_PRIORITIES: Dict[str, str] = {
+    "SORT": "payout",
+    "HOME": "payout",
+    "DISPENSE": "payout",
+    "COIN_DISPENSE": "payout",
+    "COIN_CHANGE": "payout",
+    "SECURITY_LOCK": "security",
+    "SECURITY_UNLOCK": "security",
+    "SECURITY_STATUS": "security",
+    "SORT_STATUS": "status",
+    "DISPENSE_STATUS": "status",
+    "COIN_RESET": "status",
+    "PING": "diagnostics",
+    "VERSION": "diagnostics",
+    "FRAMING": "diagnostics",
+    "RESET": "diagnostics",
+}
+_DEFAULT_PRIORITY = "status"
+
+# Read timeout for the blocking reader; only bounds shutdown latency, since
+# response timeouts are enforced by send_command()
+_BLOCKING_READ_TIMEOUT = 0.25
+
+
+class _LinkLost(Exception):
+    """The link dropped while a command was in flight."""
+
+
+class _ClassStats:
+    """Queue-wait counters for one priority class."""
+
+    def __init__(self):
+        self.admitted = 0
+        self.expired = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait: float) -> None:
+        self.admitted += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+
+class CommandScheduler:
+    """Admits commands onto one port by priority class, then deadline.
+
+    Must be used from the event loop thread. Every successful acquire()
+    must be paired with one release().
+    """
+
+    def __init__(self, max_in_flight: int = 1):
+        self._max_in_flight = max(1, max_in_flight)
+        self._in_flight = 0
+        # (rank, deadline, seq, class, future); cancelled entries are
+        # skipped when popped
+        self._waiting: List[Tuple[int, float, int, str, asyncio.Future]] = []
+        self._queued: Dict[str, int] = {name: 0 for name in PRIORITY_CLASSES}
+        self._seq = itertools.count()
+        self._stats = {name: _ClassStats() for name in PRIORITY_CLASSES}
+
+    @staticmethod
+    def priority_class(command_name: str) -> str:
+        return COMMAND_PRIORITIES.get(command_name, _DEFAULT_PRIORITY)
+
+    async def acquire(self, command_name: str, deadline: float) -> None:
+        """Wait for a send slot.
+
+        Args:
+            command_name: Serial command ("cmd"), used to pick the class.
+            deadline: Event loop time after which the command is abandoned.
+
+        Raises:
+            asyncio.TimeoutError: If no slot frees up before the deadline.
+        """
+        loop = asyncio.get_running_loop()
+        name = self.priority_class(command_name)
+        if self._in_flight < self._max_in_flight and not any(self._queued.values()):
+            self._in_flight += 1
+            self._stats[name].record(0.0)
+            return
+
+        queued_at = loop.time()
+        future = loop.create_future()
+        heapq.heappush(
+            self._waiting,
+            (PRIORITY_CLASSES.index(name), deadline, next(self._seq), name, future),
+        )
+        self._queued[name] += 1
+        try:
+            await asyncio.wait_for(future, timeout=max(0.0, deadline - loop.time()))
+        except asyncio.TimeoutError:
+            self._stats[name].expired += 1
+            # Handed a slot as the deadline hit: pass it on
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+        except BaseException:
+            # Cancelled after being handed a slot: pass it on
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+        finally:
+            self._queued[name] -= 1
+        self._stats[name].record(loop.time() - queued_at)
+
+    def release(self) -> None:
+        """Free a slot, handing it to the best waiter if there is one."""
+        while self._waiting:
+            *_, future = heapq.heappop(self._waiting)
+            if not future.done():
+                # The slot transfers; in_flight is unchanged
+                future.set_result(None)
+                return
+        self._in_flight -= 1
+
+    def stats(self) -> dict:
+        """Admission and queue-wait metrics per priority class."""
+        classes = {}
+        for name, stats in self._stats.items():
+            classes[name] = {
+                "admitted": stats.admitted,
+                "expired": stats.expired,
+                "queued": self._queued[name],
+                "mean_wait_ms": round(
+                    stats.total_wait / stats.admitted * 1000, 3
+                ) if stats.admitted else 0.0,
+                "max_wait_ms": round(stats.max_wait * 1000, 3),
+            }
+        return {
+            "max_in_flight": self._max_in_flight,
+            "in_flight": self._in_flight,
+            "queued": sum(self._queued.values()),
+            "classes": classes,
+        }
+
 
 class SerialConnection:
-    """Manages a single serial port: threaded reader + asyncio queue bridge."""
+    """Manages a single serial port: reader + asyncio queue bridge."""
 
     def __init__(
         self,
@@ -32,7 +239,25 @@ class SerialConnection:
         timeout: float = 5.0,
         use_mock: bool = False,
         mock_delay: float = 0.0,
+        reader_mode: str = "poll",
+        framing: str = FRAMING_JSON,
+        reconnect_initial_delay: float = 0.5,
+        reconnect_max_delay: float = 30.0,
+        max_in_flight: int = 1,
+        recorder: Optional[SerialRecorder] = None,
+        replay_dir: str = "",
+        replay_speed: float = 1.0,
     ):
+        if reader_mode not in READER_MODES:
+            raise ValueError(
+                f"Unknown serial reader mode: {reader_mode} "
+                f"(expected one of {', '.join(READER_MODES)})"
+            )
+        if framing not in FRAMINGS:
+            raise ValueError(
+                f"Unknown serial framing: {framing} "
+                f"(expected one of {', '.join(FRAMINGS)})"
+            )
         self._port_path = port
         self._baud_rate = baud_rate
         self._controller_type = controller_type
@@ -40,167 +265,589 @@ class SerialConnection:
         self._timeout = timeout
         self._use_mock = use_mock
         self._mock_delay = mock_delay
+        self._reader_mode = reader_mode
+        self._requested_framing = framing
+        self._reconnect_initial_delay = reconnect_initial_delay
+        self._reconnect_max_delay = reconnect_max_delay
+        self._scheduler = CommandScheduler(max_in_flight)
+        self._recorder = recorder
+        self._replay_dir = replay_dir
+        self._replay_speed = replay_speed
 
         self._serial = None
         self._reader_thread: Optional[threading.Thread] = None
         self._running = False
         self._send_lock = threading.Lock()
-        self._pending_response: Optional[asyncio.Future] = None
+        # Correlation ID -> response future, in send order
+        self._pending: "OrderedDict[int, asyncio.Future]" = OrderedDict()
+        self._pending_lock = threading.Lock()
+        self._next_id = itertools.count(1)
         self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._reader_fd: Optional[int] = None
+        self._rx_buffer = bytearray()
+        # Framing per direction; RX switches in the reader on the FRAMING
+        # response, TX once send_command() returns it
+        self._tx_framing = FRAMING_JSON
+        self._rx_framing = FRAMING_JSON
+        self._frame_decoder = FrameDecoder()
+        self._framing_command_id: Optional[int] = None
+
+        # Bumped on every link loss so stale reader threads stay quiet
+        self._generation = 0
+        self._link_up = asyncio.Event()
+        self._link_lost = asyncio.Event()
+        self._supervisor: Optional[asyncio.Task] = None
+        self.reconnects = 0
 
     async def connect(self) -> None:
         self._loop = asyncio.get_running_loop()
-
-        if self._use_mock:
-            from app.drivers.mock_serial import MockSerial
-            self._serial = MockSerial(
-                port=self._port_path,
-                baudrate=self._baud_rate,
-                timeout=self._timeout,
-                mock_delay=self._mock_delay,
-            )
-            logger.info(
-                f"MockSerial connected: {self._port_path} "
-                f"(controller={self._controller_type.value})"
-            )
-        else:
-            try:
+        self._open_port()
+        self._running = True
+        try:
+            self._start_reader()
+        except SerialError:
+            self._running = False
+            raise
+
+        # The link is up only once framing is settled; if it drops during
+        # negotiation the supervisor takes over
+        if await self._negotiated():
+            self._link_up.set()
+        self._supervisor = self._loop.create_task(self._supervise())
+
+    def _open_port(self) -> None:
+        try:
+            if self._replay_dir:
+                from app.drivers.replay_serial import ReplaySerial
+                files = capture_files(
+                    self._replay_dir, self._controller_type.value
+                )
+                if not files:
+                    raise FileNotFoundError(
+                        f"no {self._controller_type.value} capture in "
+                        f"{self._replay_dir}"
+                    )
+                self._serial = ReplaySerial(
+                    files,
+                    speed=self._replay_speed,
+                    port=self._port_path,
+                    baudrate=self._baud_rate,
+                    timeout=self._timeout,
+                )
+            elif self._use_mock:
+                from app.drivers.mock_serial import MockSerial
+                self._serial = MockSerial(
+                    port=self._port_path,
+                    baudrate=self._baud_rate,
+                    timeout=self._timeout,
+                    mock_delay=self._mock_delay,
+                )
+            else:
                 import serial
                 self._serial = serial.Serial(
                     port=self._port_path,
                     baudrate=self._baud_rate,
                     timeout=self._timeout,
                 )
-                logger.info(
-                    f"Serial connected: {self._port_path} "
-                    f"(controller={self._controller_type.value})"
-                )
-            except Exception as e:
+        except Exception as e:
+            raise SerialError(
+                f"Failed to open {self._port_path}: {e}",
+                port=self._port_path,
+            )
+        logger.info(
+            f"{type(self._serial).__name__} connected: "
+            f"{self._port_path} (controller={self._controller_type.value})"
+        )
+
+    def _start_reader(self) -> None:
+        if self._reader_mode == "asyncio":
+            try:
+                self._reader_fd = self._serial.fileno()
+                # Non-blocking reads: only called when the fd is readable
+                self._serial.timeout = 0
+                self._loop.add_reader(self._reader_fd, self._on_readable)
+            except (AttributeError, NotImplementedError, OSError) as e:
+                self._reader_fd = None
                 raise SerialError(
-                    f"Failed to open {self._port_path}: {e}",
+                    f"asyncio reader not supported on {self._port_path}: {e}",
                     port=self._port_path,
                 )
+        else:
+            if self._reader_mode == "blocking":
+                self._serial.timeout = _BLOCKING_READ_TIMEOUT
+                target = self._blocking_reader_loop
+            else:
+                target = self._reader_loop
+            self._reader_thread = threading.Thread(
+                target=target,
+                args=(self._generation,),
+                name=f"serial-reader-{self._controller_type.value}",
+                daemon=True,
+            )
+            self._reader_thread.start()
 
-        self._running = True
-        self._reader_thread = threading.Thread(
-            target=self._reader_loop,
-            name=f"serial-reader-{self._controller_type.value}",
-            daemon=True,
-        )
-        self._reader_thread.start()
+    def _stop_reader(self) -> None:
+        """Detach the reader; a reader thread exits on its own."""
+        if self._reader_fd is not None:
+            self._loop.remove_reader(self._reader_fd)
+            self._reader_fd = None
+        if self._reader_thread and self._reader_thread.is_alive():
+            # Wake a reader blocked in read() so it sees the change
+            if hasattr(self._serial, "cancel_read"):
+                try:
+                    self._serial.cancel_read()
+                except Exception:
+                    pass
+
+    async def _negotiated(self) -> bool:
+        """Negotiate framing on a freshly opened port.
+
+        Returns False if the link dropped meanwhile.
+        """
+        generation = self._generation
+        if self._requested_framing != FRAMING_JSON:
+            await self._negotiate_framing(self._requested_framing)
+        return self._generation == generation
+
+    async def _negotiate_framing(self, framing: str) -> None:
+        """Switch the link to `framing` if the controller supports it.
+
+        Runs while the link is still down, so queued and retried commands
+        cannot be written in the old framing after the controller switched.
+        """
+        if self._reader_mode == "poll":
+            logger.warning(
+                f"[{self._controller_type.value}] {framing} framing needs a "
+                f"blocking or asyncio reader; staying on JSON"
+            )
+            return
+        if framing == FRAMING_MSGPACK and not msgpack_available():
+            logger.warning(
+                f"[{self._controller_type.value}] msgpack not installed; "
+                f"staying on JSON"
+            )
+            return
+
+        try:
+            version = await self._send_setup_command({"cmd": "VERSION"})
+            if framing not in version.get("caps", []):
+                logger.info(
+                    f"[{self._controller_type.value}] Controller does not "
+                    f"support {framing} framing; staying on JSON"
+                )
+                return
+            response = await self._send_setup_command(
+                {"cmd": "FRAMING", "mode": framing}
+            )
+        except Exception as e:
+            logger.warning(
+                f"[{self._controller_type.value}] Framing negotiation "
+                f"failed ({e}); staying on JSON"
+            )
+            return
+
+        if response.get("status") == "OK":
+            self._tx_framing = framing
+            logger.info(
+                f"[{self._controller_type.value}] Serial framing: {framing}"
+            )
 
     async def disconnect(self) -> None:
         self._running = False
+        self._link_up.clear()
+        if self._supervisor:
+            self._supervisor.cancel()
+            try:
+                await self._supervisor
+            except asyncio.CancelledError:
+                pass
+            self._supervisor = None
+        self._stop_reader()
         if self._reader_thread and self._reader_thread.is_alive():
             self._reader_thread.join(timeout=3.0)
-        if self._serial and self._serial.is_open:
-            self._serial.close()
+        self._close_port()
+        if self._recorder:
+            self._recorder.close()
         logger.info(f"Serial disconnected: {self._port_path}")
 
+    def _close_port(self) -> None:
+        if self._serial and self._serial.is_open:
+            try:
+                self._serial.close()
+            except Exception as e:
+                logger.debug(f"Error closing {self._port_path}: {e}")
+
+    def _on_link_lost(self, generation: int, reason: str) -> None:
+        """Tear down a dead link and hand it to the supervisor (loop only)."""
+        if not self._running or generation != self._generation:
+            return
+        self._generation += 1
+        self._link_up.clear()
+        self._stop_reader()
+        self._close_port()
+        logger.warning(
+            f"[{self._controller_type.value}] Serial link lost on "
+            f"{self._port_path}: {reason}"
+        )
+
+        with self._pending_lock:
+            futures = list(self._pending.values())
+            self._pending.clear()
+        for future in futures:
+            if not future.done():
+                future.set_exception(_LinkLost(reason))
+
+        # A reconnected controller starts over in JSON lines
+        self._rx_buffer.clear()
+        self._frame_decoder = FrameDecoder()
+        self._tx_framing = FRAMING_JSON
+        self._rx_framing = FRAMING_JSON
+        self._framing_command_id = None
+
+        self._push_event({
+            "event": "DEVICE_DISCONNECTED",
+            "controller": self._controller_type.value,
+            "reason": reason,
+        })
+        self._link_lost.set()
+
+    async def _supervise(self) -> None:
+        """Reopen the port with exponential backoff whenever the link drops."""
+        while self._running:
+            await self._link_lost.wait()
+            self._link_lost.clear()
+            attempt = 0
+            while self._running and not self._link_up.is_set():
+                await asyncio.sleep(self._backoff_delay(attempt))
+                attempt += 1
+                try:
+                    self._open_port()
+                    self._start_reader()
+                except SerialError as e:
+                    logger.warning(
+                        f"[{self._controller_type.value}] Reconnect attempt "
+                        f"{attempt} failed: {e}"
+                    )
+                    self._close_port()
+                    continue
+                if not await self._negotiated():
+                    # Dropped again during negotiation; already torn down
+                    self._link_lost.clear()
+                    continue
+                self._link_up.set()
+
+            if self._link_up.is_set():
+                self.reconnects += 1
+                logger.info(
+                    f"[{self._controller_type.value}] Serial link restored "
+                    f"after {attempt} attempt(s)"
+                )
+                self._push_event({
+                    "event": "DEVICE_CONNECTED",
+                    "controller": self._controller_type.value,
+                    "attempts": attempt,
+                })
+
+    def _backoff_delay(self, attempt: int) -> float:
+        return min(
+            self._reconnect_max_delay,
+            self._reconnect_initial_delay * 2 ** min(attempt, 16),
+        )
+
     async def send_command(
         self, command: dict, timeout: Optional[float] = None
     ) -> dict:
-        if not self._serial or not self._serial.is_open:
+        if not self._running:
             raise SerialError("Serial port not open", port=self._port_path)
 
         timeout = timeout or self._timeout
-        future = self._loop.create_future()
-
-        # Set pending response future (reader thread will resolve it)
-        self._pending_response = future
+        name = command.get("cmd", "UNKNOWN")
+        retryable = name in RETRYABLE_COMMANDS
+        deadline = self._loop.time() + timeout
 
-        # Send command (thread-safe)
-        cmd_line = json.dumps(command) + "\n"
-        with self._send_lock:
+        while True:
             try:
-                self._serial.write(cmd_line.encode("utf-8"))
-                logger.debug(
-                    f"[{self._controller_type.value}] TX: {json.dumps(command)}"
+                await self._scheduler.acquire(name, deadline)
+            except asyncio.TimeoutError:
+                raise HWTimeoutError(command=name, timeout=timeout)
+            try:
+                if not self._link_up.is_set():
+                    if not retryable:
+                        raise SerialError(
+                            f"{self._port_path} is disconnected; {name} not sent",
+                            port=self._port_path,
+                        )
+                    try:
+                        await asyncio.wait_for(
+                            self._link_up.wait(),
+                            timeout=max(0.0, deadline - self._loop.time()),
+                        )
+                    except asyncio.TimeoutError:
+                        raise HWTimeoutError(command=name, timeout=timeout)
+                return await self._send_once(
+                    command, deadline - self._loop.time(), name, timeout
                 )
-            except Exception as e:
-                self._pending_response = None
-                raise SerialError(
-                    f"Write failed on {self._port_path}: {e}",
-                    port=self._port_path,
+            except _LinkLost as e:
+                if not retryable:
+                    raise SerialError(
+                        f"Connection lost on {self._port_path} during "
+                        f"{name} ({e}); outcome unknown",
+                        port=self._port_path,
+                    )
+                logger.info(
+                    f"[{self._controller_type.value}] {name} interrupted by "
+                    f"link loss; retrying after reconnect"
                 )
+            finally:
+                self._scheduler.release()
+
+    async def _send_setup_command(self, command: dict) -> dict:
+        """Send a link setup command, bypassing the scheduler and link state.
+
+        Commands waiting for the link may hold every scheduler slot.
+        """
+        name = command["cmd"]
+        return await self._send_once(command, self._timeout, name, self._timeout)
+
+    async def _send_once(
+        self, command: dict, remaining: float, name: str, timeout: float
+    ) -> dict:
+        """Write one command and await its response.
+
+        Raises:
+            _LinkLost: If the link drops before the response arrives.
+        """
+        if remaining <= 0:
+            raise HWTimeoutError(command=name, timeout=timeout)
+        future = self._loop.create_future()
+        command_id = next(self._next_id)
+        command = {**command, "id": command_id}
+
+        # Register before writing; the reader thread resolves it by id
+        with self._pending_lock:
+            self._pending[command_id] = future
+
+        if command.get("cmd") == "FRAMING":
+            self._framing_command_id = command_id
 
-        # Wait for response
         try:
-            result = await asyncio.wait_for(future, timeout=timeout)
-            return result
-        except asyncio.TimeoutError:
-            self._pending_response = None
-            raise HWTimeoutError(
-                command=command.get("cmd", "UNKNOWN"),
-                timeout=timeout,
-            )
+            # Send command (thread-safe)
+            if self._tx_framing == FRAMING_MSGPACK:
+                payload = encode_frame(command)
+            else:
+                payload = (json.dumps(command) + "\n").encode("utf-8")
+            with self._send_lock:
+                try:
+                    self._serial.write(payload)
+                    if self._recorder:
+                        self._recorder.record(DIRECTION_TX, payload)
+                    logger.debug(
+                        f"[{self._controller_type.value}] TX: {json.dumps(command)}"
+                    )
+                except Exception as e:
+                    reason = f"write failed: {e}"
+                    self._on_link_lost(self._generation, reason)
+                    raise _LinkLost(reason)
 
-    def _reader_loop(self) -> None:
-        """Background thread: reads lines from serial, routes to response or event queue."""
-        while self._running:
+            # Wait for response
             try:
-                if not self._serial or not self._serial.is_open:
-                    time.sleep(0.1)
-                    continue
+                return await asyncio.wait_for(future, timeout=remaining)
+            except asyncio.TimeoutError:
+                raise HWTimeoutError(command=name, timeout=timeout)
+        finally:
+            with self._pending_lock:
+                self._pending.pop(command_id, None)
+
+    @property
+    def framing(self) -> str:
+        """Framing currently used for commands (json or msgpack)."""
+        return self._tx_framing
+
+    def stats(self) -> dict:
+        """Link state and command scheduling metrics."""
+        return {
+            "port": self._port_path,
+            "connected": self.is_connected,
+            "framing": self._tx_framing,
+            "reconnects": self.reconnects,
+            "in_flight": self.in_flight,
+            "scheduler": self._scheduler.stats(),
+        }
+
+    @property
+    def in_flight(self) -> int:
+        """Number of commands awaiting a response."""
+        with self._pending_lock:
+            return len(self._pending)
 
+    def _reader_loop(self, generation: int) -> None:
+        """Background thread: reads lines from serial, routes to response or event queue."""
+        while self._running and generation == self._generation:
+            try:
                 # Check if data is available
                 if hasattr(self._serial, "in_waiting") and self._serial.in_waiting == 0:
                     time.sleep(0.01)
                     continue
 
                 line = self._serial.readline()
-                if not line:
-                    continue
+                if line:
+                    if self._recorder:
+                        self._recorder.record(DIRECTION_RX, line)
+                    self._handle_line(line)
 
-                line_str = line.decode("utf-8").strip()
-                if not line_str:
-                    continue
+            except Exception as e:
+                self._report_reader_error(generation, e)
+                return
 
-                try:
-                    data = json.loads(line_str)
-                except json.JSONDecodeError:
-                    logger.warning(
-                        f"[{self._controller_type.value}] "
-                        f"Invalid JSON received: {line_str}"
-                    )
-                    continue
+    def _blocking_reader_loop(self, generation: int) -> None:
+        """Background thread: blocks in read() until bytes arrive."""
+        while self._running and generation == self._generation:
+            try:
+                # Returns as soon as at least one byte is available
+                chunk = self._serial.read(max(1, self._serial.in_waiting))
+                if chunk:
+                    self._receive(chunk)
 
-                logger.debug(
-                    f"[{self._controller_type.value}] RX: {line_str}"
-                )
+            except Exception as e:
+                self._report_reader_error(generation, e)
+                return
+
+    def _report_reader_error(self, generation: int, error: Exception) -> None:
+        """Reader thread: a failed read means the link is gone."""
+        if self._running and generation == self._generation:
+            logger.error(
+                f"[{self._controller_type.value}] "
+                f"Reader error: {error}"
+            )
+            self._loop.call_soon_threadsafe(
+                self._on_link_lost, generation, f"read failed: {error}"
+            )
 
-                # Route: responses have "status", events have "event"
-                if "status" in data:
-                    self._resolve_response(data)
-                elif "event" in data:
-                    self._push_event(data)
-                else:
-                    logger.warning(
-                        f"[{self._controller_type.value}] "
-                        f"Unclassified message: {line_str}"
-                    )
+    def _on_readable(self) -> None:
+        """Event loop callback: the port's fd has data."""
+        try:
+            chunk = self._serial.read(max(1, self._serial.in_waiting))
+            if chunk:
+                self._receive(chunk)
+        except Exception as e:
+            logger.error(
+                f"[{self._controller_type.value}] "
+                f"Reader error: {e}"
+            )
+            self._on_link_lost(self._generation, f"read failed: {e}")
+
+    def _receive(self, chunk: bytes) -> None:
+        if self._recorder:
+            self._recorder.record(DIRECTION_RX, chunk)
+        self._feed(chunk)
+
+    def _feed(self, chunk: bytes) -> None:
+        """Buffer raw bytes and handle every complete line or frame."""
+        self._rx_buffer.extend(chunk)
+        while self._rx_buffer:
+            if self._rx_framing == FRAMING_MSGPACK:
+                data = bytes(self._rx_buffer)
+                self._rx_buffer.clear()
+                debug = logger.isEnabledFor(logging.DEBUG)
+                for message in self._frame_decoder.feed(data):
+                    if debug:
+                        logger.debug(
+                            f"[{self._controller_type.value}] RX: {message}"
+                        )
+                    self._handle_message(message)
+                return
+            newline = self._rx_buffer.find(b"\n")
+            if newline < 0:
+                return
+            line = bytes(self._rx_buffer[: newline + 1])
+            del self._rx_buffer[: newline + 1]
+            # May switch _rx_framing for the bytes that follow
+            self._handle_line(line)
+
+    def _handle_line(self, line: bytes) -> None:
+        """Parse one received JSON line and route it."""
+        line_str = line.decode("utf-8", errors="replace").strip()
+        if not line_str:
+            return
 
-            except Exception as e:
-                if self._running:
-                    logger.error(
-                        f"[{self._controller_type.value}] "
-                        f"Reader error: {e}"
-                    )
-                    time.sleep(0.1)
+        try:
+            data = json.loads(line_str)
+        except json.JSONDecodeError:
+            logger.warning(
+                f"[{self._controller_type.value}] "
+                f"Invalid JSON received: {line_str}"
+            )
+            return
+
+        logger.debug(
+            f"[{self._controller_type.value}] RX: {line_str}"
+        )
+        self._handle_message(data)
+
+    def _handle_message(self, data: dict) -> None:
+        """Route a decoded message to a response or event."""
+        # Route: responses have "status", events have "event"
+        if "status" in data:
+            self._resolve_response(data)
+        elif "event" in data:
+            self._push_event(data)
+        else:
+            logger.warning(
+                f"[{self._controller_type.value}] "
+                f"Unclassified message: {data}"
+            )
+
+    def _call_on_loop(self, callback, *args) -> None:
+        """Run callback on the event loop (directly when already on it)."""
+        if self._reader_mode == "asyncio":
+            callback(*args)
+        else:
+            self._loop.call_soon_threadsafe(callback, *args)
 
     def _resolve_response(self, data: dict) -> None:
-        """Resolve the pending response future from the reader thread."""
-        future = self._pending_response
-        if future and not future.done():
-            self._pending_response = None
-            self._loop.call_soon_threadsafe(future.set_result, data)
+        """Resolve the matching pending future for a received response."""
+        command_id = data.pop("id", None)
+        if (
+            command_id is not None
+            and command_id == self._framing_command_id
+            and data.get("status") == "OK"
+        ):
+            # Everything after the FRAMING response uses the new framing
+            self._rx_framing = data.get("mode", self._rx_framing)
+            self._framing_command_id = None
+        ambiguous = False
+        with self._pending_lock:
+            if command_id is not None:
+                future = self._pending.pop(command_id, None)
+            elif len(self._pending) == 1:
+                _, future = self._pending.popitem()
+            else:
+                future = None
+                ambiguous = len(self._pending) > 1
+        if future is None and ambiguous:
+            logger.warning(
+                f"[{self._controller_type.value}] Dropped response without id "
+                f"while {len(self._pending)} commands are pending: {data}"
+            )
+            return
+        if future is None:
+            logger.warning(
+                f"[{self._controller_type.value}] "
+                f"Response with no pending command (id={command_id}): {data}"
+            )
+            return
+        self._call_on_loop(self._set_result, future, data)
+
+    @staticmethod
+    def _set_result(future: asyncio.Future, data: dict) -> None:
+        # The waiter may have timed out between pop and callback
+        if not future.done():
+            future.set_result(data)
 
     def _push_event(self, data: dict) -> None:
         """Push an unsolicited event to the shared asyncio queue."""
         data["_controller"] = self._controller_type.value
-        self._loop.call_soon_threadsafe(
-            self._event_queue.put_nowait, data
-        )
+        self._call_on_loop(self._event_queue.put_nowait, data)
 
     @property
     def is_connected(self) -> bool:
@@ -208,6 +855,7 @@ class SerialConnection:
             self._serial is not None
             and self._serial.is_open
             and self._running
+            and self._link_up.is_set()
         )
 
     @property
@@ -221,7 +869,12 @@ class SerialManager:
 
     def __init__(self, settings: Settings):
         self._settings = settings
-        self.event_queue: asyncio.Queue = asyncio.Queue()
+        if settings.event_queue_capacity > 0:
+            self.event_queue: asyncio.Queue = BoundedEventQueue(
+                settings.event_queue_capacity
+            )
+        else:
+            self.event_queue = asyncio.Queue()
         self.bill_connection: Optional[SerialConnection] = None
         self.coin_connection: Optional[SerialConnection] = None
 
@@ -234,6 +887,14 @@ class SerialManager:
             timeout=self._settings.serial_timeout,
             use_mock=self._settings.use_mock_serial,
             mock_delay=self._settings.mock_delay,
+            reader_mode=self._settings.serial_reader_mode,
+            framing=self._settings.serial_framing,
+            reconnect_initial_delay=self._settings.serial_reconnect_initial_delay,
+            reconnect_max_delay=self._settings.serial_reconnect_max_delay,
+            max_in_flight=self._settings.serial_max_in_flight,
+            recorder=self._recorder(ControllerType.BILL),
+            replay_dir=self._settings.serial_replay_dir,
+            replay_speed=self._settings.serial_replay_speed,
         )
         self.coin_connection = SerialConnection(
             port=self._settings.serial_port_coin,
@@ -243,6 +904,14 @@ class SerialManager:
             timeout=self._settings.serial_timeout,
             use_mock=self._settings.use_mock_serial,
             mock_delay=self._settings.mock_delay,
+            reader_mode=self._settings.serial_reader_mode,
+            framing=self._settings.serial_framing,
+            reconnect_initial_delay=self._settings.serial_reconnect_initial_delay,
+            reconnect_max_delay=self._settings.serial_reconnect_max_delay,
+            max_in_flight=self._settings.serial_max_in_flight,
+            recorder=self._recorder(ControllerType.COIN_SECURITY),
+            replay_dir=self._settings.serial_replay_dir,
+            replay_speed=self._settings.serial_replay_speed,
         )
 
         await self.bill_connection.connect()
@@ -256,6 +925,30 @@ class SerialManager:
             await self.coin_connection.disconnect()
         logger.info("SerialManager shutdown complete")
 
+    def stats(self) -> dict:
+        """Per-controller link and scheduling metrics."""
+        return {
+            connection._controller_type.value: connection.stats()
+            for connection in (self.bill_connection, self.coin_connection)
+            if connection is not None
+        }
+
+    def event_queue_stats(self) -> dict:
+        """Event queue occupancy and overflow counters."""
+        if isinstance(self.event_queue, BoundedEventQueue):
+            return self.event_queue.stats()
+        return {"capacity": 0, "size": self.event_queue.qsize()}
+
+    def _recorder(self, controller: ControllerType) -> Optional[SerialRecorder]:
+        if not self._settings.serial_capture_dir:
+            return None
+        return SerialRecorder(
+            self._settings.serial_capture_dir,
+            controller.value,
+            max_bytes=self._settings.serial_capture_max_bytes,
+            max_files=self._settings.serial_capture_max_files,
+        )
+
     async def send_bill_command(
         self, command: dict, timeout: Optional[float] = None
     ) -> dict:
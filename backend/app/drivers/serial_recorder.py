@@ -0,0 +1,224 @@
+"""Binary capture of raw serial traffic, one rotating file set per controller.
+
+Each capture file is a fixed header followed by records:
+
+    header: magic b"CNSRCAP1" | controller (16 bytes, NUL-padded ASCII)
+            | session start (int64 ns since the epoch)
+    record: offset (uint64 ns since session start) | direction (uint8)
+            | length (uint32) | raw bytes
+
+All integers are little-endian and records are unaligned, so a file can be
+walked in place with struct.unpack_from over an mmap (see read_capture()).
+Bytes are stored exactly as written to / read from the port, whatever the
+framing, so a capture can be replayed byte-for-byte by ReplaySerial.
+
+Files are named "<controller>-<session>-<seq>.cnrec". When the current file
+exceeds max_bytes the recorder rolls to the next sequence number and deletes
+the oldest files of that controller beyond max_files.
+"""
+
+import glob
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import List, NamedTuple, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+CAPTURE_MAGIC = b"CNSRCAP1"
+CAPTURE_SUFFIX = ".cnrec"
+DIRECTION_TX = 0
+DIRECTION_RX = 1
+
+_FILE_HEADER = struct.Struct("<8s16sq")
+_RECORD_HEADER = struct.Struct("<QBI")
+
+
+class CaptureRecord(NamedTuple):
+    offset_ns: int
+    direction: int
+    data: bytes
+
+
+class CaptureFile(NamedTuple):
+    controller: str
+    started_at_ns: int
+    records: List[CaptureRecord]
+
+
+class SerialRecorder:
+    """Appends timestamped TX/RX chunks for one controller.
+
+    record() is called from both the reader thread and the event loop and
+    only packs a header and appends to a buffered file under a lock. The
+    buffer is flushed at most every flush_interval seconds; a timer flushes
+    whatever is left once the link goes quiet, so the tail of a capture
+    reaches the file without waiting for the next record or close().
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        controller: str,
+        max_bytes: int = 8 * 1024 * 1024,
+        max_files: int = 10,
+        flush_interval: float = 1.0,
+    ):
+        self._directory = directory
+        self._controller = controller
+        self._max_bytes = max(_FILE_HEADER.size + 1, max_bytes)
+        self._max_files = max(1, max_files)
+        self._flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._started_ns = time.time_ns()
+        self._started_mono = time.monotonic_ns()
+        self._session = time.strftime(
+            "%Y%m%d-%H%M%S", time.localtime(self._started_ns / 1e9)
+        ) + f"{self._started_ns // 1_000_000 % 1000:03d}"
+        self._seq = 0
+        self._file = None
+        self._file_bytes = 0
+        self._last_flush = time.monotonic()
+        self._flush_timer: Optional[threading.Timer] = None
+        self.records = 0
+        self.bytes_recorded = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._open_next()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def record(self, direction: int, data: bytes) -> None:
+        offset = time.monotonic_ns() - self._started_mono
+        header = _RECORD_HEADER.pack(offset, direction, len(data))
+        with self._lock:
+            if self._file is None:
+                return
+            if self._file_bytes + len(header) + len(data) > self._max_bytes:
+                self._file.close()
+                self._open_next()
+            self._file.write(header)
+            self._file.write(data)
+            self._file_bytes += len(header) + len(data)
+            self.records += 1
+            self.bytes_recorded += len(data)
+            now = time.monotonic()
+            if now - self._last_flush >= self._flush_interval:
+                self._file.flush()
+                self._last_flush = now
+            elif self._flush_timer is None:
+                self._flush_timer = threading.Timer(
+                    self._flush_interval - (now - self._last_flush),
+                    self.flush,
+                )
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def flush(self) -> None:
+        """Write buffered records to the file."""
+        with self._lock:
+            self._flush_timer = None
+            if self._file is not None:
+                self._file.flush()
+                self._last_flush = time.monotonic()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _open_next(self) -> None:
+        """Start the next file of this session (lock held or in __init__)."""
+        self._seq += 1
+        self._path = os.path.join(
+            self._directory,
+            f"{self._controller.lower()}-{self._session}-{self._seq:04d}"
+            f"{CAPTURE_SUFFIX}",
+        )
+        self._file = open(self._path, "wb")
+        self._file.write(_FILE_HEADER.pack(
+            CAPTURE_MAGIC,
+            self._controller.encode("ascii")[:16],
+            self._started_ns,
+        ))
+        self._file_bytes = _FILE_HEADER.size
+        self._prune()
+        logger.info(f"Serial capture: {self._path}")
+
+    def _prune(self) -> None:
+        files = _controller_files(self._directory, self._controller)
+        for path in files[:-self._max_files]:
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.warning(f"Could not remove old capture {path}: {e}")
+
+
+def _controller_files(directory: str, controller: str) -> List[str]:
+    # Session stamps and sequence numbers sort chronologically
+    return sorted(glob.glob(os.path.join(
+        directory, f"{glob.escape(controller.lower())}-*{CAPTURE_SUFFIX}"
+    )))
+
+
+def capture_files(directory: str, controller: str) -> List[str]:
+    """Files of the most recent capture session for `controller`, in order."""
+    files = _controller_files(directory, controller)
+    if not files:
+        return []
+    session = files[-1].rsplit("-", 1)[0]
+    return [path for path in files if path.rsplit("-", 1)[0] == session]
+
+
+def read_capture(path: str) -> CaptureFile:
+    """Parse one capture file.
+
+    A truncated final record (e.g. after a power cut) is dropped.
+
+    Raises:
+        ValueError: If the file is not a serial capture.
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < _FILE_HEADER.size:
+            raise ValueError(f"Not a serial capture: {path}")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            magic, controller, started_at_ns = _FILE_HEADER.unpack_from(buf, 0)
+            if magic != CAPTURE_MAGIC:
+                raise ValueError(f"Not a serial capture: {path}")
+            records: List[CaptureRecord] = []
+            pos = _FILE_HEADER.size
+            while pos + _RECORD_HEADER.size <= size:
+                offset, direction, length = _RECORD_HEADER.unpack_from(buf, pos)
+                start = pos + _RECORD_HEADER.size
+                if start + length > size:
+                    break
+                records.append(
+                    CaptureRecord(offset, direction, buf[start:start + length])
+                )
+                pos = start + length
+            if pos != size:
+                logger.warning(
+                    f"Capture {path} has {size - pos} trailing bytes "
+                    f"(truncated record dropped)"
+                )
+    return CaptureFile(
+        controller.rstrip(b"\0").decode("ascii"), started_at_ns, records
+    )
+
+
+def read_captures(paths: Sequence[str]) -> List[CaptureRecord]:
+    """Records of a rotated capture session, concatenated in order."""
+    records: List[CaptureRecord] = []
+    for path in paths:
+        records.extend(read_capture(path).records)
+    return records
@@ -13,10 +13,14 @@ from app.drivers.bill_controller import BillController
 from app.drivers.coin_security_controller import CoinSecurityController
 from app.drivers.serial_manager import SerialManager
 from app.services.bill_acceptor import BillAcceptor
+from app.services.change_plan_cache import ChangePlanCache
 from app.services.dispense_orchestrator import DispenseOrchestrator
 from app.services.event_dispatcher import EventDispatcher
+from app.services.inventory_ledger import InventoryLedger
 from app.services.machine_status import MachineStatus
+from app.services.state_sync import StateSync
 from app.services.transaction_orchestrator import TransactionOrchestrator
+from app.services.wal_compactor import WALCompactor
 
 logger = logging.getLogger(__name__)
 
@@ -34,11 +38,28 @@ async def lifespan(app: FastAPI):
 
     # --- Phase 2: Serial communication layer ---
     serial_manager = SerialManager(settings)
-    ws_manager = ConnectionManager()
-    machine_status = MachineStatus(settings)
+    ws_manager = ConnectionManager(
+        send_queue_size=settings.ws_send_queue_size,
+        send_timeout=settings.ws_send_timeout,
+        slow_client_policy=settings.ws_slow_client_policy,
+        replay_buffer_size=settings.ws_replay_buffer_size,
+    )
+    ledger = None
+    if settings.inventory_ledger_dir:
+        ledger = InventoryLedger(
+            settings.inventory_ledger_dir,
+            checkpoint_every=settings.inventory_ledger_checkpoint_every,
+            fsync=settings.inventory_ledger_fsync,
+            fsync_interval=settings.inventory_ledger_fsync_interval,
+        )
+    machine_status = MachineStatus(settings, ledger=ledger)
     event_dispatcher = EventDispatcher(
-        serial_manager.event_queue, machine_status, ws_manager
+        serial_manager.event_queue,
+        machine_status,
+        ws_manager,
+        batch_size=settings.event_batch_size,
     )
+    state_sync = StateSync(machine_status, ws_manager)
 
     # --- Phase 3: Database ---
     await init_db()
@@ -89,14 +110,29 @@ async def lifespan(app: FastAPI):
         coin_controller=coin_controller,
         machine_status=machine_status,
         ws_manager=ws_manager,
+        coin_change_offload=settings.coin_change_offload,
+        parallel_dispense=settings.parallel_dispense,
     )
 
+    change_plan_cache = ChangePlanCache(settings.change_plan_cache_size)
+
     transaction_orchestrator = TransactionOrchestrator(
         bill_acceptor=bill_acceptor,
         dispense_orchestrator=dispense_orchestrator,
         machine_status=machine_status,
         ws_manager=ws_manager,
         db_session_factory=get_session_factory(),
+        dispense_policy=settings.dispense_policy,
+        plan_cache=change_plan_cache,
+        commit_mode=settings.transaction_commit_mode,
+    )
+
+    wal_compactor = WALCompactor(
+        get_session_factory(),
+        retention_days=settings.wal_retention_days,
+        interval=settings.wal_compaction_interval,
+        batch_size=settings.wal_compaction_batch_size,
+        archive_path=settings.wal_archive_path,
     )
 
     # Store on app state for dependency injection in endpoints
@@ -104,19 +140,24 @@ async def lifespan(app: FastAPI):
     app.state.ws_manager = ws_manager
     app.state.machine_status = machine_status
     app.state.event_dispatcher = event_dispatcher
+    app.state.state_sync = state_sync
     app.state.settings = settings
     app.state.gpio = gpio
     app.state.camera = camera
     app.state.bill_acceptor = bill_acceptor
     app.state.dispense_orchestrator = dispense_orchestrator
     app.state.transaction_orchestrator = transaction_orchestrator
+    app.state.change_plan_cache = change_plan_cache
+    app.state.wal_compactor = wal_compactor
 
     # Startup
     await serial_manager.startup()
     await event_dispatcher.start()
+    state_sync.start()
 
     # Recover any transactions interrupted by crash/power loss
     await transaction_orchestrator.recover_pending_transactions()
+    await wal_compactor.start()
 
     logger.info("Coinnect backend ready")
     yield
@@ -124,7 +165,11 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("Coinnect backend shutting down")
     await event_dispatcher.stop()
+    await wal_compactor.stop()
+    state_sync.stop()
+    await ws_manager.shutdown()
     await serial_manager.shutdown()
+    machine_status.close()
     await camera.release()
     await gpio.cleanup()
     await close_db()
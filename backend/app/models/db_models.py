@@ -4,7 +4,7 @@ import enum
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import JSON, DateTime, Integer, String
+from sqlalchemy import JSON, DateTime, Index, Integer, String
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 
@@ -102,9 +102,16 @@ class WALEntry(Base):
     Each critical operation (inventory reservation, dispense start, etc.)
     is logged before execution. On recovery, pending entries are either
     completed or rolled back.
+
+    Indexed for startup recovery (pending entries by status) and for
+    per-transaction history; old entries are compacted by WALCompactor.
     """
 
     __tablename__ = "wal_entries"
+    __table_args__ = (
+        Index("ix_wal_entries_status", "status"),
+        Index("ix_wal_entries_transaction_created", "transaction_id", "created_at"),
+    )
 
     id: Mapped[int] = mapped_column(
         Integer, primary_key=True, autoincrement=True
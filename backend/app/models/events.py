@@ -1,5 +1,6 @@
 from datetime import datetime
 from enum import Enum
+from typing import Dict, Optional, Tuple
 
 from pydantic import BaseModel, Field
 
@@ -35,8 +36,71 @@ class WSEventType(str, Enum):
     INVENTORY_ALERT = "INVENTORY_ALERT"
     CLAIM_TICKET = "CLAIM_TICKET"
 
+    # Several events delivered at once; payload["events"] holds
+    # {"type", "payload"} entries in order
+    EVENT_BATCH = "EVENT_BATCH"
+
+    # Reply to a SUBSCRIBE/UNSUBSCRIBE action; sent only to that client
+    SUBSCRIPTIONS = "SUBSCRIPTIONS"
+
+    # Reply to a resume_from handshake, after any replayed events
+    HELLO = "HELLO"
+
+    # Machine state sync (see app/services/state_sync.py): a full snapshot
+    # sent to one client on subscribing to "state", then broadcast patches
+    STATE_SNAPSHOT = "STATE_SNAPSHOT"
+    STATE_PATCH = "STATE_PATCH"
+
+
+# Subscription topics: a client receives an event only if it is subscribed
+# to the event's topic (all but OPT_IN_TOPICS by default). EVENT_BATCH is
+# filtered per entry; SUBSCRIPTIONS, HELLO and STATE_SNAPSHOT are sent to
+# a single client and not broadcast.
+WS_TOPICS: Dict[str, Tuple[WSEventType, ...]] = {
+    "transaction": (
+        WSEventType.STATE_CHANGE,
+        WSEventType.TRANSACTION_STARTED,
+        WSEventType.TRANSACTION_STATE_CHANGED,
+        WSEventType.TRANSACTION_COMPLETE,
+        WSEventType.TRANSACTION_CANCELLED,
+        WSEventType.TRANSACTION_ERROR,
+        WSEventType.CLAIM_TICKET,
+    ),
+    "cash": (
+        WSEventType.BILL_INSERTED,
+        WSEventType.BILL_AUTHENTICATED,
+        WSEventType.BILL_REJECTED,
+        WSEventType.BILL_ACCEPTING,
+        WSEventType.BILL_POSITIONING,
+        WSEventType.BILL_SORTING,
+        WSEventType.BILL_STORED,
+        WSEventType.COIN_INSERTED,
+        WSEventType.DISPENSE_PROGRESS,
+        WSEventType.DISPENSE_COMPLETE,
+    ),
+    "device": (
+        WSEventType.DEVICE_CONNECTED,
+        WSEventType.DEVICE_DISCONNECTED,
+        WSEventType.ERROR,
+    ),
+    "security": (WSEventType.TAMPER,),
+    "inventory": (WSEventType.INVENTORY_ALERT,),
+    "state": (WSEventType.STATE_PATCH,),
+}
+
+# Topics a client only receives after asking for them
+OPT_IN_TOPICS: Tuple[str, ...] = ("state",)
+
+EVENT_TOPICS: Dict[WSEventType, str] = {
+    event_type: topic
+    for topic, event_types in WS_TOPICS.items()
+    for event_type in event_types
+}
+
 
 class WSEvent(BaseModel):
     type: WSEventType
     payload: dict = Field(default_factory=dict)
     timestamp: datetime = Field(default_factory=datetime.utcnow)
+    # Stamped by ConnectionManager.broadcast(); None for per-client replies
+    seq: Optional[int] = None
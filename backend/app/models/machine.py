@@ -1,8 +1,8 @@
 from datetime import datetime
 from enum import Enum
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Type
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class DeviceConnectionState(str, Enum):
@@ -56,10 +56,79 @@ class ConsumablesState(BaseModel):
     alerts: List[str] = Field(default_factory=list)
 
 
+def _read_only(self, *args, **kwargs):
+    raise TypeError("Snapshot state is read-only")
+
+
+class ReadOnlyDict(dict):
+    """dict whose in-place changes raise TypeError; deep copies are plain."""
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __deepcopy__(self, memo):
+        return dict(self)
+
+
+class ReadOnlyList(list):
+    """list whose in-place changes raise TypeError; deep copies are plain."""
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = extend = insert = pop = remove = clear = sort = reverse = _read_only
+
+    def __deepcopy__(self, memo):
+        return list(self)
+
+
+_FROZEN_CLASSES: Dict[type, Type[BaseModel]] = {}
+
+
+def freeze_model(model: BaseModel) -> BaseModel:
+    """Read-only copy of a state model, for sharing in a snapshot.
+
+    The copy is a frozen subclass instance whose dict and list fields are
+    ReadOnlyDict/ReadOnlyList copies, so neither attribute assignment nor
+    in-place changes to the counts reach other readers.
+    """
+    cls = type(model)
+    frozen_cls = _FROZEN_CLASSES.get(cls)
+    if frozen_cls is None:
+        frozen_cls = type(
+            f"Frozen{cls.__name__}", (cls,), {"model_config": ConfigDict(frozen=True)}
+        )
+        _FROZEN_CLASSES[cls] = frozen_cls
+    values = {}
+    for name, value in model.__dict__.items():
+        if isinstance(value, dict):
+            value = ReadOnlyDict(value)
+        elif isinstance(value, list):
+            value = ReadOnlyList(value)
+        values[name] = value
+    return frozen_cls.model_construct(**values)
+
+
 class MachineStateSnapshot(BaseModel):
+    """Point-in-time machine state, shared between readers.
+
+    Built from freeze_model() copies, so it cannot be mutated at any depth;
+    model_copy(deep=True) gives a mutable copy.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
     bill_device: DeviceStatus = Field(default_factory=DeviceStatus)
     coin_device: DeviceStatus = Field(default_factory=DeviceStatus)
     sorter: SorterState = Field(default_factory=SorterState)
     security: SecurityState = Field(default_factory=SecurityState)
     consumables: ConsumablesState = Field(default_factory=ConsumablesState)
+    # MachineStatus.version this snapshot reflects, and when it was reached
+    version: int = 0
     timestamp: datetime = Field(default_factory=datetime.utcnow)
+
+
+class PayableRange(BaseModel):
+    inventory_version: int
+    step: int
+    limit: int
+    max_payable: int
+    blocked_amounts: List[int] = Field(default_factory=list)
@@ -1,152 +1,181 @@
-from typing import Dict, Literal, Optional, Union
+from typing import Dict, List, Literal, Optional, Union
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_serializer
 
 from app.core.constants import BillDenom, ErrorCode
 
+
+class CorrelatedMessage(BaseModel):
+    """Base for commands and responses carrying an optional correlation ID.
+
+    The RPi tags each command with an `id`; firmware that supports it echoes
+    the same `id` in the response so several commands can be in flight per
+    port. The field is omitted from the wire format when unset.
+    """
+
+    id: Optional[int] = None
+
+    @model_serializer(mode="wrap")
+    def _omit_unset_id(self, handler):
+        data = handler(self)
+        if isinstance(data, dict) and data.get("id") is None:
+            data.pop("id", None)
+        return data
+
 # ============================================================================
 # Commands (RPi -> Arduino)
 # ============================================================================
 
 
-class SortCommand(BaseModel):
+class SortCommand(CorrelatedMessage):
     cmd: Literal["SORT"] = "SORT"
     denom: BillDenom
 
 
-class HomeCommand(BaseModel):
+class HomeCommand(CorrelatedMessage):
     cmd: Literal["HOME"] = "HOME"
 
 
-class SortStatusCommand(BaseModel):
+class SortStatusCommand(CorrelatedMessage):
     cmd: Literal["SORT_STATUS"] = "SORT_STATUS"
 
 
-class DispenseCommand(BaseModel):
+class DispenseCommand(CorrelatedMessage):
     cmd: Literal["DISPENSE"] = "DISPENSE"
     denom: BillDenom
     count: int = Field(ge=1, le=20)
 
 
-class DispenseStatusCommand(BaseModel):
+class DispenseStatusCommand(CorrelatedMessage):
     cmd: Literal["DISPENSE_STATUS"] = "DISPENSE_STATUS"
     denom: BillDenom
 
 
-class CoinDispenseCommand(BaseModel):
+class CoinDispenseCommand(CorrelatedMessage):
     cmd: Literal["COIN_DISPENSE"] = "COIN_DISPENSE"
     denom: int = Field(description="Coin denomination integer (1, 5, 10, 20)")
     count: int = Field(ge=1, le=50)
 
 
-class CoinChangeCommand(BaseModel):
+class CoinChangeCommand(CorrelatedMessage):
     cmd: Literal["COIN_CHANGE"] = "COIN_CHANGE"
     amount: int = Field(ge=1)
 
 
-class CoinResetCommand(BaseModel):
+class CoinResetCommand(CorrelatedMessage):
     cmd: Literal["COIN_RESET"] = "COIN_RESET"
 
 
-class SecurityLockCommand(BaseModel):
+class SecurityLockCommand(CorrelatedMessage):
     cmd: Literal["SECURITY_LOCK"] = "SECURITY_LOCK"
 
 
-class SecurityUnlockCommand(BaseModel):
+class SecurityUnlockCommand(CorrelatedMessage):
     cmd: Literal["SECURITY_UNLOCK"] = "SECURITY_UNLOCK"
 
 
-class SecurityStatusCommand(BaseModel):
+class SecurityStatusCommand(CorrelatedMessage):
     cmd: Literal["SECURITY_STATUS"] = "SECURITY_STATUS"
 
 
-class PingCommand(BaseModel):
+class PingCommand(CorrelatedMessage):
     cmd: Literal["PING"] = "PING"
 
 
-class VersionCommand(BaseModel):
+class VersionCommand(CorrelatedMessage):
     cmd: Literal["VERSION"] = "VERSION"
 
 
-class ResetCommand(BaseModel):
+class ResetCommand(CorrelatedMessage):
     cmd: Literal["RESET"] = "RESET"
 
 
+class FramingCommand(CorrelatedMessage):
+    cmd: Literal["FRAMING"] = "FRAMING"
+    mode: Literal["json", "msgpack"]
+
+
 # ============================================================================
 # Responses (Arduino -> RPi)
 # ============================================================================
 
 
-class SortResponse(BaseModel):
+class SortResponse(CorrelatedMessage):
     status: Literal["READY"]
     slot: int
 
 
-class HomeResponse(BaseModel):
+class HomeResponse(CorrelatedMessage):
     status: Literal["OK"]
     position: int = 0
 
 
-class SortStatusResponse(BaseModel):
+class SortStatusResponse(CorrelatedMessage):
     status: Literal["OK"]
     position: int
     slot: int
     homed: bool
 
 
-class DispenseResponse(BaseModel):
+class DispenseResponse(CorrelatedMessage):
     status: Literal["OK"]
     dispensed: int
 
 
-class DispenseStatusResponse(BaseModel):
+class DispenseStatusResponse(CorrelatedMessage):
     status: Literal["OK"]
     ready: bool
 
 
-class CoinDispenseResponse(BaseModel):
+class CoinDispenseResponse(CorrelatedMessage):
     status: Literal["OK"]
     dispensed: int
 
 
-class CoinChangeResponse(BaseModel):
+class CoinChangeResponse(CorrelatedMessage):
     status: Literal["OK"]
     breakdown: Dict[str, int]
 
 
-class CoinResetResponse(BaseModel):
+class CoinResetResponse(CorrelatedMessage):
     status: Literal["OK"]
     previous_total: int
 
 
-class SecurityLockResponse(BaseModel):
+class SecurityLockResponse(CorrelatedMessage):
     status: Literal["OK"]
     locked: bool = True
 
 
-class SecurityUnlockResponse(BaseModel):
+class SecurityUnlockResponse(CorrelatedMessage):
     status: Literal["OK"]
     locked: bool = False
 
 
-class SecurityStatusResponse(BaseModel):
+class SecurityStatusResponse(CorrelatedMessage):
     status: Literal["OK"]
     locked: bool
     tamper_a: bool = False
 
 
-class PingResponse(BaseModel):
+class PingResponse(CorrelatedMessage):
     status: Literal["OK"]
     message: str = "PONG"
 
 
-class VersionResponse(BaseModel):
+class VersionResponse(CorrelatedMessage):
     status: Literal["OK"]
     version: str
     controller: str
+    caps: List[str] = []  # Optional protocol features, e.g. "msgpack"
+
+
+class FramingResponse(CorrelatedMessage):
+    status: Literal["OK"]
+    mode: str
 
 
-class ErrorResponse(BaseModel):
+class ErrorResponse(CorrelatedMessage):
     status: Literal["ERROR"]
     code: ErrorCode
     dispensed: Optional[int] = None
@@ -184,4 +213,27 @@ class ReadyEvent(BaseModel):
     controller: str
 
 
-SerialEvent = Union[CoinInEvent, TamperEvent, KeypadEvent, DoorStateEvent, ReadyEvent]
+# Link events, generated by SerialConnection rather than the Arduino
+
+
+class DeviceDisconnectedEvent(BaseModel):
+    event: Literal["DEVICE_DISCONNECTED"]
+    controller: str
+    reason: str = ""
+
+
+class DeviceConnectedEvent(BaseModel):
+    event: Literal["DEVICE_CONNECTED"]
+    controller: str
+    attempts: int = 0
+
+
+SerialEvent = Union[
+    CoinInEvent,
+    TamperEvent,
+    KeypadEvent,
+    DoorStateEvent,
+    ReadyEvent,
+    DeviceDisconnectedEvent,
+    DeviceConnectedEvent,
+]
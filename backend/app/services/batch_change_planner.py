@@ -0,0 +1,161 @@
+"""Array-based what-if change planning for many amounts at once.
+
+Answers "which of these amounts can be paid with this inventory, and with
+how many items each?" for hundreds of amounts in a single pass, for refill
+planning and the admin dashboard. Works on numpy arrays throughout;
+pydantic DispensePlan objects are only built when a caller asks for them.
+
+Solves min-items bounded knapsack over every amount up to max(amounts):
+each denomination's stock is split into binary pieces (1, 2, 4, ... units)
+that are added as 0/1 items with a vectorized relaxation per piece. The
+per-piece "taken" masks are kept so plans for all amounts are recovered
+with one vectorized backtrack.
+"""
+
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.constants import BillDenom, CoinDenom
+from app.services.change_calculator import DispensePlan, DispensePlanItem
+
+logger = logging.getLogger(__name__)
+
+# Inventory vector layout: (denom_key, denom_type, value), bills then coins,
+# each descending by value
+PLANNER_DENOMINATIONS: List[Tuple[str, str, int]] = [
+    (denom.value, "bill", value)
+    for denom, value in [
+        (BillDenom.PHP_1000, 1000),
+        (BillDenom.PHP_500, 500),
+        (BillDenom.PHP_200, 200),
+        (BillDenom.PHP_100, 100),
+        (BillDenom.PHP_50, 50),
+        (BillDenom.PHP_20, 20),
+    ]
+] + [
+    (f"PHP_{coin.value}", "coin", coin.value)
+    for coin in sorted(CoinDenom, key=lambda c: c.value, reverse=True)
+]
+
+# Item-count sentinel; leaves headroom so adding units never overflows int32
+_UNREACHABLE = 1 << 30
+
+
+def inventory_vector(
+    available_bills: Dict[str, int], available_coins: Dict[str, int]
+) -> np.ndarray:
+    """Build an inventory vector in PLANNER_DENOMINATIONS order."""
+    return np.array(
+        [
+            max(
+                0,
+                (available_bills if denom_type == "bill" else available_coins)
+                .get(denom_key, 0),
+            )
+            for denom_key, denom_type, _value in PLANNER_DENOMINATIONS
+        ],
+        dtype=np.int64,
+    )
+
+
+class BatchChangePlan:
+    """Plans for a batch of amounts, stored column-wise."""
+
+    def __init__(
+        self,
+        amounts: np.ndarray,
+        feasible: np.ndarray,
+        item_counts: np.ndarray,
+        unit_counts: np.ndarray,
+    ):
+        self.amounts = amounts
+        # feasible[i]: amounts[i] can be paid exactly
+        self.feasible = feasible
+        # item_counts[i]: bills + coins used, -1 if infeasible
+        self.item_counts = item_counts
+        # unit_counts[i, d]: units of PLANNER_DENOMINATIONS[d] for amounts[i]
+        self.unit_counts = unit_counts
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+    def plan(self, index: int) -> Optional[DispensePlan]:
+        """Materialize the DispensePlan for amounts[index] (None if infeasible)."""
+        if not self.feasible[index]:
+            return None
+        items = [
+            DispensePlanItem(
+                denom=denom_key,
+                denom_type=denom_type,
+                count=int(count),
+                value=value,
+            )
+            for (denom_key, denom_type, value), count in zip(
+                PLANNER_DENOMINATIONS, self.unit_counts[index]
+            )
+            if count > 0
+        ]
+        return DispensePlan(
+            items=items,
+            total_amount=int(self.amounts[index]),
+            is_exact=True,
+        )
+
+    def plans(self) -> List[Optional[DispensePlan]]:
+        return [self.plan(i) for i in range(len(self))]
+
+
+def plan_change_batch(
+    amounts: Sequence[int], inventory: Sequence[int]
+) -> BatchChangePlan:
+    """Plan change for every amount against one inventory vector.
+
+    Args:
+        amounts: Amounts in PHP (non-positive amounts need no items).
+        inventory: Units in stock per PLANNER_DENOMINATIONS entry
+            (see inventory_vector()).
+
+    Returns:
+        BatchChangePlan with feasibility, min item counts, and per-denomination
+        unit counts for every amount.
+    """
+    amounts = np.maximum(np.asarray(amounts, dtype=np.int64), 0)
+    inventory = np.asarray(inventory, dtype=np.int64)
+    if len(inventory) != len(PLANNER_DENOMINATIONS):
+        raise ValueError(
+            f"Inventory vector must have {len(PLANNER_DENOMINATIONS)} entries"
+        )
+
+    top = int(amounts.max()) if len(amounts) else 0
+    best = np.full(top + 1, _UNREACHABLE, dtype=np.int32)
+    best[0] = 0
+
+    # (denomination index, units, taken mask) per binary piece
+    pieces: List[Tuple[int, int, np.ndarray]] = []
+    for d, (_key, _type, value) in enumerate(PLANNER_DENOMINATIONS):
+        remaining = int(min(inventory[d], top // value))
+        chunk = 1
+        while remaining > 0:
+            units = min(chunk, remaining)
+            weight = units * value
+            candidate = best[:-weight] + units
+            taken = np.zeros(top + 1, dtype=bool)
+            np.less(candidate, best[weight:], out=taken[weight:])
+            np.minimum(best[weight:], candidate, out=best[weight:])
+            pieces.append((d, units, taken))
+            remaining -= units
+            chunk <<= 1
+
+    feasible = best[amounts] < _UNREACHABLE
+    item_counts = np.where(feasible, best[amounts], -1)
+
+    unit_counts = np.zeros((len(amounts), len(PLANNER_DENOMINATIONS)), dtype=np.int64)
+    rest = np.where(feasible, amounts, 0)
+    for d, units, taken in reversed(pieces):
+        hit = taken[rest]
+        unit_counts[hit, d] += units
+        rest = rest - hit * (units * PLANNER_DENOMINATIONS[d][2])
+
+    return BatchChangePlan(amounts, feasible, item_counts, unit_counts)
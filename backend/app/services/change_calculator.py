@@ -3,15 +3,26 @@
 Uses a greedy algorithm: dispense largest denominations first,
 preferring user-selected denominations when available.
 Bills are dispensed before coins.
+
+When limited inventory makes the greedy pass fall short (e.g. no PHP_100
+bills but plenty of 50s and 20s), an exact bounded-knapsack solver is used
+as a fallback so payable amounts are never rejected. Dispense policies
+other than min_items use the same solver to build candidate plans and
+pick one by their objective (see app.services.dispense_policy).
 """
 
 import logging
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 from pydantic import BaseModel
 
 from app.core.constants import BILL_DENOM_VALUES, COIN_DENOM_VALUES, BillDenom, CoinDenom
 from app.core.errors import InsufficientInventoryError
+from app.services.dispense_policy import (
+    DEFAULT_DISPENSE_POLICY,
+    DispensePolicy,
+    get_dispense_policy,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -66,6 +77,8 @@ def calculate_change(
     available_coins: Dict[str, int],
     preferred_denoms: Optional[List[int]] = None,
     currency: str = "PHP",
+    exact_fallback: bool = True,
+    policy: str = DEFAULT_DISPENSE_POLICY,
 ) -> DispensePlan:
     """Calculate optimal change dispensing plan.
 
@@ -78,12 +91,20 @@ def calculate_change(
         preferred_denoms: User-selected denomination values to prefer
             (e.g., [50, 100]). These are tried first.
         currency: Currency code (currently only "PHP" supported).
+        exact_fallback: If the greedy pass cannot make exact change, retry
+            with the exact bounded-knapsack solver before giving up.
+            Policies other than min_items need it to build the candidate
+            plans they choose from.
+        policy: Dispense policy name (see app.services.dispense_policy)
+            used to choose between candidate plans.
 
     Returns:
         DispensePlan with items, total, and exactness flag.
 
     Raises:
         InsufficientInventoryError: If exact change cannot be made.
+        ValueError: If `policy` is unknown, or needs the exact solver
+            while exact_fallback is off.
     """
     if amount <= 0:
         return DispensePlan(items=[], total_amount=0, is_exact=True)
@@ -91,76 +112,230 @@ def calculate_change(
     if currency != "PHP":
         raise ValueError(f"Unsupported currency for change: {currency}")
 
-    remaining = amount
-    items: List[DispensePlanItem] = []
-
-    # Build working copies of available inventory
-    bills_avail = dict(available_bills)
-    coins_avail = dict(available_coins)
+    dispense_policy = get_dispense_policy(policy)
+    if not exact_fallback and not dispense_policy.greedy_first:
+        raise ValueError(
+            f"Dispense policy {policy} needs exact_fallback "
+            f"(it chooses among exact candidate plans)"
+        )
 
     # Determine denomination ordering based on user preferences
-    bill_order = _get_bill_order(preferred_denoms)
-    coin_order = _get_coin_order(preferred_denoms)
+    order = _get_dispense_order(preferred_denoms)
 
-    # Phase 1: Dispense bills (largest preferred first, then remaining)
-    for denom, value in bill_order:
-        if remaining <= 0:
-            break
-        denom_key = denom.value
-        avail = bills_avail.get(denom_key, 0)
-        if avail <= 0 or value > remaining:
-            continue
-        count = min(remaining // value, avail)
-        if count > 0:
-            items.append(
-                DispensePlanItem(
-                    denom=denom_key,
-                    denom_type="bill",
-                    count=count,
-                    value=value,
-                )
-            )
-            remaining -= count * value
-            bills_avail[denom_key] = avail - count
+    # Fast path: greedy pass (largest preferred first, bills before coins)
+    counts, remaining = _solve_greedy(
+        amount, order, available_bills, available_coins
+    )
 
-    # Phase 2: Dispense coins (largest first)
-    for denom, value in coin_order:
-        if remaining <= 0:
-            break
-        denom_key = f"PHP_{value}"
-        avail = coins_avail.get(denom_key, 0)
-        if avail <= 0 or value > remaining:
-            continue
-        count = min(remaining // value, avail)
-        if count > 0:
-            items.append(
-                DispensePlanItem(
-                    denom=denom_key,
-                    denom_type="coin",
-                    count=count,
-                    value=value,
+    if exact_fallback and (remaining > 0 or not dispense_policy.greedy_first):
+        best = _solve_with_policy(
+            amount,
+            order,
+            available_bills,
+            available_coins,
+            dispense_policy,
+            preferred_denoms,
+        )
+        if best is not None:
+            if remaining > 0:
+                logger.info(
+                    f"Greedy change failed for {amount} (short {remaining}); "
+                    f"exact solver found a plan"
                 )
-            )
-            remaining -= count * value
-            coins_avail[denom_key] = avail - count
+            counts, remaining = best, 0
 
-    total_dispensed = amount - remaining
-    is_exact = remaining == 0
-
-    if not is_exact:
+    if remaining > 0:
         raise InsufficientInventoryError(
             requested=amount,
-            available=total_dispensed,
+            available=amount - remaining,
             shortfall=remaining,
         )
 
     return DispensePlan(
-        items=items,
-        total_amount=total_dispensed,
-        is_exact=is_exact,
+        items=_build_items(order, counts),
+        total_amount=amount,
+        is_exact=True,
     )
 
 
+def _get_dispense_order(
+    preferred_denoms: Optional[List[int]],
+) -> List[Tuple[str, str, int]]:
+    """Get (denom_key, denom_type, value) tuples in dispensing order.
+
+    Bills come before coins; within each group the ordering follows
+    _get_bill_order / _get_coin_order.
+    """
+    order = [
+        (denom.value, "bill", value)
+        for denom, value in _get_bill_order(preferred_denoms)
+    ]
+    order += [
+        (f"PHP_{value}", "coin", value)
+        for _denom, value in _get_coin_order(preferred_denoms)
+    ]
+    return order
+
+
+def _available(
+    denom_type: str,
+    denom_key: str,
+    available_bills: Dict[str, int],
+    available_coins: Dict[str, int],
+) -> int:
+    source = available_bills if denom_type == "bill" else available_coins
+    return max(0, source.get(denom_key, 0))
+
+
+def _solve_greedy(
+    amount: int,
+    order: List[Tuple[str, str, int]],
+    available_bills: Dict[str, int],
+    available_coins: Dict[str, int],
+) -> Tuple[List[int], int]:
+    """Greedy pass over `order`. Returns (count per order entry, remaining)."""
+    remaining = amount
+    counts = [0] * len(order)
+    for i, (denom_key, denom_type, value) in enumerate(order):
+        if remaining <= 0:
+            break
+        avail = _available(denom_type, denom_key, available_bills, available_coins)
+        if avail <= 0 or value > remaining:
+            continue
+        counts[i] = min(remaining // value, avail)
+        remaining -= counts[i] * value
+    return counts, remaining
+
+
+def _solve_exact(
+    amount: int,
+    order: List[Tuple[str, str, int]],
+    available_bills: Dict[str, int],
+    available_coins: Dict[str, int],
+) -> Optional[List[int]]:
+    """Exact bounded-knapsack solver over `order`.
+
+    Builds, for every suffix of `order`, the set of amounts reachable with
+    the inventory of that suffix, stored as an integer bitset (bit x set =
+    amount x payable). Bounded counts are folded in with binary splitting,
+    so each denomination costs O(log count) shift/or operations.
+
+    The plan is then reconstructed front to back, taking as many units of
+    each denomination as possible while the rest stays payable by the
+    suffix. This yields the lexicographically largest plan in `order`:
+    user preferences still win ties, and the result equals the greedy plan
+    whenever greedy succeeds.
+
+    Returns:
+        Count per order entry, or None if `amount` cannot be paid exactly.
+    """
+    mask = (1 << (amount + 1)) - 1
+    avail = [
+        min(
+            _available(denom_type, denom_key, available_bills, available_coins),
+            amount // value,
+        )
+        for denom_key, denom_type, value in order
+    ]
+
+    # suffix[i] = amounts reachable using order[i:]
+    suffix = [0] * (len(order) + 1)
+    suffix[-1] = reach = 1
+    for i in range(len(order) - 1, -1, -1):
+        reach = _add_bounded(reach, order[i][2], avail[i], mask)
+        suffix[i] = reach
+
+    if not (suffix[0] >> amount) & 1:
+        return None
+
+    counts = [0] * len(order)
+    remaining = amount
+    for i, (_key, _type, value) in enumerate(order):
+        rest = suffix[i + 1]
+        for count in range(min(avail[i], remaining // value), -1, -1):
+            if (rest >> (remaining - count * value)) & 1:
+                counts[i] = count
+                remaining -= count * value
+                break
+    return counts
+
+
+def _solve_with_policy(
+    amount: int,
+    order: List[Tuple[str, str, int]],
+    available_bills: Dict[str, int],
+    available_coins: Dict[str, int],
+    policy: DispensePolicy,
+    preferred_denoms: Optional[List[int]],
+) -> Optional[List[int]]:
+    """Pick the best exact plan among candidate orderings under `policy`.
+
+    Candidates are the exact plan for `order` itself plus one plan per
+    non-preferred denomination demoted to the end of the order, which is
+    what lets a policy steer withdrawals away from a given cassette.
+    User-preferred denominations keep their leading position throughout.
+
+    Returns:
+        Count per `order` entry for the best plan, or None if `amount`
+        cannot be paid exactly.
+    """
+    available = [
+        _available(denom_type, denom_key, available_bills, available_coins)
+        for denom_key, denom_type, _value in order
+    ]
+    values = [value for _key, _type, value in order]
+    preferred = set(preferred_denoms or [])
+
+    base = list(range(len(order)))
+    permutations = [base]
+    for i in base:
+        if available[i] > 0 and values[i] not in preferred:
+            permutations.append([j for j in base if j != i] + [i])
+
+    best_counts: Optional[List[int]] = None
+    best_score = None
+    for perm in permutations:
+        solved = _solve_exact(
+            amount, [order[i] for i in perm], available_bills, available_coins
+        )
+        if solved is None:
+            # Reordering never changes feasibility
+            return None
+        counts = [0] * len(order)
+        for position, i in enumerate(perm):
+            counts[i] = solved[position]
+        score = policy.score(counts, available, values)
+        if best_score is None or score < best_score:
+            best_counts, best_score = counts, score
+    return best_counts
+
+
+def _add_bounded(bits: int, value: int, count: int, mask: int) -> int:
+    """Add up to `count` units of `value` to reachable-amount bitset `bits`."""
+    chunk = 1
+    while count > 0:
+        take = min(chunk, count)
+        bits |= (bits << (value * take)) & mask
+        count -= take
+        chunk <<= 1
+    return bits
+
+
+def _build_items(
+    order: List[Tuple[str, str, int]], counts: List[int]
+) -> List[DispensePlanItem]:
+    return [
+        DispensePlanItem(
+            denom=denom_key,
+            denom_type=denom_type,
+            count=count,
+            value=value,
+        )
+        for (denom_key, denom_type, value), count in zip(order, counts)
+        if count > 0
+    ]
+
+
 def _get_bill_order(
     preferred_denoms: Optional[List[int]],
 ) -> List[tuple]:
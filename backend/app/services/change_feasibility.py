@@ -0,0 +1,109 @@
+"""Incremental change-feasibility index over dispenser and coin inventory.
+
+Answers "can this amount be paid out exactly?" in O(1) without running the
+change calculator. The index keeps, for every amount up to a configurable
+ceiling, the number of distinct ways (mod a prime) to pay that amount with
+the current inventory. An amount is payable iff its count is non-zero.
+
+Counting ways instead of storing a plain reachability bitset is what makes
+incremental updates possible: the generating function of the inventory is
+
+    prod over denominations of (1 - z^((count + 1) * value)) / (1 - z^value)
+
+so changing one denomination's count from `old` to `new` only multiplies
+the table by (1 - z^((new + 1) * value)) / (1 - z^((old + 1) * value)).
+Both factors are single vectorized passes, O(ceiling) per update instead
+of a full rebuild.
+
+Arithmetic is modulo a large prime, so an unpayable amount always reads
+zero; a payable amount could in principle alias to zero (probability about
+1 in 2^31 per amount), which only makes the index conservative. The change
+calculator remains the authority at confirm time.
+"""
+
+import logging
+from typing import Dict, Tuple
+
+import numpy as np
+
+from app.core.constants import BILL_DENOM_VALUES, COIN_DENOM_VALUES
+
+logger = logging.getLogger(__name__)
+
+_MODULUS = 2_147_483_647  # 2^31 - 1
+
+# (denom_type, denom_key) -> value for every denomination change is paid in
+_DISPENSABLE_VALUES: Dict[Tuple[str, str], int] = {
+    ("bill", denom.value): value
+    for denom, value in BILL_DENOM_VALUES.items()
+    if denom.value.startswith("PHP_")
+}
+_DISPENSABLE_VALUES.update({
+    ("coin", f"PHP_{value}"): value
+    for value in COIN_DENOM_VALUES.values()
+})
+
+
+class ChangeFeasibilityIndex:
+    """Payable-amount index for amounts 0..ceiling (inclusive)."""
+
+    def __init__(self, ceiling: int):
+        self._ceiling = max(0, ceiling)
+        self._ways = np.zeros(self._ceiling + 1, dtype=np.int64)
+        self._ways[0] = 1
+        self._counts: Dict[Tuple[str, str], int] = {}
+
+    @property
+    def ceiling(self) -> int:
+        return self._ceiling
+
+    def set_count(self, denom_type: str, denom: str, count: int) -> None:
+        """Update the index for a new inventory count of one denomination.
+
+        Denominations change is never paid in (USD, EUR) are ignored.
+        """
+        value = _DISPENSABLE_VALUES.get((denom_type, denom))
+        if value is None:
+            return
+        count = max(0, count)
+        old = self._counts.get((denom_type, denom), 0)
+        if count == old:
+            return
+        self._counts[(denom_type, denom)] = count
+        self._multiply((count + 1) * value)
+        self._divide((old + 1) * value)
+
+    def set_counts(self, denom_type: str, counts: Dict[str, int]) -> None:
+        for denom, count in counts.items():
+            self.set_count(denom_type, denom, count)
+
+    def is_payable(self, amount: int) -> bool:
+        """Whether `amount` (0 <= amount <= ceiling) can be paid exactly."""
+        if amount < 0 or amount > self._ceiling:
+            raise ValueError(
+                f"Amount {amount} outside index range 0..{self._ceiling}"
+            )
+        return bool(self._ways[amount])
+
+    def payable_mask(self) -> np.ndarray:
+        """Boolean array: mask[a] is True iff amount `a` is payable."""
+        return self._ways != 0
+
+    def _multiply(self, step: int) -> None:
+        """Multiply the table by (1 - z^step)."""
+        if step > self._ceiling:
+            return
+        ways = self._ways
+        ways[step:] = (ways[step:] - ways[:-step]) % _MODULUS
+
+    def _divide(self, step: int) -> None:
+        """Divide the table by (1 - z^step), i.e. a cumulative sum with stride."""
+        if step > self._ceiling:
+            return
+        size = len(self._ways)
+        rows = -(-size // step)
+        padded = np.zeros(rows * step, dtype=np.int64)
+        padded[:size] = self._ways
+        # rows * modulus stays far below int64 range for any sane ceiling
+        summed = padded.reshape(rows, step).cumsum(axis=0) % _MODULUS
+        self._ways = summed.reshape(-1)[:size].copy()
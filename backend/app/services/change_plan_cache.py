@@ -0,0 +1,112 @@
+"""LRU cache of change plans for recurring amount/preference combinations.
+
+Most traffic repeats the same few requests (PHP 1000 into 100s, 500 into
+50s), so plans are memoized by (amount, preferred denominations, policy).
+Entries are only valid for the inventory they were computed against: the
+cache is tagged with MachineStatus.inventory_version and is emptied as soon
+as a lookup arrives with a different version.
+
+Infeasible requests are cached too, and re-raise InsufficientInventoryError
+on a hit. Cached plans are shared between callers and must not be mutated.
+"""
+
+import logging
+from collections import OrderedDict
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+from app.core.errors import InsufficientInventoryError
+from app.services.change_calculator import DispensePlan, calculate_change
+from app.services.dispense_policy import DEFAULT_DISPENSE_POLICY
+
+logger = logging.getLogger(__name__)
+
+_PlanKey = Tuple[int, Optional[Tuple[int, ...]], str]
+# A plan, or (requested, available, shortfall) of the cached failure
+_PlanEntry = Union[DispensePlan, Tuple[int, int, int]]
+
+
+class ChangePlanCache:
+    """Memoizes calculate_change() results per inventory version."""
+
+    def __init__(self, maxsize: int = 128):
+        self._maxsize = max(1, maxsize)
+        self._entries: "OrderedDict[_PlanKey, _PlanEntry]" = OrderedDict()
+        self._version: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get_plan(
+        self,
+        amount: int,
+        available_bills: Dict[str, int],
+        available_coins: Dict[str, int],
+        inventory_version: int,
+        preferred_denoms: Optional[Sequence[int]] = None,
+        policy: str = DEFAULT_DISPENSE_POLICY,
+    ) -> DispensePlan:
+        """Return the change plan for `amount`, computing it on a miss.
+
+        Args:
+            amount: Amount in PHP.
+            available_bills: Dispenser counts matching inventory_version.
+            available_coins: Coin counts matching inventory_version.
+            inventory_version: MachineStatus.inventory_version the counts
+                were read at.
+            preferred_denoms: Preferred dispense denominations.
+            policy: Dispense policy name.
+
+        Raises:
+            InsufficientInventoryError: If the amount cannot be paid exactly.
+        """
+        if inventory_version != self._version:
+            if self._entries:
+                self.invalidations += 1
+                self._entries.clear()
+            self._version = inventory_version
+
+        preferred = tuple(preferred_denoms) if preferred_denoms else None
+        key = (amount, preferred, policy)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+        else:
+            self.misses += 1
+            try:
+                entry = calculate_change(
+                    amount,
+                    available_bills,
+                    available_coins,
+                    preferred_denoms=list(preferred) if preferred else None,
+                    policy=policy,
+                )
+            except InsufficientInventoryError as e:
+                entry = (e.requested, e.available, e.shortfall)
+            self._entries[key] = entry
+            if len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+        if isinstance(entry, DispensePlan):
+            return entry
+        requested, available, shortfall = entry
+        raise InsufficientInventoryError(
+            requested=requested, available=available, shortfall=shortfall
+        )
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._version = None
+
+    def stats(self) -> dict:
+        """Hit/miss counters and occupancy for monitoring."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "size": len(self._entries),
+            "maxsize": self._maxsize,
+            "inventory_version": self._version,
+        }
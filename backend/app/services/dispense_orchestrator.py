@@ -4,6 +4,7 @@ Handles inventory reservation, sequential dispensing through hardware
 controllers, progress broadcasting, and partial dispense recovery.
 """
 
+import asyncio
 import logging
 import secrets
 import string
@@ -12,6 +13,7 @@ from typing import Dict, List, Optional
 from pydantic import BaseModel
 
 from app.api.ws import ConnectionManager
+from app.core.constants import CoinDenom
 from app.core.errors import HardwareError
 from app.drivers.bill_controller import BillController
 from app.drivers.coin_security_controller import CoinSecurityController
@@ -37,11 +39,86 @@ def _generate_claim_ticket() -> str:
     chars = string.ascii_uppercase + string.digits
     return "".join(secrets.choice(chars) for _ in range(8))
 
+class _DispenseProgress:
+    """Running totals shared by the bill and coin dispense phases."""
+
+    def __init__(self, total_items: int):
+        self.total_items = total_items
+        self.completed = 0
+        self.amount = 0
+        self.bills: Dict[str, int] = {}
+        self.coins: Dict[str, int] = {}
+
+
+# Order the coin firmware's COIN_CHANGE pays out in (largest first)
+_FIRMWARE_COIN_ORDER: List[int] = sorted((c.value for c in CoinDenom), reverse=True)
+
+
+def _firmware_coin_breakdown(amount: int) -> Dict[str, int]:
+    """Coins COIN_CHANGE dispenses for `amount` (greedy 20, 10, 5, 1)."""
+    breakdown: Dict[str, int] = {}
+    for value in _FIRMWARE_COIN_ORDER:
+        count, amount = divmod(amount, value)
+        if count:
+            breakdown[f"PHP_{value}"] = count
+    return breakdown
+
+def _coin_value(denom: str) -> int:
+    return int(denom.split("_")[1])
+
+
+def _leftover_coin_items(
+    coin_items: List[DispensePlanItem],
+    dispensed: Dict[str, int],
+    unpaid: int,
+) -> List[DispensePlanItem]:
+    """Planned coins not yet dispensed that pay `unpaid` (largest first).
+
+    Only reserved coins are used; a remainder they cannot make up is left
+    as shortfall.
+    """
+    leftover: List[DispensePlanItem] = []
+    for item in sorted(coin_items, key=lambda i: i.value, reverse=True):
+        if unpaid <= 0:
+            break
+        reserved = item.count - min(item.count, dispensed.get(item.denom, 0))
+        count = min(reserved, unpaid // item.value)
+        if count:
+            leftover.append(item.model_copy(update={"count": count}))
+            unpaid -= count * item.value
+    return leftover
+
+
+def _coin_items_paid(coin_items: List[DispensePlanItem], paid: int) -> int:
+    """How many planned coin items `paid` covers in value (largest first).
+
+    Progress for COIN_CHANGE, where substituted coins make per-item counts
+    meaningless.
+    """
+    done = 0
+    for item in sorted(coin_items, key=lambda i: i.value, reverse=True):
+        cost = item.count * item.value
+        if paid < cost:
+            break
+        paid -= cost
+        done += 1
+    return done
+
+
 class DispenseOrchestrator:
     """Coordinates bill and coin dispensing with inventory management.
 
     Dispense order: bills first (one denomination at a time), then coins.
     On hardware error (JAM), stops and records partial dispense.
+
+    With coin_change_offload, a coin portion that matches the firmware's own
+    greedy breakdown is sent as a single COIN_CHANGE command instead of one
+    COIN_DISPENSE per denomination; whatever the firmware reports as not
+    dispensed is retried per denomination, by value: the firmware may pay
+    with other coins than planned.
+
+    With parallel_dispense, mixed payouts drive both controllers (separate
+    serial ports) at once and take max(bill, coin) time instead of the sum.
     """
 
     def __init__(
@@ -50,11 +127,15 @@ class DispenseOrchestrator:
         coin_controller: CoinSecurityController,
         machine_status: MachineStatus,
         ws_manager: ConnectionManager,
+        coin_change_offload: bool = False,
+        parallel_dispense: bool = False,
     ):
         self._bill = bill_controller
         self._coin = coin_controller
         self._status = machine_status
         self._ws = ws_manager
+        self._coin_change_offload = coin_change_offload
+        self._parallel = parallel_dispense
 
     async def execute_dispense(self, plan: DispensePlan) -> DispenseResult:
         """Execute the full dispense plan.
@@ -65,58 +146,37 @@ class DispenseOrchestrator:
         Returns:
             DispenseResult with actual dispensed amounts.
         """
-        dispensed_bills: Dict[str, int] = {}
-        dispensed_coins: Dict[str, int] = {}
-        total_dispensed = 0
+        progress = _DispenseProgress(
+            total_items=len(plan.bill_items) + len(plan.coin_items)
+        )
+        dispensed_bills = progress.bills
+        dispensed_coins = progress.coins
         error_msg = None
 
-        total_items = len(plan.bill_items) + len(plan.coin_items)
-        completed_items = 0
-
         try:
             # Phase 1: Reserve inventory
             self._reserve_inventory(plan)
 
-            # Phase 2: Dispense bills
-            for item in plan.bill_items:
-                actual = await self._dispense_bill_denom(item)
-                dispensed_bills[item.denom] = actual
-                total_dispensed += actual * item.value
-                completed_items += 1
-
-                await self._broadcast_progress(
-                    completed_items, total_items, dispensed_bills, dispensed_coins, total_dispensed
-                )
+            if self._parallel and plan.bill_items and plan.coin_items:
+                # Phase 2+3: Bills and coins concurrently on their own ports
+                error_msg = await self._dispense_parallel(plan, progress)
+            else:
+                # Phase 2: Dispense bills
+                error_msg = await self._dispense_bills(plan, progress)
 
-                if actual < item.count:
-                    # Partial dispense - hardware error occurred
-                    error_msg = f"Partial bill dispense: {item.denom} ({actual}/{item.count})"
-                    logger.error(error_msg)
-                    break
-
-            # Phase 3: Dispense coins (only if bills succeeded)
-            if error_msg is None:
-                for item in plan.coin_items:
-                    actual = await self._dispense_coin_denom(item)
-                    dispensed_coins[item.denom] = actual
-                    total_dispensed += actual * item.value
-                    completed_items += 1
-
-                    await self._broadcast_progress(
-                        completed_items, total_items, dispensed_bills, dispensed_coins, total_dispensed
-                    )
-
-                    if actual < item.count:
-                        error_msg = f"Partial coin dispense: {item.denom} ({actual}/{item.count})"
-                        logger.error(error_msg)
-                        break
+                # Phase 3: Dispense coins (only if bills succeeded)
+                if error_msg is None:
+                    error_msg = await self._dispense_coins(plan, progress)
 
         except Exception as e:
             error_msg = str(e)
             logger.error(f"Dispense error: {e}", exc_info=True)
 
-        # Phase 4: Reconcile
-        shortfall = plan.total_amount - total_dispensed
+        total_dispensed = progress.amount
+
+        # Phase 4: Reconcile (an overpayment is reported as an error, not
+        # as a negative shortfall)
+        shortfall = max(0, plan.total_amount - total_dispensed)
         success = shortfall == 0 and error_msg is None
 
         # Restore unreserved inventory for items not dispensed
@@ -158,6 +218,102 @@ class DispenseOrchestrator:
 
         return result
 
+    async def _dispense_parallel(
+        self, plan: DispensePlan, progress: "_DispenseProgress"
+    ) -> Optional[str]:
+        """Drive the bill and coin controllers concurrently.
+
+        Unlike sequential mode, a bill failure cannot stop coins that are
+        already moving; both sides run to completion (or their own failure)
+        so every dispensed item is accounted for.
+        """
+        results = await asyncio.gather(
+            self._dispense_bills(plan, progress),
+            self._dispense_coins(plan, progress),
+            return_exceptions=True,
+        )
+        errors = []
+        for result in results:
+            if isinstance(result, BaseException):
+                logger.error(f"Dispense error: {result}", exc_info=result)
+                errors.append(str(result))
+            elif result is not None:
+                errors.append(result)
+        return "; ".join(errors) or None
+
+    async def _dispense_bills(
+        self, plan: DispensePlan, progress: "_DispenseProgress"
+    ) -> Optional[str]:
+        """Dispense bill items in order. Returns an error message on partial."""
+        for item in plan.bill_items:
+            actual = await self._dispense_bill_denom(item)
+            progress.bills[item.denom] = actual
+            progress.amount += actual * item.value
+            progress.completed += 1
+
+            await self._broadcast_progress(
+                progress.completed, progress.total_items, progress.bills, progress.coins, progress.amount
+            )
+
+            if actual < item.count:
+                # Partial dispense - hardware error occurred
+                error_msg = f"Partial bill dispense: {item.denom} ({actual}/{item.count})"
+                logger.error(error_msg)
+                return error_msg
+        return None
+
+    async def _dispense_coins(
+        self, plan: DispensePlan, progress: "_DispenseProgress"
+    ) -> Optional[str]:
+        """Dispense coin items, offloading to COIN_CHANGE when enabled."""
+        coin_items = plan.coin_items
+        # Value paid so far when offloaded; items then complete by value
+        paid: Optional[int] = None
+        if self._coin_change_offload and self._matches_firmware_change(coin_items):
+            offloaded = await self._dispense_coin_change(coin_items)
+            progress.coins.update(offloaded)
+            paid = sum(
+                _coin_value(denom) * count for denom, count in offloaded.items()
+            )
+            progress.amount += paid
+            # The firmware may substitute coins, so what is still owed is a
+            # value, paid per denomination from the planned coins left
+            unpaid = sum(item.count * item.value for item in coin_items) - paid
+            coin_items = _leftover_coin_items(coin_items, offloaded, unpaid)
+            counted = _coin_items_paid(plan.coin_items, paid)
+            progress.completed += counted
+
+            await self._broadcast_progress(
+                progress.completed, progress.total_items, progress.bills, progress.coins, progress.amount
+            )
+
+            if unpaid < 0:
+                error_msg = f"Coin change overpaid by {-unpaid}"
+                logger.error(error_msg)
+                return error_msg
+
+        for item in coin_items:
+            actual = await self._dispense_coin_denom(item)
+            progress.coins[item.denom] = progress.coins.get(item.denom, 0) + actual
+            progress.amount += actual * item.value
+            if paid is None:
+                progress.completed += 1
+            else:
+                paid += actual * item.value
+                done = _coin_items_paid(plan.coin_items, paid)
+                progress.completed += done - counted
+                counted = done
+
+            await self._broadcast_progress(
+                progress.completed, progress.total_items, progress.bills, progress.coins, progress.amount
+            )
+
+            if actual < item.count:
+                error_msg = f"Partial coin dispense: {item.denom} ({actual}/{item.count})"
+                logger.error(error_msg)
+                return error_msg
+        return None
+
     async def _dispense_bill_denom(self, item: DispensePlanItem) -> int:
         """Dispense bills for a single denomination. Returns actual count dispensed."""
         from app.core.constants import BillDenom
@@ -190,6 +346,57 @@ class DispenseOrchestrator:
             )
             return actual
 
+    @staticmethod
+    def _matches_firmware_change(coin_items: List[DispensePlanItem]) -> bool:
+        """Whether COIN_CHANGE would pay out exactly these coins."""
+        if not coin_items:
+            return False
+        amount = sum(item.count * item.value for item in coin_items)
+        planned = {item.denom: item.count for item in coin_items}
+        return planned == _firmware_coin_breakdown(amount)
+
+    async def _dispense_coin_change(
+        self, coin_items: List[DispensePlanItem]
+    ) -> Dict[str, int]:
+        """Dispense the whole coin portion with one COIN_CHANGE command.
+
+        Returns actual count dispensed per denomination. A JAM reports how
+        many coins came out; the firmware pays largest coins first, so those
+        are attributed in that order.
+        """
+        amount = sum(item.count * item.value for item in coin_items)
+        planned = {item.denom: item.count for item in coin_items}
+        try:
+            response = await self._coin.coin_change(amount)
+        except HardwareError as e:
+            remaining = e.dispensed or 0
+            logger.error(
+                f"Coin change error for {amount}: {e.code} "
+                f"(dispensed {remaining} coins)"
+            )
+            actual: Dict[str, int] = {}
+            for denom, count in _firmware_coin_breakdown(amount).items():
+                taken = min(count, remaining)
+                if taken:
+                    actual[denom] = taken
+                remaining -= taken
+            return actual
+
+        actual = {
+            f"PHP_{value}": count
+            for value, count in response.breakdown.items()
+            if count > 0
+        }
+        # Coins beyond the plan were never reserved; take them out of stock
+        for denom, count in actual.items():
+            extra = count - planned.get(denom, 0)
+            if extra > 0:
+                logger.warning(
+                    f"COIN_CHANGE {amount} dispensed {extra} unplanned {denom}"
+                )
+                self._status.decrement_coin(denom, extra)
+        return actual
+
     def _reserve_inventory(self, plan: DispensePlan) -> None:
         """Decrement inventory for all planned items before dispensing."""
         for item in plan.bill_items:
@@ -0,0 +1,91 @@
+"""Dispense policies: objective functions for choosing between change plans.
+
+The change calculator produces several exact candidate plans (one per
+candidate denomination ordering) and asks the configured policy to score
+them against the current inventory. Lower scores win; scores are tuples
+so policies can express tie-breakers.
+
+Policies:
+- min_items: fewest bills/coins handed out (the historical greedy behavior).
+- balance: spread withdrawals so no cassette/hopper is drained
+  disproportionately, delaying the first EMPTY_BILL/EMPTY_COIN.
+
+Policies that evaluate alternatives (greedy_first False) need the exact
+solver, so they cannot be combined with exact_fallback=False.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Dict, List, Sequence, Tuple
+
+
+class DispensePolicy(ABC):
+    """Base class. Subclasses implement score()."""
+
+    name: str = ""
+    # Accept the greedy plan without evaluating alternatives when it succeeds
+    greedy_first: bool = False
+
+    @abstractmethod
+    def score(
+        self,
+        counts: Sequence[int],
+        available: Sequence[int],
+        values: Sequence[int],
+    ) -> Tuple[float, ...]:
+        """Score a candidate plan. Lower is better.
+
+        Args:
+            counts: Units taken per denomination.
+            available: Units in stock per denomination before dispensing.
+            values: PHP value per denomination.
+        """
+
+
+class MinItemsPolicy(DispensePolicy):
+    name = "min_items"
+    greedy_first = True
+
+    def score(self, counts, available, values):
+        return (sum(counts),)
+
+
+class BalanceInventoryPolicy(DispensePolicy):
+    name = "balance"
+
+    def score(self, counts, available, values):
+        # Worst-hit denomination's drained fraction, then item count
+        worst = max(
+            (count / avail for count, avail in zip(counts, available) if count),
+            default=0.0,
+        )
+        return (round(worst, 6), sum(counts))
+
+
+_POLICIES: Dict[str, DispensePolicy] = {
+    policy.name: policy
+    for policy in (
+        MinItemsPolicy(),
+        BalanceInventoryPolicy(),
+    )
+}
+
+DEFAULT_DISPENSE_POLICY = MinItemsPolicy.name
+
+
+def get_dispense_policy(name: str) -> DispensePolicy:
+    """Look up a policy by name.
+
+    Raises:
+        ValueError: If no policy with that name exists.
+    """
+    policy = _POLICIES.get(name)
+    if policy is None:
+        raise ValueError(
+            f"Unknown dispense policy: {name} "
+            f"(expected one of {', '.join(available_dispense_policies())})"
+        )
+    return policy
+
+
+def available_dispense_policies() -> List[str]:
+    return list(_POLICIES)
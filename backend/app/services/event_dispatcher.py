@@ -2,15 +2,23 @@
 
 Consumes from the shared asyncio.Queue populated by serial reader threads.
 Runs as an asyncio task during application lifetime.
+
+With batch_size > 1, each wakeup drains every ready event (up to
+batch_size), applies them to MachineStatus inside one batch_update()
+section, and broadcasts a single WebSocket message: the event itself for a
+batch of one, otherwise an EVENT_BATCH carrying the events in order.
 """
 
 import asyncio
 import logging
+from typing import Callable, Dict, List, Optional, Tuple
 
 from app.api.ws import ConnectionManager
 from app.models.events import WSEvent, WSEventType
 from app.models.serial_messages import (
     CoinInEvent,
+    DeviceConnectedEvent,
+    DeviceDisconnectedEvent,
     DoorStateEvent,
     KeypadEvent,
     ReadyEvent,
@@ -20,6 +28,9 @@ from app.services.machine_status import MachineStatus
 
 logger = logging.getLogger(__name__)
 
+# A WebSocket event to broadcast: (type, payload)
+_Broadcast = Tuple[WSEventType, dict]
+
 
 class EventDispatcher:
     def __init__(
@@ -27,12 +38,25 @@ class EventDispatcher:
         event_queue: asyncio.Queue,
         machine_status: MachineStatus,
         ws_manager: ConnectionManager,
+        batch_size: int = 1,
     ):
         self._queue = event_queue
         self._status = machine_status
         self._ws = ws_manager
+        self._batch_size = max(1, batch_size)
         self._running = False
         self._task = None
+        self._handlers: Dict[str, Callable[[dict], Optional[_Broadcast]]] = {
+            "COIN_IN": self._handle_coin_in,
+            "TAMPER": self._handle_tamper,
+            "KEYPAD": self._handle_keypad,
+            "DOOR_STATE": self._handle_door_state,
+            "READY": self._handle_ready,
+            "DEVICE_DISCONNECTED": self._handle_device_disconnected,
+            "DEVICE_CONNECTED": self._handle_device_connected,
+        }
+        self.events_handled = 0
+        self.broadcasts = 0
 
     async def start(self) -> None:
         self._running = True
@@ -50,6 +74,9 @@ class EventDispatcher:
     async def _run(self) -> None:
         while self._running:
             try:
+                if self._batch_size > 1:
+                    await self._handle_batch(await self._next_batch())
+                    continue
                 event_data = await asyncio.wait_for(
                     self._queue.get(), timeout=1.0
                 )
@@ -61,58 +88,95 @@ class EventDispatcher:
             except Exception as e:
                 logger.error(f"Event dispatcher error: {e}")
 
+    async def _next_batch(self) -> List[dict]:
+        """Wait for one event, then take whatever else is already queued."""
+        batch = [await self._queue.get()]
+        while len(batch) < self._batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
     async def _handle_event(self, event_data: dict) -> None:
-        event_type = event_data.get("event")
         controller = event_data.pop("_controller", "UNKNOWN")
-
         logger.info(
-            f"Event from {controller}: {event_type} "
+            f"Event from {controller}: {event_data.get('event')} "
             f"data={event_data}"
         )
-
-        handlers = {
-            "COIN_IN": self._handle_coin_in,
-            "TAMPER": self._handle_tamper,
-            "KEYPAD": self._handle_keypad,
-            "DOOR_STATE": self._handle_door_state,
-            "READY": self._handle_ready,
-        }
-
-        handler = handlers.get(event_type)
-        if handler:
-            await handler(event_data)
-        else:
+        broadcast = self._apply_event(event_data)
+        if broadcast:
+            await self._broadcast([broadcast])
+
+    async def _handle_batch(self, batch: List[dict]) -> None:
+        broadcasts: List[_Broadcast] = []
+        with self._status.batch_update():
+            for event_data in batch:
+                controller = event_data.pop("_controller", "UNKNOWN")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(
+                        f"Event from {controller}: {event_data.get('event')} "
+                        f"data={event_data}"
+                    )
+                # One bad event must not lose the rest of the batch
+                try:
+                    broadcast = self._apply_event(event_data)
+                except Exception as e:
+                    logger.error(
+                        f"Event dispatcher error on {event_data.get('event')}: {e}"
+                    )
+                    continue
+                if broadcast:
+                    broadcasts.append(broadcast)
+        await self._broadcast(broadcasts)
+
+    def _apply_event(self, event_data: dict) -> Optional[_Broadcast]:
+        """Update MachineStatus for one event; return what to broadcast."""
+        self.events_handled += 1
+        event_type = event_data.get("event")
+        handler = self._handlers.get(event_type)
+        if handler is None:
             logger.warning(f"Unknown event type: {event_type}")
+            return None
+        return handler(event_data)
+
+    async def _broadcast(self, broadcasts: List[_Broadcast]) -> None:
+        if not broadcasts:
+            return
+        if len(broadcasts) == 1:
+            event_type, payload = broadcasts[0]
+            event = WSEvent(type=event_type, payload=payload)
+        else:
+            event = WSEvent(
+                type=WSEventType.EVENT_BATCH,
+                payload={"events": [
+                    {"type": event_type.value, "payload": payload}
+                    for event_type, payload in broadcasts
+                ]},
+            )
+        self.broadcasts += 1
+        await self._ws.broadcast(event)
 
-    async def _handle_coin_in(self, data: dict) -> None:
+    def _handle_coin_in(self, data: dict) -> _Broadcast:
         parsed = CoinInEvent(**data)
         self._status.increment_coin(f"PHP_{parsed.denom}", 1)
-        await self._ws.broadcast(WSEvent(
-            type=WSEventType.COIN_INSERTED,
-            payload={"denom": parsed.denom, "total": parsed.total},
-        ))
+        return (
+            WSEventType.COIN_INSERTED,
+            {"denom": parsed.denom, "total": parsed.total},
+        )
 
-    async def _handle_tamper(self, data: dict) -> None:
+    def _handle_tamper(self, data: dict) -> _Broadcast:
         parsed = TamperEvent(**data)
         self._status.update_security(tamper_active=True, sensor=parsed.sensor)
-        await self._ws.broadcast(WSEvent(
-            type=WSEventType.TAMPER,
-            payload={"sensor": parsed.sensor},
-        ))
+        return (WSEventType.TAMPER, {"sensor": parsed.sensor})
 
-    async def _handle_keypad(self, data: dict) -> None:
+    def _handle_keypad(self, data: dict) -> None:
         parsed = KeypadEvent(**data)
         logger.info(f"Keypad key pressed: {parsed.key}")
 
-    async def _handle_door_state(self, data: dict) -> None:
+    def _handle_door_state(self, data: dict) -> _Broadcast:
         parsed = DoorStateEvent(**data)
         self._status.update_security(locked=parsed.locked)
-        await self._ws.broadcast(WSEvent(
-            type=WSEventType.STATE_CHANGE,
-            payload={"door_locked": parsed.locked},
-        ))
+        return (WSEventType.STATE_CHANGE, {"door_locked": parsed.locked})
 
-    async def _handle_ready(self, data: dict) -> None:
+    def _handle_ready(self, data: dict) -> _Broadcast:
         parsed = ReadyEvent(**data)
         if parsed.controller == "BILL":
             self._status.update_bill_device(
@@ -124,10 +188,33 @@ class EventDispatcher:
                 connection="connected",
                 firmware_version=parsed.version,
             )
-        await self._ws.broadcast(WSEvent(
-            type=WSEventType.DEVICE_CONNECTED,
-            payload={
-                "controller": parsed.controller,
-                "version": parsed.version,
-            },
-        ))
+        return (
+            WSEventType.DEVICE_CONNECTED,
+            {"controller": parsed.controller, "version": parsed.version},
+        )
+
+    def _handle_device_disconnected(self, data: dict) -> _Broadcast:
+        parsed = DeviceDisconnectedEvent(**data)
+        self._update_device(
+            parsed.controller,
+            connection="disconnected",
+            last_error=parsed.reason or "Serial link lost",
+        )
+        return (
+            WSEventType.DEVICE_DISCONNECTED,
+            {"controller": parsed.controller, "reason": parsed.reason},
+        )
+
+    def _handle_device_connected(self, data: dict) -> _Broadcast:
+        parsed = DeviceConnectedEvent(**data)
+        self._update_device(parsed.controller, connection="connected")
+        return (
+            WSEventType.DEVICE_CONNECTED,
+            {"controller": parsed.controller, "attempts": parsed.attempts},
+        )
+
+    def _update_device(self, controller: str, **kwargs) -> None:
+        if controller == "BILL":
+            self._status.update_bill_device(**kwargs)
+        elif controller == "COIN_SECURITY":
+            self._status.update_coin_device(**kwargs)
@@ -0,0 +1,323 @@
+"""Append-only, file-backed ledger of consumable count changes.
+
+Keeps MachineStatus's bill storage, bill dispenser and coin counts across
+restarts. The ledger directory holds:
+
+    checkpoint.json   all counts as of ledger seq N (replaced atomically)
+    ledger.jsonl      one JSON record per change, seq > N expected
+    ledger.prev.jsonl the segment before the last checkpoint (audit trail,
+                      and per-transaction deltas for crash reports)
+
+A record is {"seq", "ts", "tx", "counter", "denom", "delta", "count"}:
+`count` is the value after the change, so replay just assigns it and is
+idempotent. `tx` is the active transaction id, or null for changes made
+outside a transaction (coins inserted between transactions, maintenance).
+
+Every `checkpoint_every` records MachineStatus requests a checkpoint and
+the ledger rolls to a fresh segment, so startup reads one checkpoint plus a
+short tail. Records are written and flushed to the OS as they happen;
+record() is called on the event loop, so it never fsyncs. A background
+thread does the slow work: with `fsync` on it fsyncs the ledger at most
+every `fsync_interval` seconds after a write, so a burst of records shares
+one fsync and a power cut loses at most that window, and it writes
+requested checkpoints. Records appended while a checkpoint is being
+written are carried over into the new segment. A torn final line is cut
+off on load.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+COUNTERS = ("bill_storage", "bill_dispenser", "coin")
+CHECKPOINT_FILE = "checkpoint.json"
+LEDGER_FILE = "ledger.jsonl"
+PREVIOUS_LEDGER_FILE = "ledger.prev.jsonl"
+
+# counter -> denom -> count
+Counts = Dict[str, Dict[str, int]]
+
+
+class InventoryLedger:
+    def __init__(
+        self,
+        directory: str,
+        checkpoint_every: int = 1000,
+        fsync: bool = True,
+        fsync_interval: float = 0.05,
+    ):
+        self._directory = directory
+        self._checkpoint_every = max(1, checkpoint_every)
+        self._fsync = fsync
+        self._fsync_interval = fsync_interval
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._checkpoint_seq = 0
+        self._file = None
+        self._dirty = threading.Event()
+        self._syncer: Optional[threading.Thread] = None
+        # Serializes checkpoint writers (background thread, close path)
+        self._checkpoint_lock = threading.Lock()
+        # (seq, counts) waiting for the background thread, and the lines
+        # recorded since, which belong in the next segment
+        self._pending_checkpoint: Optional[Tuple[int, Counts]] = None
+        self._carry_over: List[str] = []
+        self.records = 0
+        self.checkpoints = 0
+        self.syncs = 0
+
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    @property
+    def checkpoint_due(self) -> bool:
+        return (
+            self._pending_checkpoint is None
+            and self._seq - self._checkpoint_seq >= self._checkpoint_every
+        )
+
+    def load(self) -> Counts:
+        """Counts from the last checkpoint plus the ledger tail.
+
+        Also opens the ledger for appending; call once, before record().
+        Denominations never recorded are absent.
+        """
+        self._truncate_torn_tail(self._path(LEDGER_FILE))
+        counts: Counts = {counter: {} for counter in COUNTERS}
+        checkpoint = self._read_checkpoint()
+        if checkpoint is not None:
+            self._checkpoint_seq = checkpoint["seq"]
+            for counter in COUNTERS:
+                counts[counter].update(checkpoint["counts"].get(counter, {}))
+        self._seq = self._checkpoint_seq
+
+        replayed = 0
+        for record in self._read_records(self._path(LEDGER_FILE)):
+            if record["seq"] <= self._checkpoint_seq:
+                continue  # Crashed between checkpoint and roll
+            counts[record["counter"]][record["denom"]] = record["count"]
+            self._seq = record["seq"]
+            replayed += 1
+
+        self._file = open(self._path(LEDGER_FILE), "a", encoding="utf-8")
+        self._syncer = threading.Thread(
+            target=self._sync_loop, name="inventory-ledger-fsync", daemon=True
+        )
+        self._syncer.start()
+        logger.info(
+            f"Inventory ledger loaded: checkpoint seq {self._checkpoint_seq}, "
+            f"{replayed} record(s) replayed"
+        )
+        return counts
+
+    def record(
+        self,
+        counter: str,
+        denom: str,
+        delta: int,
+        count: int,
+        transaction_id: Optional[str] = None,
+    ) -> None:
+        with self._lock:
+            if self._file is None:
+                return
+            self._seq += 1
+            line = json.dumps({
+                "seq": self._seq,
+                "ts": round(time.time(), 3),
+                "tx": transaction_id,
+                "counter": counter,
+                "denom": denom,
+                "delta": delta,
+                "count": count,
+            }, separators=(",", ":")) + "\n"
+            self._file.write(line)
+            self._file.flush()
+            if self._pending_checkpoint is not None:
+                self._carry_over.append(line)
+            self.records += 1
+        self._dirty.set()
+
+    def request_checkpoint(self, counts: Counts) -> None:
+        """Checkpoint `counts` (as of the latest record) on the background thread.
+
+        The caller keeps appending meanwhile; `counts` must not be mutated.
+        """
+        with self._lock:
+            if self._file is None or self._pending_checkpoint is not None:
+                return
+            self._pending_checkpoint = (self._seq, counts)
+        self._dirty.set()
+
+    def checkpoint(self, counts: Counts) -> None:
+        """Persist `counts` (as of the latest record) and start a new segment.
+
+        Blocks on file I/O and an fsync; on the event loop use
+        request_checkpoint() instead.
+        """
+        with self._checkpoint_lock:
+            with self._lock:
+                if self._file is None:
+                    return
+                # Supersedes a requested checkpoint not yet written
+                self._pending_checkpoint = None
+                self._carry_over = []
+                seq = self._seq
+                self._write_checkpoint(seq, counts)
+                self._roll(seq, [])
+
+    def _write_pending_checkpoint(self) -> None:
+        """Write a requested checkpoint (background thread)."""
+        with self._checkpoint_lock:
+            with self._lock:
+                pending = self._pending_checkpoint
+                if pending is None or self._file is None:
+                    return
+            seq, counts = pending
+            try:
+                self._write_checkpoint(seq, counts)
+            except OSError:
+                # Nothing rolled; the next record requests a fresh one
+                with self._lock:
+                    self._pending_checkpoint = None
+                    self._carry_over = []
+                raise
+            with self._lock:
+                if self._file is None:
+                    # Closed meanwhile: the checkpoint stands, records past
+                    # it are still in the (unrolled) segment
+                    return
+                carry_over = self._carry_over
+                self._pending_checkpoint = None
+                self._carry_over = []
+                self._roll(seq, carry_over)
+
+    def _write_checkpoint(self, seq: int, counts: Counts) -> None:
+        tmp = self._path(CHECKPOINT_FILE + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({
+                "seq": seq,
+                "ts": round(time.time(), 3),
+                "counts": counts,
+            }, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._path(CHECKPOINT_FILE))
+
+    def _roll(self, checkpoint_seq: int, carry_over: List[str]) -> None:
+        """Start a new segment holding the records past the checkpoint (lock held)."""
+        self._checkpoint_seq = checkpoint_seq
+        self._file.close()
+        os.replace(self._path(LEDGER_FILE), self._path(PREVIOUS_LEDGER_FILE))
+        self._file = open(self._path(LEDGER_FILE), "a", encoding="utf-8")
+        if carry_over:
+            self._file.writelines(carry_over)
+            self._file.flush()
+        self.checkpoints += 1
+
+    def transaction_deltas(self, transaction_id: str) -> Dict[Tuple[str, str], int]:
+        """Net change per (counter, denom) recorded for one transaction.
+
+        Covers the current and previous ledger segments.
+        """
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+            deltas: Dict[Tuple[str, str], int] = {}
+            for name in (PREVIOUS_LEDGER_FILE, LEDGER_FILE):
+                for record in self._read_records(self._path(name)):
+                    if record["tx"] != transaction_id:
+                        continue
+                    if (
+                        name == PREVIOUS_LEDGER_FILE
+                        and record["seq"] > self._checkpoint_seq
+                    ):
+                        continue  # Carried over into the current segment
+                    key = (record["counter"], record["denom"])
+                    deltas[key] = deltas.get(key, 0) + record["delta"]
+            return {key: delta for key, delta in deltas.items() if delta}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                if self._fsync:
+                    os.fsync(self._file.fileno())
+                self._file.close()
+                self._file = None
+        # Wake the syncer so it sees the file is gone and exits
+        self._dirty.set()
+        if self._syncer is not None:
+            self._syncer.join(timeout=1.0)
+            self._syncer = None
+
+    def _sync_loop(self) -> None:
+        while True:
+            self._dirty.wait()
+            if self._fsync:
+                # Let a burst of records accumulate behind one fsync
+                time.sleep(self._fsync_interval)
+            with self._lock:
+                self._dirty.clear()
+                if self._file is None:
+                    return
+                # A checkpoint may close the file while we sync it
+                fd = os.dup(self._file.fileno()) if self._fsync else None
+            if fd is not None:
+                try:
+                    os.fsync(fd)
+                    self.syncs += 1
+                except OSError as e:
+                    logger.error(f"Inventory ledger fsync failed: {e}")
+                finally:
+                    os.close(fd)
+            try:
+                self._write_pending_checkpoint()
+            except OSError as e:
+                logger.error(f"Inventory ledger checkpoint failed: {e}")
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self._directory, name)
+
+    def _read_checkpoint(self) -> Optional[dict]:
+        path = self._path(CHECKPOINT_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    @staticmethod
+    def _truncate_torn_tail(path: str) -> None:
+        """Cut a partial last line so new records start on a line of their own."""
+        if not os.path.exists(path):
+            return
+        with open(path, "rb+") as f:
+            data = f.read()
+            end = data.rfind(b"\n") + 1
+            if end != len(data):
+                logger.warning(
+                    f"Truncating torn inventory ledger record in {path} "
+                    f"({len(data) - end} bytes)"
+                )
+                f.truncate(end)
+
+    @staticmethod
+    def _read_records(path: str):
+        if not os.path.exists(path):
+            return
+        with open(path, encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(
+                        f"Skipping unreadable inventory ledger line "
+                        f"{path}:{line_no} (torn write?)"
+                    )
@@ -2,12 +2,24 @@
 
 Mutated from serial reader threads; produces immutable snapshots for
 the API/WebSocket layer via snapshot().
+
+Every mutator bumps `version` and drops the cached snapshot under the
+lock. snapshot() returns the cached one without locking and only rebuilds
+(deep-copying the state once) on the first read after a change, so
+repeated reads are free and never wait on writers.
+
+With an InventoryLedger, consumable counts are restored from it at start
+and every count change is appended to it, tagged with the active
+transaction id.
 """
 
 import logging
 import threading
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Callable, List, Optional
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
 
 from app.core.config import Settings
 from app.models.machine import (
@@ -15,16 +27,33 @@ from app.models.machine import (
     DeviceConnectionState,
     DeviceStatus,
     MachineStateSnapshot,
+    PayableRange,
     SecurityState,
     SorterState,
+    freeze_model,
 )
+from app.services.change_feasibility import ChangeFeasibilityIndex
+from app.services.inventory_ledger import Counts, InventoryLedger
 
 logger = logging.getLogger(__name__)
 
+# Distinct (step, limit) query shapes kept per inventory version
+_PAYABLE_RANGE_CACHE_SIZE = 16
+
+# Ledger counter -> ConsumablesState field
+_LEDGER_COUNTERS = {
+    "bill_storage": "bill_storage_counts",
+    "bill_dispenser": "bill_dispenser_counts",
+    "coin": "coin_counts",
+}
+
 
 class MachineStatus:
-    def __init__(self, settings: Settings):
-        self._lock = threading.Lock()
+    def __init__(
+        self, settings: Settings, ledger: Optional[InventoryLedger] = None
+    ):
+        # Re-entrant so batch_update() can wrap the individual updaters
+        self._lock = threading.RLock()
         self._settings = settings
 
         self._bill_device = DeviceStatus()
@@ -32,23 +61,164 @@ class MachineStatus:
         self._sorter = SorterState()
         self._security = SecurityState()
         self._consumables = ConsumablesState()
+        self._payable_index = ChangeFeasibilityIndex(
+            settings.payable_index_ceiling
+        )
+        # Bumped on every dispenser/coin count change
+        self._inventory_version = 0
+        self._payable_range_cache: Dict[Tuple[int, int], PayableRange] = {}
+        self._payable_range_version = 0
+
+        # Bumped by every mutator; the cached snapshot is for this version
+        self._version = 0
+        self._changed_at = datetime.utcnow()
+        self._snapshot: Optional[MachineStateSnapshot] = None
 
         self._on_change: Optional[Callable] = None
+        # batch_update() nesting depth; while > 0, payable-index updates
+        # and change notifications are deferred to the outermost exit
+        self._batch_depth = 0
+        self._deferred_index: Dict[Tuple[str, str], int] = {}
+        self._batch_changed = False
+
+        self._ledger = ledger
+        self._active_transaction_id: Optional[str] = None
+        if ledger is not None:
+            self._restore_counts(ledger.load())
 
     def snapshot(self) -> MachineStateSnapshot:
+        """Current state; the same object is returned until the next change."""
+        # Lock-free fast path: a single attribute read is atomic
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot
         with self._lock:
-            return MachineStateSnapshot(
-                bill_device=self._bill_device.model_copy(),
-                coin_device=self._coin_device.model_copy(),
-                sorter=self._sorter.model_copy(),
-                security=self._security.model_copy(),
-                consumables=self._consumables.model_copy(),
-                timestamp=datetime.utcnow(),
-            )
+            if self._snapshot is None:
+                self._snapshot = MachineStateSnapshot(
+                    bill_device=freeze_model(self._bill_device),
+                    coin_device=freeze_model(self._coin_device),
+                    sorter=freeze_model(self._sorter),
+                    security=freeze_model(self._security),
+                    consumables=freeze_model(self._consumables),
+                    version=self._version,
+                    timestamp=self._changed_at,
+                )
+            return self._snapshot
+
+    @property
+    def version(self) -> int:
+        """Monotonic counter bumped on every state change."""
+        return self._version
 
-    def set_on_change(self, callback: Callable) -> None:
+    def set_on_change(self, callback: Optional[Callable]) -> None:
         self._on_change = callback
 
+    @contextmanager
+    def batch_update(self) -> Iterator["MachineStatus"]:
+        """Apply several updates in one locked section.
+
+        Payable-index updates are folded to one per denomination and the
+        change callback fires once, when the outermost batch exits. Payable
+        queries made from inside the batch see the pre-batch index.
+        """
+        changed = False
+        with self._lock:
+            self._batch_depth += 1
+            try:
+                yield self
+            finally:
+                self._batch_depth -= 1
+                if not self._batch_depth:
+                    for (denom_type, denom), count in self._deferred_index.items():
+                        self._payable_index.set_count(denom_type, denom, count)
+                    self._deferred_index.clear()
+                    changed = self._batch_changed
+                    self._batch_changed = False
+        if changed:
+            self._notify_change()
+
+    @property
+    def inventory_version(self) -> int:
+        """Monotonic counter bumped whenever dispenser or coin counts change."""
+        with self._lock:
+            return self._inventory_version
+
+    def dispense_inventory(self) -> Tuple[int, Dict[str, int], Dict[str, int]]:
+        """Consistent (inventory_version, dispenser counts, coin counts) copy."""
+        with self._lock:
+            return (
+                self._inventory_version,
+                dict(self._consumables.bill_dispenser_counts),
+                dict(self._consumables.coin_counts),
+            )
+
+    # --- Inventory ledger ---
+
+    @property
+    def active_transaction_id(self) -> Optional[str]:
+        return self._active_transaction_id
+
+    def set_active_transaction(self, transaction_id: Optional[str]) -> None:
+        """Tag subsequent ledger records with `transaction_id` (None to clear)."""
+        with self._lock:
+            self._active_transaction_id = transaction_id
+
+    def transaction_inventory_deltas(self, transaction_id: str) -> Dict[str, int]:
+        """Net ledger count changes for one transaction, keyed "counter:denom"."""
+        if self._ledger is None:
+            return {}
+        return {
+            f"{counter}:{denom}": delta
+            for (counter, denom), delta
+            in self._ledger.transaction_deltas(transaction_id).items()
+        }
+
+    def revert_transaction_deltas(
+        self, transaction_id: str, deltas: Dict[str, int]
+    ) -> None:
+        """Undo count changes an interrupted transaction left behind.
+
+        `deltas` is keyed "counter:denom", as from
+        transaction_inventory_deltas(). The reversal is recorded under
+        `transaction_id`, so the transaction's net ledger change drops to 0
+        and a second recovery pass has nothing left to undo.
+        """
+        with self._lock:
+            previous = self._active_transaction_id
+            self._active_transaction_id = transaction_id
+            try:
+                for key, delta in deltas.items():
+                    counter, denom = key.split(":", 1)
+                    field = _LEDGER_COUNTERS.get(counter)
+                    counts = getattr(self._consumables, field) if field else {}
+                    if denom not in counts:
+                        continue
+                    old = counts[denom]
+                    counts[denom] = max(0, old - delta)
+                    self._record(counter, denom, counts[denom] - old, counts[denom])
+                    if counter != "bill_storage":
+                        self._set_index_count(
+                            "coin" if counter == "coin" else "bill",
+                            denom,
+                            counts[denom],
+                        )
+            finally:
+                self._active_transaction_id = previous
+            self._inventory_version += 1
+            self._check_storage_alerts()
+            self._check_dispenser_alerts()
+            self._check_coin_alerts()
+            self._mark_changed()
+        self._notify_change()
+
+    def close(self) -> None:
+        """Checkpoint and close the ledger (application shutdown)."""
+        if self._ledger is None:
+            return
+        with self._lock:
+            self._ledger.checkpoint(self._ledger_counts())
+            self._ledger.close()
+
     # --- Device connection ---
 
     def update_bill_device(
@@ -66,6 +236,7 @@ class MachineStatus:
             if last_error is not None:
                 self._bill_device.last_error = last_error
             self._bill_device.last_ping = datetime.utcnow()
+            self._mark_changed()
         self._notify_change()
 
     def update_coin_device(
@@ -83,6 +254,7 @@ class MachineStatus:
             if last_error is not None:
                 self._coin_device.last_error = last_error
             self._coin_device.last_ping = datetime.utcnow()
+            self._mark_changed()
         self._notify_change()
 
     # --- Sorter state ---
@@ -100,6 +272,7 @@ class MachineStatus:
                 self._sorter.current_position = position
             if slot is not None:
                 self._sorter.current_slot = slot
+            self._mark_changed()
         self._notify_change()
 
     # --- Security state ---
@@ -118,6 +291,7 @@ class MachineStatus:
             if sensor is not None:
                 self._security.last_tamper_sensor = sensor
                 self._security.last_tamper_time = datetime.utcnow()
+            self._mark_changed()
         self._notify_change()
 
     # --- Consumables ---
@@ -133,31 +307,68 @@ class MachineStatus:
 
             if storage_key in self._consumables.bill_storage_counts:
                 self._consumables.bill_storage_counts[storage_key] += count
+                self._record(
+                    "bill_storage",
+                    storage_key,
+                    count,
+                    self._consumables.bill_storage_counts[storage_key],
+                )
                 self._check_storage_alerts()
+            self._mark_changed()
         self._notify_change()
 
     def decrement_bill_dispenser(self, denom: str, count: int = 1) -> None:
         with self._lock:
             if denom in self._consumables.bill_dispenser_counts:
+                old = self._consumables.bill_dispenser_counts[denom]
                 self._consumables.bill_dispenser_counts[denom] = max(
-                    0, self._consumables.bill_dispenser_counts[denom] - count
+                    0, old - count
+                )
+                self._record(
+                    "bill_dispenser",
+                    denom,
+                    self._consumables.bill_dispenser_counts[denom] - old,
+                    self._consumables.bill_dispenser_counts[denom],
+                )
+                self._set_index_count(
+                    "bill", denom, self._consumables.bill_dispenser_counts[denom]
                 )
+                self._inventory_version += 1
                 self._check_dispenser_alerts()
+            self._mark_changed()
         self._notify_change()
 
     def increment_coin(self, denom: str, count: int = 1) -> None:
         with self._lock:
             if denom in self._consumables.coin_counts:
                 self._consumables.coin_counts[denom] += count
+                self._record(
+                    "coin", denom, count, self._consumables.coin_counts[denom]
+                )
+                self._set_index_count(
+                    "coin", denom, self._consumables.coin_counts[denom]
+                )
+                self._inventory_version += 1
+            self._mark_changed()
         self._notify_change()
 
     def decrement_coin(self, denom: str, count: int = 1) -> None:
         with self._lock:
             if denom in self._consumables.coin_counts:
-                self._consumables.coin_counts[denom] = max(
-                    0, self._consumables.coin_counts[denom] - count
+                old = self._consumables.coin_counts[denom]
+                self._consumables.coin_counts[denom] = max(0, old - count)
+                self._record(
+                    "coin",
+                    denom,
+                    self._consumables.coin_counts[denom] - old,
+                    self._consumables.coin_counts[denom],
+                )
+                self._set_index_count(
+                    "coin", denom, self._consumables.coin_counts[denom]
                 )
+                self._inventory_version += 1
                 self._check_coin_alerts()
+            self._mark_changed()
         self._notify_change()
 
     def set_dispenser_counts(self, counts: dict) -> None:
@@ -165,8 +376,13 @@ class MachineStatus:
         with self._lock:
             for denom, count in counts.items():
                 if denom in self._consumables.bill_dispenser_counts:
+                    old = self._consumables.bill_dispenser_counts[denom]
                     self._consumables.bill_dispenser_counts[denom] = count
+                    self._record("bill_dispenser", denom, count - old, count)
+                    self._set_index_count("bill", denom, count)
+            self._inventory_version += 1
             self._check_dispenser_alerts()
+            self._mark_changed()
         self._notify_change()
 
     def set_coin_counts(self, counts: dict) -> None:
@@ -174,10 +390,75 @@ class MachineStatus:
         with self._lock:
             for denom, count in counts.items():
                 if denom in self._consumables.coin_counts:
+                    old = self._consumables.coin_counts[denom]
                     self._consumables.coin_counts[denom] = count
+                    self._record("coin", denom, count - old, count)
+                    self._set_index_count("coin", denom, count)
+            self._inventory_version += 1
             self._check_coin_alerts()
+            self._mark_changed()
         self._notify_change()
 
+    def is_payable(self, amount: int) -> Optional[bool]:
+        """O(1) check whether `amount` can be paid out exactly right now.
+
+        Returns None if `amount` is above the index ceiling
+        (settings.payable_index_ceiling); callers should fall back to the
+        change calculator in that case.
+        """
+        with self._lock:
+            if amount > self._payable_index.ceiling:
+                return None
+            if amount <= 0:
+                return True
+            return self._payable_index.is_payable(amount)
+
+    def get_payable_range(
+        self, step: int = 1, limit: Optional[int] = None
+    ) -> PayableRange:
+        """Maximum payable amount and blocked amounts among multiples of `step`.
+
+        Computed from the feasibility index in one vectorized pass and cached
+        until the inventory version changes. Only amounts up to max_payable
+        are listed as blocked; everything above it is blocked implicitly.
+        Inside batch_update() the index still holds the pre-batch counts
+        while the version has moved on, so such results are not cached.
+
+        Args:
+            step: Amount granularity of the UI (e.g., 20 for PHP 20 tiles).
+            limit: Largest amount of interest; capped at the index ceiling.
+        """
+        step = max(1, step)
+        with self._lock:
+            ceiling = self._payable_index.ceiling
+            limit = ceiling if limit is None else max(0, min(limit, ceiling))
+            if self._payable_range_version != self._inventory_version:
+                self._payable_range_cache.clear()
+                self._payable_range_version = self._inventory_version
+            cached = self._payable_range_cache.get((step, limit))
+            if cached is not None:
+                return cached
+
+            amounts = np.arange(step, limit + 1, step)
+            payable = self._payable_index.payable_mask()[amounts]
+            payable_amounts = amounts[payable]
+            max_payable = int(payable_amounts[-1]) if len(payable_amounts) else 0
+            blocked = amounts[~payable & (amounts < max_payable)]
+
+            result = PayableRange(
+                inventory_version=self._inventory_version,
+                step=step,
+                limit=limit,
+                max_payable=max_payable,
+                blocked_amounts=blocked.tolist(),
+            )
+            if self._batch_depth:
+                return result
+            if len(self._payable_range_cache) >= _PAYABLE_RANGE_CACHE_SIZE:
+                self._payable_range_cache.clear()
+            self._payable_range_cache[(step, limit)] = result
+            return result
+
     def get_alerts(self) -> List[str]:
         with self._lock:
             return list(self._consumables.alerts)
@@ -252,7 +533,56 @@ class MachineStatus:
             a for a in self._consumables.alerts if not a.startswith(prefix)
         ] + [a for a in new_alerts if a.startswith(prefix)]
 
+    def _record(self, counter: str, denom: str, delta: int, count: int) -> None:
+        """Append a count change to the ledger, if any (lock held)."""
+        if self._ledger is None or not delta:
+            return
+        self._ledger.record(
+            counter, denom, delta, count, self._active_transaction_id
+        )
+        if self._ledger.checkpoint_due:
+            self._ledger.request_checkpoint(self._ledger_counts())
+
+    def _ledger_counts(self) -> Counts:
+        return {
+            counter: dict(getattr(self._consumables, field))
+            for counter, field in _LEDGER_COUNTERS.items()
+        }
+
+    def _restore_counts(self, counts: Counts) -> None:
+        """Apply counts loaded from the ledger (from __init__)."""
+        for counter, field in _LEDGER_COUNTERS.items():
+            current = getattr(self._consumables, field)
+            for denom, count in counts.get(counter, {}).items():
+                if denom in current:
+                    current[denom] = count
+        for denom, count in self._consumables.bill_dispenser_counts.items():
+            self._payable_index.set_count("bill", denom, count)
+        for denom, count in self._consumables.coin_counts.items():
+            self._payable_index.set_count("coin", denom, count)
+        self._check_storage_alerts()
+        self._check_dispenser_alerts()
+        self._check_coin_alerts()
+        self._inventory_version += 1
+        self._mark_changed()
+
+    def _mark_changed(self) -> None:
+        """Bump the version and drop the cached snapshot (lock held)."""
+        self._version += 1
+        self._changed_at = datetime.utcnow()
+        self._snapshot = None
+
+    def _set_index_count(self, denom_type: str, denom: str, count: int) -> None:
+        """Update the payable index now, or at the end of the batch (lock held)."""
+        if self._batch_depth:
+            self._deferred_index[(denom_type, denom)] = count
+        else:
+            self._payable_index.set_count(denom_type, denom, count)
+
     def _notify_change(self) -> None:
+        if self._batch_depth:
+            self._batch_changed = True
+            return
         if self._on_change:
             try:
                 self._on_change()
@@ -0,0 +1,138 @@
+"""Streams MachineStatus to WebSocket clients as a snapshot plus deltas.
+
+Clients subscribed to the "state" topic get one STATE_SNAPSHOT
+({"version", "state"}) when they subscribe, then a STATE_PATCH
+({"version", "ops"}) for every later change. `ops` is an RFC 6902 JSON
+Patch (add/remove/replace; lists are replaced whole) taking version - 1 to
+version, so a client applies a patch only if it holds version - 1 and
+otherwise re-subscribes to get a fresh snapshot.
+
+MachineStatus reports changes through its on_change callback, possibly
+from a reader thread; changes are coalesced and diffed once per event loop
+iteration, so a burst of updates yields a single patch. While no client
+subscribes to "state" nothing is diffed or sent; the next snapshot first
+catches up with one patch covering everything since.
+
+send_snapshot() adds the client to the "state" fan-out only after its
+snapshot is queued, so a client never gets a patch before its snapshot.
+"""
+
+import asyncio
+import logging
+from typing import Any, List, Optional
+
+from fastapi import WebSocket
+
+from app.api.ws import ConnectionManager
+from app.models.events import WSEvent, WSEventType
+from app.models.machine import MachineStateSnapshot
+from app.services.machine_status import MachineStatus
+
+logger = logging.getLogger(__name__)
+
+
+def _pointer_token(key: str) -> str:
+    return key.replace("~", "~0").replace("/", "~1")
+
+
+def diff_state(old: Any, new: Any, path: str = "") -> List[dict]:
+    """JSON Patch operations turning `old` into `new`."""
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops: List[dict] = []
+        for key, value in old.items():
+            child = f"{path}/{_pointer_token(key)}"
+            if key not in new:
+                ops.append({"op": "remove", "path": child})
+            else:
+                ops.extend(diff_state(value, new[key], child))
+        for key, value in new.items():
+            if key not in old:
+                ops.append({
+                    "op": "add",
+                    "path": f"{path}/{_pointer_token(key)}",
+                    "value": value,
+                })
+        return ops
+    if old == new and type(old) is type(new):
+        return []
+    return [{"op": "replace", "path": path, "value": new}]
+
+
+class StateSync:
+    def __init__(self, machine_status: MachineStatus, ws_manager: ConnectionManager):
+        self._status = machine_status
+        self._ws = ws_manager
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._flush_pending = False
+        snapshot = machine_status.snapshot()
+        self._status_version = snapshot.version
+        self._state = self._serialize(snapshot)
+        self.version = 0
+        self.patches = 0
+        self.ops = 0
+
+    def start(self) -> None:
+        """Start tracking changes (call from the event loop)."""
+        self._loop = asyncio.get_running_loop()
+        self._status.set_on_change(self._on_change)
+
+    def stop(self) -> None:
+        self._status.set_on_change(None)
+        self._loop = None
+
+    async def send_snapshot(self, websocket: WebSocket) -> None:
+        """Queue the current state for one client, then subscribe it to "state".
+
+        The client is out of the fan-out while the catch-up patch goes to
+        the existing subscribers (a re-subscribing client is taken out
+        first), so its first patch is the one after its snapshot.
+        """
+        self._ws.unsubscribe(websocket, ["state"])
+        await self.flush(catch_up=True)
+        await self._ws.send(websocket, WSEvent(
+            type=WSEventType.STATE_SNAPSHOT,
+            payload={"version": self.version, "state": self._state},
+        ))
+        self._ws.subscribe(websocket, ["state"])
+
+    async def flush(self, catch_up: bool = False) -> None:
+        """Broadcast the changes since the last patch, if anyone listens.
+
+        With `catch_up`, the state is brought up to date even when nobody
+        listens yet (a snapshot is about to be sent).
+        """
+        self._flush_pending = False
+        if not catch_up and not self._ws.has_subscribers("state"):
+            return
+        snapshot = self._status.snapshot()
+        if snapshot.version == self._status_version:
+            return
+        self._status_version = snapshot.version
+        state = self._serialize(snapshot)
+        ops = diff_state(self._state, state)
+        if not ops:
+            return
+        self._state = state
+        self.version += 1
+        self.patches += 1
+        self.ops += len(ops)
+        await self._ws.broadcast(WSEvent(
+            type=WSEventType.STATE_PATCH,
+            payload={"version": self.version, "ops": ops},
+        ))
+
+    @staticmethod
+    def _serialize(snapshot: MachineStateSnapshot) -> dict:
+        return snapshot.model_dump(mode="json", exclude={"timestamp", "version"})
+
+    def _on_change(self) -> None:
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(self._schedule_flush)
+
+    def _schedule_flush(self) -> None:
+        if self._flush_pending or self._loop is None:
+            return
+        self._flush_pending = True
+        self._loop.create_task(self.flush())
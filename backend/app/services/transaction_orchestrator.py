@@ -23,10 +23,17 @@ from app.models.db_models import (
 )
 from app.models.events import WSEvent, WSEventType
 from app.services.bill_acceptor import BillAcceptor
-from app.services.change_calculator import calculate_change
+from app.services.change_plan_cache import ChangePlanCache
 from app.services.dispense_orchestrator import DispenseOrchestrator
+from app.services.dispense_policy import (
+    DEFAULT_DISPENSE_POLICY,
+    get_dispense_policy,
+)
 from app.services.machine_status import MachineStatus
-from app.services.transaction_state_machine import TransactionStateMachine
+from app.services.transaction_state_machine import (
+    COMMIT_MODES,
+    TransactionStateMachine,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -44,15 +51,33 @@ class TransactionOrchestrator:
         machine_status: MachineStatus,
         ws_manager: ConnectionManager,
         db_session_factory: async_sessionmaker,
+        dispense_policy: str = DEFAULT_DISPENSE_POLICY,
+        plan_cache: Optional[ChangePlanCache] = None,
+        commit_mode: str = "two_phase",
     ):
+        # Fail fast on a misconfigured policy name or commit mode
+        get_dispense_policy(dispense_policy)
+        if commit_mode not in COMMIT_MODES:
+            raise ValueError(
+                f"Unknown commit mode: {commit_mode} "
+                f"(expected one of {', '.join(COMMIT_MODES)})"
+            )
+
         self._bill_acceptor = bill_acceptor
         self._dispenser = dispense_orchestrator
         self._status = machine_status
         self._ws = ws_manager
         self._db_factory = db_session_factory
+        self._dispense_policy = dispense_policy
+        self._plan_cache = plan_cache if plan_cache is not None else ChangePlanCache()
+        self._commit_mode = commit_mode
         self._active_tx: Optional[TransactionStateMachine] = None
         self._active_session: Optional[AsyncSession] = None
 
+    @property
+    def plan_cache(self) -> ChangePlanCache:
+        return self._plan_cache
+
     @property
     def has_active_transaction(self) -> bool:
         return self._active_tx is not None
@@ -96,12 +121,7 @@ class TransactionOrchestrator:
         # Pre-check: can we dispense the target amount?
         total_due = target_amount + fee
         try:
-            calculate_change(
-                target_amount,
-                snapshot.consumables.bill_dispenser_counts,
-                snapshot.consumables.coin_counts,
-                preferred_denoms=selected_dispense_denoms,
-            )
+            self._plan_change(target_amount, selected_dispense_denoms)
         except Exception as e:
             raise TransactionError("", f"Cannot dispense requested amount: {e}")
 
@@ -122,12 +142,16 @@ class TransactionOrchestrator:
         session.add(record)
         await session.commit()
 
+        # Ledger records inventory changes against this transaction
+        self._status.set_active_transaction(tx_id)
+
         # Create state machine
         self._active_tx = TransactionStateMachine(
             transaction_id=tx_id,
             transaction_type=transaction_type,
             ws_manager=self._ws,
             db_session=session,
+            commit_mode=self._commit_mode,
         )
 
         # Transition to WAITING_FOR_BILL
@@ -265,12 +289,8 @@ class TransactionOrchestrator:
             raise TransactionError(tx.transaction_id, "Transaction record not found")
 
         # Calculate dispense plan
-        snapshot = self._status.snapshot()
-        plan = calculate_change(
-            db_record.target_amount,
-            snapshot.consumables.bill_dispenser_counts,
-            snapshot.consumables.coin_counts,
-            preferred_denoms=db_record.selected_dispense_denoms,
+        plan = self._plan_change(
+            db_record.target_amount, db_record.selected_dispense_denoms
         )
 
         # Store dispense plan
@@ -409,7 +429,15 @@ class TransactionOrchestrator:
     async def _recover_wal_entry(
         self, session: AsyncSession, entry: WALEntry
     ) -> None:
-        """Recover a single pending WAL entry."""
+        """Recover a single pending WAL entry.
+
+        The transaction's inventory ledger deltas are reconciled with how
+        far it got. Increases are cash taken in and are kept. Decreases are
+        payout reservations: if dispensing may have started they are kept,
+        since the items may be gone; otherwise nothing left the machine and
+        they are reverted. Either way the outcome is noted on the record's
+        error_message for a technician to verify.
+        """
         logger.info(
             f"Recovering WAL entry {entry.id}: "
             f"tx={entry.transaction_id} action={entry.action}"
@@ -424,17 +452,56 @@ class TransactionOrchestrator:
         record = result.scalar_one_or_none()
 
         if record:
+            dispense_started = (
+                record.state == TransactionState.DISPENSING.value
+                or entry.action.startswith(
+                    f"STATE_{TransactionState.DISPENSING.value}_TO_"
+                )
+            )
             # Mark transaction as ERROR with recovery note
             record.state = TransactionState.ERROR.value
             record.error_code = "CRASH_RECOVERY"
             record.error_message = f"Recovered from pending action: {entry.action}"
             record.completed_at = datetime.utcnow()
 
+            deltas = self._status.transaction_inventory_deltas(record.id)
+            reverted = (
+                {}
+                if dispense_started
+                else {key: delta for key, delta in deltas.items() if delta < 0}
+            )
+            kept = {
+                key: delta for key, delta in deltas.items() if key not in reverted
+            }
+            if reverted:
+                self._status.revert_transaction_deltas(record.id, reverted)
+                record.error_message += f"; inventory changes reverted: {reverted}"
+            if kept:
+                record.error_message += f"; inventory changes kept: {kept}"
+            if deltas:
+                logger.warning(
+                    f"Transaction {record.id} interrupted with inventory "
+                    f"changes {deltas} (reverted {reverted or 'none'}); "
+                    f"verify counts at next maintenance"
+                )
+
         # Mark WAL entry as rolled back
         entry.status = WALStatus.ROLLED_BACK.value
 
         logger.info(f"WAL entry {entry.id} recovered (rolled back)")
 
+    def _plan_change(self, amount: int, preferred_denoms: Optional[list]):
+        """Change plan for the current inventory, served from the plan cache."""
+        version, bills, coins = self._status.dispense_inventory()
+        return self._plan_cache.get_plan(
+            amount,
+            bills,
+            coins,
+            version,
+            preferred_denoms=preferred_denoms,
+            policy=self._dispense_policy,
+        )
+
     def _require_active_transaction(self) -> TransactionStateMachine:
         """Get the active transaction or raise an error."""
         if self._active_tx is None:
@@ -458,3 +525,4 @@ class TransactionOrchestrator:
             await self._active_session.close()
             self._active_session = None
         self._active_tx = None
+        self._status.set_active_transaction(None)
@@ -2,6 +2,19 @@
 
 Manages the lifecycle of a money changer transaction through defined
 states with validation, timeout handling, and WebSocket event emission.
+
+Each transition is persisted in one of two commit modes:
+- two_phase: write a PENDING WAL entry, re-select and update the
+  TransactionRecord, commit, then mark the entry COMPLETED and commit
+  again (two commits, i.e. two fsyncs, and a query per transition).
+- group: add the WAL entry (already COMPLETED) and the update to the
+  TransactionRecord loaded once per state machine, and commit both
+  together. One atomic commit, so a crash leaves either both or neither.
+  Since transitions then never leave a PENDING entry behind, the first
+  transition out of IDLE also writes a PENDING TRANSACTION_CREATED marker,
+  which the transition into a terminal state (or back to IDLE) completes.
+  A transaction cut off by a crash at any point keeps its marker PENDING
+  and is recovered on startup, like a transition cut off in two_phase.
 """
 
 import asyncio
@@ -66,6 +79,16 @@ CANCELLABLE_STATES: Set[TransactionState] = {
     TransactionState.WAITING_FOR_CONFIRMATION,
 }
 
+COMMIT_MODES = ("two_phase", "group")
+
+# States that close a group-mode transaction's PENDING marker
+_SETTLED_STATES = frozenset({
+    TransactionState.IDLE,
+    TransactionState.COMPLETE,
+    TransactionState.CANCELLED,
+    TransactionState.ERROR,
+})
+
 # Timeout per state in seconds (None = no timeout)
 STATE_TIMEOUTS: Dict[TransactionState, Optional[float]] = {
     TransactionState.WAITING_FOR_BILL: 60.0,
@@ -85,7 +108,13 @@ class TransactionStateMachine:
         transaction_type: str,
         ws_manager: ConnectionManager,
         db_session: AsyncSession,
+        commit_mode: str = "two_phase",
     ):
+        if commit_mode not in COMMIT_MODES:
+            raise ValueError(
+                f"Unknown commit mode: {commit_mode} "
+                f"(expected one of {', '.join(COMMIT_MODES)})"
+            )
         self._id = transaction_id
         self._type = transaction_type
         self._state = TransactionState.IDLE
@@ -93,6 +122,11 @@ class TransactionStateMachine:
         self._db = db_session
         self._timeout_task: Optional[asyncio.Task] = None
         self._data: dict = {}
+        self._commit_mode = commit_mode
+        # Loaded on the first group-mode transition, then reused
+        self._record: Optional[TransactionRecord] = None
+        # Group mode: PENDING while the transaction is in progress
+        self._marker: Optional[WALEntry] = None
 
     @property
     def state(self) -> TransactionState:
@@ -127,59 +161,16 @@ class TransactionStateMachine:
         # Cancel existing timeout
         self._cancel_timeout()
 
-        # Write WAL entry before transition
-        wal_entry = WALEntry(
-            transaction_id=self._id,
-            action=f"STATE_{old_state.value}_TO_{new_state.value}",
-            data=data or {},
-            status=WALStatus.PENDING.value,
-        )
-        self._db.add(wal_entry)
-        await self._db.flush()
+        if self._commit_mode == "group":
+            await self._persist_group(old_state, new_state, data)
+        else:
+            await self._persist_two_phase(old_state, new_state, data)
 
         # Update state
         self._state = new_state
         if data:
             self._data.update(data)
 
-        # Update DB record
-        result = await self._db.execute(
-            select(TransactionRecord).where(
-                TransactionRecord.id == self._id
-            )
-        )
-        record = result.scalar_one_or_none()
-        if record:
-            record.state = new_state.value
-            record.updated_at = datetime.utcnow()
-            if data:
-                if "inserted_amount" in data:
-                    record.inserted_amount = data["inserted_amount"]
-                if "dispensed_amount" in data:
-                    record.dispensed_amount = data["dispensed_amount"]
-                if "inserted_denominations" in data:
-                    record.inserted_denominations = data["inserted_denominations"]
-                if "dispense_plan" in data:
-                    record.dispense_plan = data["dispense_plan"]
-                if "dispense_result" in data:
-                    record.dispense_result = data["dispense_result"]
-                if "error_code" in data:
-                    record.error_code = data["error_code"]
-                if "error_message" in data:
-                    record.error_message = data["error_message"]
-            if new_state in (
-                TransactionState.COMPLETE,
-                TransactionState.CANCELLED,
-                TransactionState.ERROR,
-            ):
-                record.completed_at = datetime.utcnow()
-
-        await self._db.commit()
-
-        # Mark WAL entry as completed
-        wal_entry.status = WALStatus.COMPLETED.value
-        await self._db.commit()
-
         # Start timeout for new state if applicable
         timeout = STATE_TIMEOUTS.get(new_state)
         if timeout is not None:
@@ -203,6 +194,113 @@ class TransactionStateMachine:
             f"Transaction {self._id}: {old_state.value} -> {new_state.value}"
         )
 
+    async def _persist_two_phase(
+        self,
+        old_state: TransactionState,
+        new_state: TransactionState,
+        data: Optional[dict],
+    ) -> None:
+        # Write WAL entry before transition
+        wal_entry = WALEntry(
+            transaction_id=self._id,
+            action=f"STATE_{old_state.value}_TO_{new_state.value}",
+            data=data or {},
+            status=WALStatus.PENDING.value,
+        )
+        self._db.add(wal_entry)
+        await self._db.flush()
+
+        # Update DB record
+        result = await self._db.execute(
+            select(TransactionRecord).where(
+                TransactionRecord.id == self._id
+            )
+        )
+        record = result.scalar_one_or_none()
+        if record:
+            self._apply_to_record(record, new_state, data)
+
+        await self._db.commit()
+
+        # Mark WAL entry as completed
+        wal_entry.status = WALStatus.COMPLETED.value
+        await self._db.commit()
+
+    async def _persist_group(
+        self,
+        old_state: TransactionState,
+        new_state: TransactionState,
+        data: Optional[dict],
+    ) -> None:
+        self._db.add(WALEntry(
+            transaction_id=self._id,
+            action=f"STATE_{old_state.value}_TO_{new_state.value}",
+            data=data or {},
+            status=WALStatus.COMPLETED.value,
+        ))
+        opened = closed = False
+        if self._marker is None and new_state not in _SETTLED_STATES:
+            self._marker = WALEntry(
+                transaction_id=self._id,
+                action=WALAction.TRANSACTION_CREATED.value,
+                data={},
+                status=WALStatus.PENDING.value,
+            )
+            self._db.add(self._marker)
+            opened = True
+        elif self._marker is not None and new_state in _SETTLED_STATES:
+            self._marker.status = WALStatus.COMPLETED.value
+            closed = True
+        if self._record is None:
+            # Identity-map hit if the orchestrator created it in this session
+            self._record = await self._db.get(TransactionRecord, self._id)
+        if self._record:
+            self._apply_to_record(self._record, new_state, data)
+        try:
+            await self._db.commit()
+        except Exception:
+            await self._db.rollback()
+            # Rollback expires the cached record; reload it next time
+            self._record = None
+            if opened:
+                # Discarded with the rollback; added again on the retry
+                self._marker = None
+            elif closed:
+                self._marker.status = WALStatus.PENDING.value
+            raise
+        if closed:
+            self._marker = None
+
+    @staticmethod
+    def _apply_to_record(
+        record: TransactionRecord,
+        new_state: TransactionState,
+        data: Optional[dict],
+    ) -> None:
+        record.state = new_state.value
+        record.updated_at = datetime.utcnow()
+        if data:
+            if "inserted_amount" in data:
+                record.inserted_amount = data["inserted_amount"]
+            if "dispensed_amount" in data:
+                record.dispensed_amount = data["dispensed_amount"]
+            if "inserted_denominations" in data:
+                record.inserted_denominations = data["inserted_denominations"]
+            if "dispense_plan" in data:
+                record.dispense_plan = data["dispense_plan"]
+            if "dispense_result" in data:
+                record.dispense_result = data["dispense_result"]
+            if "error_code" in data:
+                record.error_code = data["error_code"]
+            if "error_message" in data:
+                record.error_message = data["error_message"]
+        if new_state in (
+            TransactionState.COMPLETE,
+            TransactionState.CANCELLED,
+            TransactionState.ERROR,
+        ):
+            record.completed_at = datetime.utcnow()
+
     async def cancel(self) -> None:
         """Cancel the transaction from any cancellable state."""
         if self._state in CANCELLABLE_STATES:
@@ -0,0 +1,159 @@
+"""Background compaction of the wal_entries table.
+
+Every state transition adds a WAL entry, so without compaction the table
+grows forever. Entries are only needed for crash recovery and, for a while,
+as an audit trail; once a transaction has ended (COMPLETE, CANCELLED or
+ERROR) more than `retention_days` ago, its COMPLETED entries are deleted.
+PENDING and ROLLED_BACK entries are never touched: the first are work for
+recover_pending_transactions(), the second are evidence of a crash.
+
+With `archive_path` set, deleted entries are first appended to that file
+as JSON lines, off the event loop. An entry archived whose delete then
+fails is not archived again by later passes; only a restart in between
+can write it twice, so readers should treat `id` as unique. Each pass
+deletes in batches of `batch_size`, committing between batches so it never
+holds the write lock for long.
+
+Compaction deletes operator data, so it is off unless an interval is set.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import List, Optional, Set
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.models.db_models import (
+    TransactionRecord,
+    TransactionState,
+    WALEntry,
+    WALStatus,
+)
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATES = (
+    TransactionState.COMPLETE.value,
+    TransactionState.CANCELLED.value,
+    TransactionState.ERROR.value,
+)
+
+
+class WALCompactor:
+    def __init__(
+        self,
+        db_session_factory: async_sessionmaker,
+        retention_days: float = 30.0,
+        interval: float = 0.0,
+        batch_size: int = 500,
+        archive_path: str = "",
+    ):
+        self._db_factory = db_session_factory
+        self._retention = timedelta(days=retention_days)
+        self._interval = interval
+        self._batch_size = max(1, batch_size)
+        self._archive_path = archive_path
+        self._task: Optional[asyncio.Task] = None
+        # Archived, but not yet known to be deleted
+        self._archived: Set[int] = set()
+        self.passes = 0
+        self.compacted = 0
+
+    async def start(self) -> None:
+        """Compact now and then every `interval` seconds (0: never)."""
+        if self._interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def compact(self, now: Optional[datetime] = None) -> int:
+        """Delete (and archive) expired entries; returns how many."""
+        cutoff = (now or datetime.utcnow()) - self._retention
+        expired_transactions = select(TransactionRecord.id).where(
+            TransactionRecord.state.in_(TERMINAL_STATES),
+            TransactionRecord.completed_at < cutoff,
+        )
+        total = 0
+        async with self._db_factory() as session:
+            while True:
+                result = await session.execute(
+                    select(WALEntry)
+                    .where(
+                        WALEntry.status == WALStatus.COMPLETED.value,
+                        WALEntry.transaction_id.in_(expired_transactions),
+                    )
+                    .order_by(WALEntry.id)
+                    .limit(self._batch_size)
+                )
+                entries = result.scalars().all()
+                if not entries:
+                    break
+                ids = [entry.id for entry in entries]
+                if self._archive_path:
+                    rows = [
+                        self._archive_row(entry)
+                        for entry in entries
+                        if entry.id not in self._archived
+                    ]
+                    if rows:
+                        await asyncio.get_running_loop().run_in_executor(
+                            None, self._append_archive, rows
+                        )
+                        self._archived.update(row["id"] for row in rows)
+                await session.execute(delete(WALEntry).where(WALEntry.id.in_(ids)))
+                await session.commit()
+                self._archived.difference_update(ids)
+                session.expunge_all()
+                total += len(entries)
+                if len(entries) < self._batch_size:
+                    break
+
+        self.passes += 1
+        self.compacted += total
+        if total:
+            logger.info(
+                f"Compacted {total} WAL entries of transactions ended before "
+                f"{cutoff.isoformat(timespec='seconds')}"
+            )
+        return total
+
+    @staticmethod
+    def _archive_row(entry: WALEntry) -> dict:
+        return {
+            "id": entry.id,
+            "transaction_id": entry.transaction_id,
+            "action": entry.action,
+            "data": entry.data,
+            "status": entry.status,
+            "created_at": entry.created_at.isoformat(),
+        }
+
+    def _append_archive(self, rows: List[dict]) -> None:
+        """Append and fsync archive rows (runs in an executor thread)."""
+        directory = os.path.dirname(self._archive_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self._archive_path, "a", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(row, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.compact()
+            except Exception:
+                logger.exception("WAL compaction failed")
+            await asyncio.sleep(self._interval)
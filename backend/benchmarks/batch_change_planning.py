@@ -0,0 +1,65 @@
+"""Compare batch change planning with a calculate_change loop.
+
+Plans change for a batch of random amounts against a full refill, once
+with plan_change_batch() and once by calling calculate_change() per amount,
+and reports the best wall time of each.
+
+Usage (from backend/):
+    python -m benchmarks.batch_change_planning [--amounts 500] [--repeat 5]
+"""
+
+import argparse
+import random
+import time
+
+from app.core.errors import InsufficientInventoryError
+from app.services.batch_change_planner import inventory_vector, plan_change_batch
+from app.services.change_calculator import calculate_change
+from benchmarks.simulate_dispense_policies import REFILL_BILLS, REFILL_COINS
+
+
+def _loop(amounts):
+    feasible = []
+    for amount in amounts:
+        try:
+            calculate_change(amount, REFILL_BILLS, REFILL_COINS)
+            feasible.append(True)
+        except InsufficientInventoryError:
+            feasible.append(False)
+    return feasible
+
+
+def _batch(amounts):
+    inventory = inventory_vector(REFILL_BILLS, REFILL_COINS)
+    return plan_change_batch(amounts, inventory).feasible.tolist()
+
+
+def _best_ms(fn, amounts, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(amounts)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--amounts", type=int, default=500)
+    parser.add_argument("--max-amount", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    amounts = [rng.randint(1, args.max_amount) for _ in range(args.amounts)]
+    assert _loop(amounts) == _batch(amounts)
+
+    loop_ms = _best_ms(_loop, amounts, args.repeat)
+    batch_ms = _best_ms(_batch, amounts, args.repeat)
+    print(f"{args.amounts} amounts up to {args.max_amount}")
+    print(f"calculate_change loop: {loop_ms:8.2f} ms")
+    print(f"plan_change_batch:     {batch_ms:8.2f} ms  ({loop_ms / batch_ms:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Compare per-event and batch-draining EventDispatcher modes.
+
+Feeds a synthetic coin/tamper stream (90% COIN_IN, 10% TAMPER) from a
+producer thread through call_soon_threadsafe, like the serial readers do,
+into an EventDispatcher broadcasting to fake WebSocket clients. Reports,
+per mode:
+- stream: events/s handled, WebSocket messages sent and process CPU while
+  the stream runs at --rate events/s;
+- drain: events/s when --backlog events are already queued (saturation).
+
+Usage (from backend/):
+    python -m benchmarks.event_dispatch_batching [--rate 1000] [--seconds 3]
+"""
+
+import argparse
+import asyncio
+import threading
+import time
+
+from app.api.ws import ConnectionManager
+from app.core.config import Settings
+from app.services.event_dispatcher import EventDispatcher
+from app.services.machine_status import MachineStatus
+
+
+class _FakeSocket:
+    def __init__(self):
+        self.messages = 0
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message: str):
+        self.messages += 1
+        await asyncio.sleep(0)
+
+
+def _event(i: int) -> dict:
+    if i % 10 == 9:
+        return {"event": "TAMPER", "sensor": "A", "_controller": "COIN_SECURITY"}
+    return {
+        "event": "COIN_IN", "denom": 5, "total": 5 * i,
+        "_controller": "COIN_SECURITY",
+    }
+
+
+async def _setup(batch_size: int, clients: int):
+    queue: asyncio.Queue = asyncio.Queue()
+    ws = ConnectionManager()
+    sockets = [_FakeSocket() for _ in range(clients)]
+    for socket in sockets:
+        await ws.connect(socket)
+    dispatcher = EventDispatcher(
+        queue, MachineStatus(Settings()), ws, batch_size=batch_size
+    )
+    return queue, dispatcher, sockets
+
+
+async def _stream(batch_size: int, rate: int, seconds: float, clients: int):
+    queue, dispatcher, sockets = await _setup(batch_size, clients)
+    loop = asyncio.get_running_loop()
+    total = int(rate * seconds)
+
+    def produce():
+        start = time.perf_counter()
+        for i in range(total):
+            # Sleep until this event's slot in the schedule
+            delay = start + i / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            loop.call_soon_threadsafe(queue.put_nowait, _event(i))
+
+    await dispatcher.start()
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+    producer = threading.Thread(target=produce)
+    producer.start()
+    while dispatcher.events_handled < total:
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    cpu = (time.process_time() - cpu_start) / elapsed * 100
+    producer.join()
+    await dispatcher.stop()
+    return total / elapsed, sockets[0].messages, cpu
+
+
+async def _drain(batch_size: int, backlog: int, clients: int) -> float:
+    queue, dispatcher, _sockets = await _setup(batch_size, clients)
+    for i in range(backlog):
+        queue.put_nowait(_event(i))
+    start = time.perf_counter()
+    await dispatcher.start()
+    while dispatcher.events_handled < backlog:
+        await asyncio.sleep(0.001)
+    elapsed = time.perf_counter() - start
+    await dispatcher.stop()
+    return backlog / elapsed
+
+
+async def _main(rate: int, seconds: float, backlog: int, clients: int) -> None:
+    print(
+        f"{'mode':<12}{'stream ev/s':>12}{'WS msgs':>9}{'CPU %':>8}"
+        f"{'drain ev/s':>12}"
+    )
+    for name, batch_size in (("per-event", 1), ("batch", 256)):
+        handled, messages, cpu = await _stream(batch_size, rate, seconds, clients)
+        drained = await _drain(batch_size, backlog, clients)
+        print(
+            f"{name:<12}{handled:>12.0f}{messages:>9}{cpu:>8.1f}"
+            f"{drained:>12.0f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=int, default=1000)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--backlog", type=int, default=20000)
+    parser.add_argument("--clients", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(_main(args.rate, args.seconds, args.backlog, args.clients))
+
+
+if __name__ == "__main__":
+    main()
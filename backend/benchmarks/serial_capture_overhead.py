@@ -0,0 +1,73 @@
+"""Measure serial capture overhead and replay throughput.
+
+Runs PING round trips over a MockSerial-backed SerialConnection without and
+with a SerialRecorder attached, then replays the recorded session through a
+ReplaySerial at speed 0 (no recorded delays).
+
+Usage (from backend/):
+    python -m benchmarks.serial_capture_overhead [--pings 2000]
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from typing import Optional
+
+from app.core.constants import ControllerType
+from app.drivers.serial_manager import SerialConnection
+from app.drivers.serial_recorder import SerialRecorder
+
+
+async def _run(
+    pings: int,
+    recorder: Optional[SerialRecorder] = None,
+    replay_dir: str = "",
+):
+    conn = SerialConnection(
+        port="MOCK_BILL",
+        baud_rate=115200,
+        controller_type=ControllerType.BILL,
+        event_queue=asyncio.Queue(),
+        use_mock=True,
+        recorder=recorder,
+        replay_dir=replay_dir,
+        replay_speed=0.0,
+    )
+    await conn.connect()
+    try:
+        latencies = []
+        for _ in range(pings):
+            start = time.perf_counter()
+            await conn.send_command({"cmd": "PING"})
+            latencies.append((time.perf_counter() - start) * 1000)
+    finally:
+        await conn.disconnect()
+    return statistics.median(latencies), pings / (sum(latencies) / 1000)
+
+
+async def _main(pings: int) -> None:
+    with tempfile.TemporaryDirectory() as capture_dir:
+        recorder = SerialRecorder(capture_dir, ControllerType.BILL.value)
+        runs = [
+            ("mock", await _run(pings)),
+            ("mock+record", await _run(pings, recorder=recorder)),
+            ("replay", await _run(pings, replay_dir=capture_dir)),
+        ]
+        print(f"recorded {recorder.records} chunks, {recorder.bytes_recorded} bytes")
+
+    print(f"{'run':<13}{'median ms':>11}{'cmds/s':>10}")
+    for name, (median, rate) in runs:
+        print(f"{name:<13}{median:>11.3f}{rate:>10.0f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pings", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(_main(args.pings))
+
+
+if __name__ == "__main__":
+    main()
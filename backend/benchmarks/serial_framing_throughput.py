@@ -0,0 +1,83 @@
+"""Compare JSON-lines and MessagePack framing: event throughput and size.
+
+Pushes a burst of COIN_IN events through a MockSerial-backed
+SerialConnection for each framing and reports events/second delivered to
+the event queue plus bytes per event on the wire. At 115200 baud the link
+carries ~11520 bytes/s, so the wire-limited rate is shown as well.
+
+Usage (from backend/):
+    python -m benchmarks.serial_framing_throughput [--events 20000]
+"""
+
+import argparse
+import asyncio
+import json
+import threading
+import time
+
+from app.core.constants import ControllerType
+from app.drivers.serial_framing import encode_frame
+from app.drivers.serial_manager import FRAMINGS, SerialConnection
+
+_EVENT = {"event": "COIN_IN", "denom": 10, "total": 1250}
+_LINK_BYTES_PER_SECOND = 115200 / 10  # 8N1
+
+
+async def _measure(framing: str, events: int, reader_mode: str) -> float:
+    queue: asyncio.Queue = asyncio.Queue()
+    conn = SerialConnection(
+        port="MOCK_COIN",
+        baud_rate=115200,
+        controller_type=ControllerType.COIN_SECURITY,
+        event_queue=queue,
+        use_mock=True,
+        reader_mode=reader_mode,
+        framing=framing,
+    )
+    await conn.connect()
+    assert conn.framing == framing, f"{framing} framing not negotiated"
+    try:
+        mock = conn.mock_serial
+        start = time.perf_counter()
+        producer = threading.Thread(
+            target=lambda: [mock.inject_event(dict(_EVENT)) for _ in range(events)]
+        )
+        producer.start()
+        for _ in range(events):
+            await queue.get()
+        elapsed = time.perf_counter() - start
+        producer.join()
+    finally:
+        await conn.disconnect()
+    return events / elapsed
+
+
+async def _main(events: int, reader_mode: str) -> None:
+    sizes = {
+        "json": len((json.dumps(_EVENT) + "\n").encode()),
+        "msgpack": len(encode_frame(_EVENT)),
+    }
+    print(
+        f"{'framing':<10}{'events/s':>12}{'bytes/event':>13}"
+        f"{'wire-limited/s':>16}"
+    )
+    for framing in FRAMINGS:
+        rate = await _measure(framing, events, reader_mode)
+        print(
+            f"{framing:<10}{rate:>12.0f}{sizes[framing]:>13}"
+            f"{_LINK_BYTES_PER_SECOND / sizes[framing]:>16.0f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=20_000)
+    parser.add_argument(
+        "--reader-mode", default="blocking", choices=["blocking", "asyncio"]
+    )
+    args = parser.parse_args()
+    asyncio.run(_main(args.events, args.reader_mode))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Compare serial reader modes: round-trip latency and idle CPU.
+
+Opens a MockSerial-backed SerialConnection in each reader mode, measures
+PING round-trip latency, then the process CPU time burned while the port
+sits idle (no traffic).
+
+Usage (from backend/):
+    python -m benchmarks.serial_reader_modes [--pings 500] [--idle 2.0]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.core.constants import ControllerType
+from app.drivers.serial_manager import READER_MODES, SerialConnection
+
+
+async def _measure(mode: str, pings: int, idle: float):
+    conn = SerialConnection(
+        port="MOCK_BILL",
+        baud_rate=115200,
+        controller_type=ControllerType.BILL,
+        event_queue=asyncio.Queue(),
+        use_mock=True,
+        reader_mode=mode,
+    )
+    await conn.connect()
+    try:
+        latencies = []
+        for _ in range(pings):
+            start = time.perf_counter()
+            await conn.send_command({"cmd": "PING"})
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        cpu_start = time.process_time()
+        await asyncio.sleep(idle)
+        idle_cpu = (time.process_time() - cpu_start) / idle * 100
+    finally:
+        await conn.disconnect()
+
+    latencies.sort()
+    return (
+        statistics.median(latencies),
+        latencies[int(len(latencies) * 0.95) - 1],
+        idle_cpu,
+    )
+
+
+async def _main(pings: int, idle: float) -> None:
+    print(f"{'mode':<10}{'median ms':>11}{'p95 ms':>9}{'idle CPU %':>12}")
+    for mode in READER_MODES:
+        median, p95, idle_cpu = await _measure(mode, pings, idle)
+        print(f"{mode:<10}{median:>11.3f}{p95:>9.3f}{idle_cpu:>12.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pings", type=int, default=500)
+    parser.add_argument("--idle", type=float, default=2.0)
+    args = parser.parse_args()
+    asyncio.run(_main(args.pings, args.idle))
+
+
+if __name__ == "__main__":
+    main()
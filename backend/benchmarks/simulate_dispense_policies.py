@@ -0,0 +1,94 @@
+"""Replay a transaction mix against each dispense policy.
+
+Starts from a full refill, dispenses change for a seeded random stream of
+transactions and reports, per policy, how many transactions complete
+before the first cassette/hopper runs empty (first EMPTY_BILL/EMPTY_COIN
+alert) and before the first transaction that cannot be paid
+(InsufficientInventoryError).
+
+Usage (from backend/):
+    python -m benchmarks.simulate_dispense_policies [--seeds 20]
+"""
+
+import argparse
+import random
+import statistics
+from typing import Dict, List, Optional, Tuple
+
+from app.core.errors import InsufficientInventoryError
+from app.services.change_calculator import calculate_change
+from app.services.dispense_policy import available_dispense_policies
+
+REFILL_BILLS: Dict[str, int] = {
+    "PHP_1000": 50, "PHP_500": 50, "PHP_200": 50,
+    "PHP_100": 100, "PHP_50": 100, "PHP_20": 100,
+}
+REFILL_COINS: Dict[str, int] = {
+    "PHP_20": 100, "PHP_10": 100, "PHP_5": 100, "PHP_1": 100,
+}
+
+# (weight, amount or (low, high, step) range, preferred denominations)
+TRANSACTION_MIX: List[Tuple[int, object, Optional[List[int]]]] = [
+    (10, 1000, [100]),           # break a 1000 into 100s
+    (5, 500, [50]),
+    (10, (20, 200, 1), [5, 1]),  # bill to coin
+    (40, (100, 5000, 10), None),
+    (20, (20, 1000, 20), None),
+]
+
+
+def _draw(rng: random.Random) -> Tuple[int, Optional[List[int]]]:
+    weights = [w for w, _, _ in TRANSACTION_MIX]
+    _, amount, preferred = rng.choices(TRANSACTION_MIX, weights=weights)[0]
+    if isinstance(amount, tuple):
+        low, high, step = amount
+        amount = rng.randrange(low, high + 1, step)
+    return amount, preferred
+
+
+def simulate(policy: str, seed: int, limit: int = 10_000) -> Tuple[int, int]:
+    """Returns (transactions until first empty denomination,
+    transactions until first failure)."""
+    rng = random.Random(seed)
+    bills = dict(REFILL_BILLS)
+    coins = dict(REFILL_COINS)
+    first_empty = None
+    for completed in range(limit):
+        amount, preferred = _draw(rng)
+        try:
+            plan = calculate_change(
+                amount, bills, coins, preferred_denoms=preferred, policy=policy
+            )
+        except InsufficientInventoryError:
+            return (completed if first_empty is None else first_empty), completed
+        for item in plan.items:
+            stock = bills if item.denom_type == "bill" else coins
+            stock[item.denom] -= item.count
+        if first_empty is None and (
+            0 in bills.values() or 0 in coins.values()
+        ):
+            first_empty = completed + 1
+    return (limit if first_empty is None else first_empty), limit
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seeds", type=int, default=20)
+    args = parser.parse_args()
+
+    print(
+        f"{'policy':<16}{'first empty':>12}{'min':>6}"
+        f"{'first failure':>15}{'min':>6}"
+    )
+    for policy in available_dispense_policies():
+        runs = [simulate(policy, seed) for seed in range(args.seeds)]
+        empties = [empty for empty, _ in runs]
+        failures = [failure for _, failure in runs]
+        print(
+            f"{policy:<16}{statistics.mean(empties):>12.1f}{min(empties):>6}"
+            f"{statistics.mean(failures):>15.1f}{min(failures):>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Commit latency of each SQLite storage profile.
+
+Commits WAL entries one at a time (as the transaction state machine does)
+to a file-backed database per profile, in a temporary directory or the one
+given with --dir (use a directory on the SD card to measure the real
+device), and reports per-commit latency next to what each profile
+guarantees on power loss.
+
+Usage (from backend/):
+    python -m benchmarks.sqlite_write_latency [--commits 500] [--dir PATH]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from typing import List
+
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from app.core.database import SQLITE_PROFILES, apply_sqlite_pragmas, sqlite_pragmas
+from app.models.db_models import Base, WALEntry
+
+DURABILITY = {
+    "default": "no loss (rollback journal)",
+    "durable": "no loss",
+    "balanced": "may lose last commits",
+    "fast": "may corrupt",
+}
+
+
+async def _run(profile: str, commits: int, directory: str) -> List[float]:
+    path = os.path.join(directory, f"bench-{profile}.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    apply_sqlite_pragmas(engine, sqlite_pragmas(profile))
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    latencies: List[float] = []
+    async with factory() as session:
+        for i in range(commits):
+            session.add(WALEntry(
+                transaction_id="bench-tx",
+                action="STATE_WAITING_FOR_BILL_TO_AUTHENTICATING",
+                data={"inserted_amount": i},
+                status="COMPLETED",
+            ))
+            start = time.perf_counter()
+            await session.commit()
+            latencies.append(time.perf_counter() - start)
+    await engine.dispose()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    return latencies
+
+
+async def _main(commits: int, directory: str) -> None:
+    print(
+        f"{'profile':<10}{'commits/s':>11}{'p50 ms':>9}{'p99 ms':>9}"
+        f"{'max ms':>9}  power loss"
+    )
+    for profile in SQLITE_PROFILES:
+        latencies = await _run(profile, commits, directory)
+        ordered = sorted(latencies)
+        p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+        print(
+            f"{profile:<10}{commits / sum(latencies):>11.0f}"
+            f"{statistics.median(latencies) * 1000:>9.3f}{p99 * 1000:>9.3f}"
+            f"{ordered[-1] * 1000:>9.3f}  {DURABILITY[profile]}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--commits", type=int, default=500)
+    parser.add_argument("--dir", default=None)
+    args = parser.parse_args()
+    if args.dir:
+        asyncio.run(_main(args.commits, args.dir))
+    else:
+        with tempfile.TemporaryDirectory() as directory:
+            asyncio.run(_main(args.commits, directory))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Bytes on the wire: full MachineStatus snapshots vs StateSync patches.
+
+Applies a synthetic mix of MachineStatus changes (coin insertions, sorter
+moves, door lock toggles, device pings) one loop iteration apart, so each
+change produces one STATE_PATCH, and compares the serialized size of those
+messages with sending a full STATE_SNAPSHOT after every change.
+
+Usage (from backend/):
+    python -m benchmarks.state_sync_bytes [--changes 2000]
+"""
+
+import argparse
+import asyncio
+import json
+
+from app.api.ws import ConnectionManager
+from app.core.config import Settings
+from app.models.events import WSEvent, WSEventType
+from app.services.machine_status import MachineStatus
+from app.services.state_sync import StateSync
+
+
+class _FakeSocket:
+    def __init__(self):
+        self.bytes = 0
+        self.messages = 0
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message: str):
+        self.bytes += len(message.encode())
+        self.messages += 1
+
+
+def _change(status: MachineStatus, i: int) -> None:
+    kind = i % 10
+    if kind < 6:
+        status.increment_coin(("PHP_1", "PHP_5", "PHP_10", "PHP_20")[i % 4])
+    elif kind < 8:
+        status.update_sorter(position=i % 400, slot=i % 8)
+    elif kind == 8:
+        status.update_security(locked=bool(i // 10 % 2))
+    else:
+        status.update_coin_device(connection="connected")
+
+
+async def _main(changes: int) -> None:
+    status = MachineStatus(Settings())
+    manager = ConnectionManager(send_queue_size=changes + 1)
+    sync = StateSync(status, manager)
+    sync.start()
+    socket = _FakeSocket()
+    await manager.connect(socket, frozenset({"state"}))
+
+    snapshot_bytes = 0
+    for i in range(changes):
+        _change(status, i)
+        await sync.flush()
+        snapshot_bytes += len(WSEvent(
+            type=WSEventType.STATE_SNAPSHOT,
+            payload={"version": sync.version, "state": json.loads(
+                status.snapshot().model_dump_json(exclude={"timestamp", "version"})
+            )},
+        ).model_dump_json().encode())
+    while socket.messages < sync.patches:
+        await asyncio.sleep(0)
+    sync.stop()
+    await manager.shutdown()
+
+    print(f"{'mode':<12}{'messages':>10}{'bytes':>12}{'bytes/msg':>11}")
+    print(
+        f"{'snapshots':<12}{changes:>10}{snapshot_bytes:>12}"
+        f"{snapshot_bytes / changes:>11.0f}"
+    )
+    print(
+        f"{'patches':<12}{socket.messages:>10}{socket.bytes:>12}"
+        f"{socket.bytes / max(1, socket.messages):>11.0f}"
+    )
+    print(f"patch ops/message: {sync.ops / max(1, sync.patches):.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--changes", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(_main(args.changes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""State machine transitions/second: two_phase vs group commit.
+
+Drives a TransactionStateMachine back and forth between WAITING_FOR_BILL
+and AUTHENTICATING (a bill being validated and returned) against a
+file-backed SQLite database, so each commit is a real journal write and
+fsync, once per commit mode.
+
+Usage (from backend/):
+    python -m benchmarks.transaction_commit_modes [--transitions 500]
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from unittest.mock import AsyncMock
+
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from app.models.db_models import Base, TransactionRecord, TransactionState
+from app.services.transaction_state_machine import (
+    COMMIT_MODES,
+    TransactionStateMachine,
+)
+
+
+async def _run(mode: str, transitions: int, directory: str) -> float:
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{os.path.join(directory, f'{mode}.db')}"
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with factory() as session:
+        session.add(TransactionRecord(id="bench-tx", type="bill-to-bill", state="IDLE"))
+        await session.commit()
+        machine = TransactionStateMachine(
+            transaction_id="bench-tx",
+            transaction_type="bill-to-bill",
+            ws_manager=AsyncMock(),
+            db_session=session,
+            commit_mode=mode,
+        )
+        await machine.transition_to(TransactionState.WAITING_FOR_BILL)
+
+        start = time.perf_counter()
+        for i in range(transitions):
+            if machine.state == TransactionState.WAITING_FOR_BILL:
+                await machine.transition_to(
+                    TransactionState.AUTHENTICATING, {"inserted_amount": i}
+                )
+            else:
+                await machine.transition_to(TransactionState.WAITING_FOR_BILL)
+        elapsed = time.perf_counter() - start
+        machine._cancel_timeout()
+    await engine.dispose()
+    return elapsed
+
+
+async def _main(transitions: int) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        results = {
+            mode: await _run(mode, transitions, directory) for mode in COMMIT_MODES
+        }
+
+    baseline = results["two_phase"]
+    print(f"{'mode':<12}{'transitions/s':>15}{'ms/transition':>15}{'speedup':>9}")
+    for mode, elapsed in results.items():
+        print(
+            f"{mode:<12}{transitions / elapsed:>15.0f}"
+            f"{elapsed * 1000 / transitions:>15.3f}{baseline / elapsed:>8.2f}x"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--transitions", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(_main(args.transitions))
+
+
+if __name__ == "__main__":
+    main()
@@ -49,6 +49,23 @@ class TestStatusEndpoint:
         assert data["sorter"]["homed"] is False
         assert data["sorter"]["current_position"] == 0
 
+    async def test_serial_status(self, client):
+        resp = await client.get("/api/v1/status/serial")
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["BILL"]["connected"] is True
+        assert "payout" in data["COIN_SECURITY"]["scheduler"]["classes"]
+
+    async def test_event_queue_status(self, client):
+        resp = await client.get("/api/v1/status/events")
+        assert resp.status_code == 200
+        assert "size" in resp.json()
+
+    async def test_ws_status(self, client):
+        resp = await client.get("/api/v1/status/ws")
+        assert resp.status_code == 200
+        assert resp.json()["clients"] == []
+
     async def test_status_security_initial_state(self, client):
         resp = await client.get("/api/v1/status")
         data = resp.json()
@@ -0,0 +1,147 @@
+"""Integration tests for the inventory API endpoints."""
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app.api.router import api_router
+from app.core.config import Settings
+from app.services.change_plan_cache import ChangePlanCache
+from app.services.machine_status import MachineStatus
+
+
+@pytest.fixture
+def settings():
+    return Settings(
+        use_mock_serial=True,
+        serial_port_bill="MOCK_BILL",
+        serial_port_coin="MOCK_COIN",
+        payable_index_ceiling=5000,
+    )
+
+
+@pytest.fixture
+def machine_status(settings):
+    status = MachineStatus(settings)
+    status.set_dispenser_counts({"PHP_50": 10, "PHP_20": 10})
+    return status
+
+
+@pytest.fixture
+async def client(settings, machine_status):
+    app = FastAPI()
+    app.include_router(api_router)
+    app.state.settings = settings
+    app.state.machine_status = machine_status
+    app.state.change_plan_cache = ChangePlanCache()
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as c:
+        yield c
+
+
+class TestPayableEndpoint:
+    async def test_payable_amount(self, client):
+        resp = await client.get("/api/v1/inventory/payable", params={"amount": 110})
+        assert resp.status_code == 200
+        assert resp.json() == {"amount": 110, "payable": True}
+
+    async def test_unpayable_amount(self, client):
+        resp = await client.get("/api/v1/inventory/payable", params={"amount": 30})
+        assert resp.json()["payable"] is False
+
+    async def test_reflects_inventory_changes(self, client, machine_status):
+        machine_status.decrement_bill_dispenser("PHP_50", 10)
+        resp = await client.get("/api/v1/inventory/payable", params={"amount": 110})
+        assert resp.json()["payable"] is False
+
+    async def test_above_ceiling_falls_back_to_calculator(
+        self, client, machine_status
+    ):
+        machine_status.set_dispenser_counts({"PHP_1000": 10})
+        resp = await client.get("/api/v1/inventory/payable", params={"amount": 7000})
+        assert resp.json()["payable"] is True
+        resp = await client.get("/api/v1/inventory/payable", params={"amount": 7010})
+        assert resp.json()["payable"] is False
+
+    async def test_negative_amount_rejected(self, client):
+        resp = await client.get("/api/v1/inventory/payable", params={"amount": -5})
+        assert resp.status_code == 422
+
+
+class TestPayableRangeEndpoint:
+    async def test_returns_max_and_blocked(self, client):
+        resp = await client.get(
+            "/api/v1/inventory/payable-range",
+            params={"step": 10, "limit": 1000},
+        )
+        assert resp.status_code == 200
+        data = resp.json()
+        # 10 x 50 + 10 x 20 = 700; gaps mirror at both ends
+        assert data["max_payable"] == 700
+        assert data["blocked_amounts"] == [10, 30, 670, 690]
+        assert data["step"] == 10
+
+    async def test_invalid_step_rejected(self, client):
+        resp = await client.get(
+            "/api/v1/inventory/payable-range", params={"step": 0}
+        )
+        assert resp.status_code == 422
+
+
+class TestPlanBatchEndpoint:
+    async def test_uses_current_inventory(self, client):
+        resp = await client.post(
+            "/api/v1/inventory/plan-batch", json={"amounts": [110, 30, 700]}
+        )
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["amounts"] == [110, 30, 700]
+        assert data["feasible"] == [True, False, True]
+        assert data["item_counts"] == [4, -1, 20]
+        assert "plans" not in data
+
+    async def test_what_if_inventory_and_plans(self, client):
+        resp = await client.post(
+            "/api/v1/inventory/plan-batch",
+            json={
+                "amounts": [1500, 30],
+                "bill_counts": {"PHP_1000": 1, "PHP_500": 1},
+                "coin_counts": {},
+                "include_plans": True,
+            },
+        )
+        data = resp.json()
+        assert data["feasible"] == [True, False]
+        assert data["plans"][1] is None
+        assert [item["denom"] for item in data["plans"][0]["items"]] == [
+            "PHP_1000", "PHP_500",
+        ]
+
+    async def test_partial_counts_merge_over_inventory(
+        self, client, machine_status
+    ):
+        resp = await client.post(
+            "/api/v1/inventory/plan-batch",
+            json={"amounts": [70, 40, 100], "bill_counts": {"PHP_50": 0}},
+        )
+        data = resp.json()
+        # PHP_20 is still counted from the machine; only PHP_50 is removed
+        assert data["feasible"] == [False, True, True]
+        assert data["item_counts"] == [-1, 2, 5]
+        assert data["inventory_version"] == machine_status.inventory_version
+
+    async def test_amount_above_ceiling_rejected(self, client):
+        resp = await client.post(
+            "/api/v1/inventory/plan-batch", json={"amounts": [100, 6000]}
+        )
+        assert resp.status_code == 400
+
+
+class TestPlanCacheEndpoint:
+    async def test_returns_counters(self, client):
+        resp = await client.get("/api/v1/inventory/plan-cache")
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["hits"] == 0
+        assert data["misses"] == 0
+        assert data["maxsize"] == 128
@@ -1,9 +1,14 @@
 import asyncio
+import json
 
 import pytest
 
 from app.core.config import Settings
-from app.drivers.serial_manager import SerialManager
+from app.core.constants import ControllerType
+from app.core.errors import SerialError
+from app.core.errors import TimeoutError as HWTimeoutError
+from app.drivers.mock_serial import MockSerial
+from app.drivers.serial_manager import SerialConnection, SerialManager
 
 
 @pytest.fixture
@@ -124,3 +129,492 @@ class TestEventQueue:
 
         event = await serial_manager.event_queue.get()
         assert event["event"] == "TAMPER"
+
+
+class TestPipelinedCommands:
+    async def test_concurrent_commands_each_get_their_response(
+        self, serial_manager
+    ):
+        results = await asyncio.gather(
+            serial_manager.send_coin_command({"cmd": "PING"}),
+            serial_manager.send_coin_command({"cmd": "VERSION"}),
+            serial_manager.send_coin_command(
+                {"cmd": "COIN_DISPENSE", "denom": 5, "count": 3}
+            ),
+        )
+        assert results[0]["message"] == "PONG"
+        assert results[1]["controller"] == "COIN_SECURITY"
+        assert results[2]["dispensed"] == 3
+        assert all("id" not in r for r in results)
+        assert serial_manager.coin_connection.in_flight == 0
+
+    @pytest.fixture
+    async def pipelined_manager(self, settings):
+        sm = SerialManager(settings.model_copy(update={"serial_max_in_flight": 2}))
+        await sm.startup()
+        yield sm
+        await sm.shutdown()
+
+    async def test_out_of_order_responses_matched_by_id(self, pipelined_manager):
+        conn = pipelined_manager.bill_connection
+        mock = conn.mock_serial
+        sent = []
+        mock.write = lambda data: sent.append(json.loads(data)) or len(data)
+
+        first = asyncio.create_task(conn.send_command({"cmd": "PING"}))
+        second = asyncio.create_task(conn.send_command({"cmd": "VERSION"}))
+        await asyncio.sleep(0.05)
+        assert conn.in_flight == 2
+
+        # Firmware answers the second command first
+        mock.inject_event({"status": "OK", "version": "2.0.0",
+                           "controller": "BILL", "id": sent[1]["id"]})
+        mock.inject_event({"status": "OK", "message": "PONG",
+                           "id": sent[0]["id"]})
+
+        assert (await first)["message"] == "PONG"
+        assert (await second)["version"] == "2.0.0"
+
+    async def test_responses_without_id_resolve_in_order(self, serial_manager):
+        conn = serial_manager.bill_connection
+        mock = conn.mock_serial
+        mock.write = lambda data: len(data)
+
+        first = asyncio.create_task(conn.send_command({"cmd": "PING"}))
+        second = asyncio.create_task(conn.send_command({"cmd": "HOME"}))
+        await asyncio.sleep(0.05)
+        assert conn.in_flight == 1
+
+        mock.inject_event({"status": "OK", "message": "PONG"})
+        assert (await first)["message"] == "PONG"
+        await asyncio.sleep(0.05)
+        mock.inject_event({"status": "OK", "position": 0})
+
+        assert (await second)["position"] == 0
+
+    async def test_response_without_id_dropped_when_ambiguous(
+        self, pipelined_manager
+    ):
+        conn = pipelined_manager.bill_connection
+        mock = conn.mock_serial
+        mock.write = lambda data: len(data)
+
+        first = asyncio.create_task(conn.send_command({"cmd": "PING"}, 0.2))
+        second = asyncio.create_task(conn.send_command({"cmd": "HOME"}, 0.2))
+        await asyncio.sleep(0.05)
+        assert conn.in_flight == 2
+
+        # Could answer either command, so neither gets it
+        mock.inject_event({"status": "OK", "position": 0})
+
+        for task in (first, second):
+            with pytest.raises(HWTimeoutError):
+                await task
+
+    async def test_timed_out_command_leaves_no_pending_entry(
+        self, serial_manager
+    ):
+        conn = serial_manager.bill_connection
+        conn.mock_serial.write = lambda data: len(data)
+
+        with pytest.raises(HWTimeoutError):
+            await conn.send_command({"cmd": "PING"}, timeout=0.05)
+        assert conn.in_flight == 0
+
+
+class TestReaderModes:
+    @pytest.fixture(params=["blocking", "asyncio", "poll"])
+    async def mode_manager(self, request, settings):
+        sm = SerialManager(
+            settings.model_copy(update={"serial_reader_mode": request.param})
+        )
+        await sm.startup()
+        yield sm
+        await sm.shutdown()
+
+    async def test_round_trip(self, mode_manager):
+        resp = await mode_manager.send_bill_command({"cmd": "PING"})
+        assert resp["message"] == "PONG"
+
+    async def test_pipelined_commands(self, mode_manager):
+        results = await asyncio.gather(
+            *(mode_manager.send_coin_command({"cmd": "PING"}) for _ in range(5))
+        )
+        assert [r["message"] for r in results] == ["PONG"] * 5
+
+    async def test_event_delivered(self, mode_manager):
+        mock = mode_manager.coin_connection.mock_serial
+        mock.inject_event({"event": "KEYPAD", "key": "5"})
+
+        event = await asyncio.wait_for(mode_manager.event_queue.get(), 1.0)
+        assert event["key"] == "5"
+        assert event["_controller"] == "COIN_SECURITY"
+
+    def test_unknown_mode_rejected(self):
+        with pytest.raises(ValueError, match="reader mode"):
+            SerialConnection(
+                port="MOCK_BILL",
+                baud_rate=115200,
+                controller_type=ControllerType.BILL,
+                event_queue=asyncio.Queue(),
+                reader_mode="interrupt",
+            )
+
+
+class TestBinaryFraming:
+    @pytest.fixture(params=["blocking", "asyncio"])
+    async def msgpack_manager(self, request, settings):
+        sm = SerialManager(
+            settings.model_copy(
+                update={"serial_reader_mode": request.param, "serial_framing": "msgpack"}
+            )
+        )
+        await sm.startup()
+        yield sm
+        await sm.shutdown()
+
+    async def test_negotiated_at_connect(self, msgpack_manager):
+        assert msgpack_manager.bill_connection.framing == "msgpack"
+        assert msgpack_manager.coin_connection.framing == "msgpack"
+        assert msgpack_manager.coin_connection.mock_serial._framing == "msgpack"
+
+    async def test_commands_and_events_over_frames(self, msgpack_manager):
+        results = await asyncio.gather(
+            msgpack_manager.send_coin_command({"cmd": "PING"}),
+            msgpack_manager.send_coin_command({"cmd": "COIN_CHANGE", "amount": 47}),
+        )
+        assert results[0]["message"] == "PONG"
+        assert results[1]["breakdown"] == {"20": 2, "5": 1, "1": 2}
+
+        mock = msgpack_manager.coin_connection.mock_serial
+        mock.inject_event({"event": "COIN_IN", "denom": 10, "total": 10})
+        event = await asyncio.wait_for(msgpack_manager.event_queue.get(), 1.0)
+        assert event["denom"] == 10
+
+    async def test_poll_reader_stays_on_json(self, settings):
+        sm = SerialManager(
+            settings.model_copy(
+                update={"serial_reader_mode": "poll", "serial_framing": "msgpack"}
+            )
+        )
+        await sm.startup()
+        try:
+            assert sm.bill_connection.framing == "json"
+            resp = await sm.send_bill_command({"cmd": "PING"})
+            assert resp["message"] == "PONG"
+        finally:
+            await sm.shutdown()
+
+    async def test_controller_without_caps_stays_on_json(self, settings):
+        conn = SerialConnection(
+            port="MOCK_BILL",
+            baud_rate=115200,
+            controller_type=ControllerType.BILL,
+            event_queue=asyncio.Queue(),
+            use_mock=True,
+            reader_mode="blocking",
+        )
+        await conn.connect()
+        try:
+            # Simulate older firmware: VERSION without caps
+            handler = conn.mock_serial._handle_version
+            conn.mock_serial._handle_version = lambda cmd: [
+                {k: v for k, v in handler(cmd)[0].items() if k != "caps"}
+            ]
+            await conn._negotiate_framing("msgpack")
+            assert conn.framing == "json"
+            assert (await conn.send_command({"cmd": "PING"}))["message"] == "PONG"
+        finally:
+            await conn.disconnect()
+
+
+class TestReconnect:
+    @pytest.fixture(autouse=True)
+    def replug_all(self):
+        yield
+        MockSerial._unplugged_ports.clear()
+
+    @pytest.fixture(params=["blocking", "asyncio", "poll"])
+    async def reconnect_manager(self, request, settings):
+        sm = SerialManager(
+            settings.model_copy(
+                update={
+                    "serial_reader_mode": request.param,
+                    "serial_reconnect_initial_delay": 0.01,
+                    "serial_reconnect_max_delay": 0.04,
+                }
+            )
+        )
+        await sm.startup()
+        yield sm
+        await sm.shutdown()
+
+    async def test_disconnect_and_reconnect_events(self, reconnect_manager):
+        conn = reconnect_manager.bill_connection
+        old_mock = conn.mock_serial
+        old_mock.inject_disconnect()
+
+        event = await asyncio.wait_for(reconnect_manager.event_queue.get(), 1.0)
+        assert event["event"] == "DEVICE_DISCONNECTED"
+        assert event["controller"] == "BILL"
+        assert "disconnected" in event["reason"]
+
+        event = await asyncio.wait_for(reconnect_manager.event_queue.get(), 1.0)
+        assert event["event"] == "DEVICE_CONNECTED"
+        assert event["attempts"] == 1
+        assert conn.is_connected
+        assert conn.reconnects == 1
+        assert conn.mock_serial is not old_mock
+
+        resp = await reconnect_manager.send_bill_command({"cmd": "PING"})
+        assert resp["message"] == "PONG"
+
+    async def test_in_flight_ping_retried_after_reconnect(self, reconnect_manager):
+        mock = reconnect_manager.coin_connection.mock_serial
+        # The dying controller never answers
+        mock._handle_ping = lambda cmd: []
+
+        task = asyncio.create_task(
+            reconnect_manager.send_coin_command({"cmd": "PING"})
+        )
+        await asyncio.sleep(0.05)
+        assert not task.done()
+        mock.inject_disconnect()
+
+        resp = await asyncio.wait_for(task, 1.0)
+        assert resp["message"] == "PONG"
+
+    async def test_in_flight_dispense_fails(self, reconnect_manager):
+        mock = reconnect_manager.bill_connection.mock_serial
+        mock._handle_dispense = lambda cmd: []
+
+        task = asyncio.create_task(
+            reconnect_manager.send_bill_command(
+                {"cmd": "DISPENSE", "denom": "PHP_100", "count": 1}
+            )
+        )
+        await asyncio.sleep(0.05)
+        mock.inject_disconnect()
+
+        with pytest.raises(SerialError, match="outcome unknown"):
+            await asyncio.wait_for(task, 1.0)
+        assert reconnect_manager.bill_connection.in_flight == 0
+
+    async def test_backoff_until_replugged(self, reconnect_manager):
+        conn = reconnect_manager.bill_connection
+        MockSerial.unplug("MOCK_BILL")
+        conn.mock_serial.inject_disconnect()
+
+        event = await asyncio.wait_for(reconnect_manager.event_queue.get(), 1.0)
+        assert event["event"] == "DEVICE_DISCONNECTED"
+        await asyncio.sleep(0.15)
+        assert not conn.is_connected
+
+        # Actions are refused while down; reads wait for the link
+        with pytest.raises(SerialError, match="not sent"):
+            await reconnect_manager.send_bill_command({"cmd": "HOME"})
+        ping = asyncio.create_task(reconnect_manager.send_bill_command({"cmd": "PING"}))
+
+        MockSerial.replug("MOCK_BILL")
+        event = await asyncio.wait_for(reconnect_manager.event_queue.get(), 1.0)
+        assert event["event"] == "DEVICE_CONNECTED"
+        assert event["attempts"] > 2
+        assert (await asyncio.wait_for(ping, 1.0))["message"] == "PONG"
+
+    async def test_ping_times_out_while_unplugged(self, reconnect_manager):
+        MockSerial.unplug("MOCK_COIN")
+        reconnect_manager.coin_connection.mock_serial.inject_disconnect()
+
+        with pytest.raises(HWTimeoutError):
+            await reconnect_manager.send_coin_command({"cmd": "PING"}, timeout=0.1)
+
+    @pytest.fixture(params=["blocking", "asyncio"])
+    async def msgpack_reconnect_manager(self, request, settings):
+        sm = SerialManager(
+            settings.model_copy(
+                update={
+                    "serial_reader_mode": request.param,
+                    "serial_framing": "msgpack",
+                    "serial_reconnect_initial_delay": 0.01,
+                    "serial_reconnect_max_delay": 0.04,
+                }
+            )
+        )
+        await sm.startup()
+        yield sm
+        await sm.shutdown()
+
+    async def test_msgpack_renegotiated_before_commands_resume(
+        self, msgpack_reconnect_manager
+    ):
+        conn = msgpack_reconnect_manager.coin_connection
+        mock = conn.mock_serial
+        # The dying controller never answers
+        mock._handle_ping = lambda cmd: []
+
+        # Both send slots held by reads that will be retried, more queued
+        pings = [
+            asyncio.create_task(
+                msgpack_reconnect_manager.send_coin_command({"cmd": "PING"})
+            )
+            for _ in range(4)
+        ]
+        await asyncio.sleep(0.05)
+        mock.inject_disconnect()
+
+        results = await asyncio.wait_for(asyncio.gather(*pings), 2.0)
+        assert [r["message"] for r in results] == ["PONG"] * 4
+        assert conn.reconnects == 1
+        assert conn.framing == "msgpack"
+        assert conn.mock_serial._framing == "msgpack"
+
+    def test_backoff_delay_doubles_up_to_max(self):
+        conn = SerialConnection(
+            port="MOCK_BILL",
+            baud_rate=115200,
+            controller_type=ControllerType.BILL,
+            event_queue=asyncio.Queue(),
+            reconnect_initial_delay=0.5,
+            reconnect_max_delay=3.0,
+        )
+        assert [conn._backoff_delay(n) for n in range(5)] == [0.5, 1.0, 2.0, 3.0, 3.0]
+        assert conn._backoff_delay(1000) == 3.0
+
+
+class TestCommandScheduling:
+    @pytest.fixture
+    async def strict_manager(self, settings):
+        sm = SerialManager(settings.model_copy(update={"serial_max_in_flight": 1}))
+        await sm.startup()
+        yield sm
+        await sm.shutdown()
+
+    async def test_dispense_overtakes_queued_health_checks(self, strict_manager):
+        conn = strict_manager.bill_connection
+        mock = conn.mock_serial
+        sent = []
+        mock.write = lambda data: sent.append(json.loads(data)) or len(data)
+
+        status = asyncio.create_task(conn.send_command({"cmd": "SORT_STATUS"}))
+        await asyncio.sleep(0.01)
+        pings = [
+            asyncio.create_task(conn.send_command({"cmd": "PING"}))
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0.01)
+        dispense = asyncio.create_task(
+            conn.send_command({"cmd": "DISPENSE", "denom": "PHP_100", "count": 1})
+        )
+        await asyncio.sleep(0.01)
+        assert [c["cmd"] for c in sent] == ["SORT_STATUS"]
+
+        for _ in range(5):
+            mock.inject_event({"status": "OK", "id": sent[-1]["id"]})
+            await asyncio.sleep(0.02)
+
+        await asyncio.gather(status, dispense, *pings)
+        assert [c["cmd"] for c in sent] == [
+            "SORT_STATUS", "DISPENSE", "PING", "PING", "PING"
+        ]
+        stats = conn.stats()["scheduler"]
+        assert stats["classes"]["payout"]["admitted"] == 1
+        assert stats["classes"]["diagnostics"]["admitted"] == 3
+
+    async def test_command_expiring_in_queue_is_never_sent(self, strict_manager):
+        conn = strict_manager.bill_connection
+        mock = conn.mock_serial
+        sent = []
+        mock.write = lambda data: sent.append(json.loads(data)) or len(data)
+
+        blocker = asyncio.create_task(conn.send_command({"cmd": "HOME"}))
+        await asyncio.sleep(0.01)
+        with pytest.raises(HWTimeoutError):
+            await conn.send_command({"cmd": "PING"}, timeout=0.05)
+        assert [c["cmd"] for c in sent] == ["HOME"]
+
+        mock.inject_event({"status": "OK", "position": 0, "id": sent[0]["id"]})
+        await blocker
+        assert conn.stats()["scheduler"]["classes"]["diagnostics"]["expired"] == 1
+
+    async def test_manager_stats(self, serial_manager):
+        await serial_manager.send_coin_command({"cmd": "PING"})
+        stats = serial_manager.stats()
+        assert set(stats) == {"BILL", "COIN_SECURITY"}
+        assert stats["COIN_SECURITY"]["connected"] is True
+        assert stats["COIN_SECURITY"]["scheduler"]["max_in_flight"] == 1
+
+
+class TestCaptureAndReplay:
+    async def test_recorded_session_replays(self, settings, tmp_path):
+        capture_dir = str(tmp_path)
+        recording = SerialManager(
+            settings.model_copy(update={"serial_capture_dir": capture_dir})
+        )
+        await recording.startup()
+        recording.coin_connection.mock_serial.inject_event(
+            {"event": "COIN_IN", "denom": 5, "total": 5}
+        )
+        await asyncio.wait_for(recording.event_queue.get(), 1.0)
+        original = [
+            await recording.send_coin_command({"cmd": "PING"}),
+            await recording.send_coin_command({"cmd": "COIN_CHANGE", "amount": 47}),
+        ]
+        await recording.shutdown()
+
+        replaying = SerialManager(
+            settings.model_copy(
+                update={"serial_replay_dir": capture_dir, "serial_replay_speed": 0}
+            )
+        )
+        await replaying.startup()
+        try:
+            port = replaying.coin_connection.mock_serial
+            assert type(port).__name__ == "ReplaySerial"
+            event = await asyncio.wait_for(replaying.event_queue.get(), 1.0)
+            assert event["denom"] == 5
+            replayed = [
+                await replaying.send_coin_command({"cmd": "PING"}),
+                await replaying.send_coin_command({"cmd": "COIN_CHANGE", "amount": 47}),
+            ]
+            assert replayed == original
+            assert port.mismatches == 0
+        finally:
+            await replaying.shutdown()
+
+    async def test_replay_without_capture_fails_to_connect(self, settings, tmp_path):
+        sm = SerialManager(settings.model_copy(update={"serial_replay_dir": str(tmp_path)}))
+        with pytest.raises(SerialError, match="no BILL capture"):
+            await sm.startup()
+
+
+class TestBoundedEventQueue:
+    async def test_event_storm_through_bounded_queue(self, settings):
+        sm = SerialManager(settings.model_copy(update={"event_queue_capacity": 5}))
+        await sm.startup()
+        try:
+            mock = sm.coin_connection.mock_serial
+            for total in range(1, 21):
+                mock.inject_event({"event": "COIN_IN", "denom": 1, "total": total})
+            for key in "0123456789":
+                mock.inject_event({"event": "KEYPAD", "key": key})
+            for _ in range(10):
+                mock.inject_event({"event": "TAMPER", "sensor": "A"})
+            await asyncio.sleep(0.1)
+
+            events = []
+            while not sm.event_queue.empty():
+                events.append(sm.event_queue.get_nowait())
+            coins = [e["total"] for e in events if e["event"] == "COIN_IN"]
+            assert coins == list(range(1, 21))
+            assert sum(e["event"] == "TAMPER" for e in events) == 1
+
+            stats = sm.event_queue_stats()
+            assert stats["capacity"] == 5
+            assert stats["dropped"]["KEYPAD"] == 10
+            assert stats["coalesced"]["TAMPER"] == 9
+            assert stats["high_watermark"] >= 20
+        finally:
+            await sm.shutdown()
+
+    async def test_unbounded_by_default(self, serial_manager):
+        assert serial_manager.event_queue_stats() == {"capacity": 0, "size": 0}
@@ -31,3 +31,94 @@ class TestWebSocketEndpoint:
                 data = ws.receive_json()
                 assert data["type"] == "COIN_INSERTED"
                 assert data["payload"]["denom"] == 5
+
+    def test_ws_subscribe_action_filters_events(self, app):
+        from starlette.testclient import TestClient
+
+        with TestClient(app) as client:
+            with client.websocket_connect("/api/v1/ws?topics=security") as ws:
+                ws.send_json({"action": "SUBSCRIBE", "data": {"topics": ["cash"]}})
+                reply = ws.receive_json()
+                assert reply["type"] == "SUBSCRIPTIONS"
+                assert reply["payload"]["topics"] == ["cash", "security"]
+
+                ws.send_json({"action": "UNSUBSCRIBE", "data": {"topics": "cash"}})
+                assert ws.receive_json()["payload"]["topics"] == ["security"]
+
+                ws_manager = app.state.ws_manager
+                client.portal.call(
+                    ws_manager.broadcast, WSEvent(type=WSEventType.COIN_INSERTED)
+                )
+                client.portal.call(
+                    ws_manager.broadcast, WSEvent(type=WSEventType.TAMPER)
+                )
+                assert ws.receive_json()["type"] == "TAMPER"
+
+    def test_ws_subscribe_unknown_topic_reports_error(self, app):
+        from starlette.testclient import TestClient
+
+        with TestClient(app) as client:
+            with client.websocket_connect("/api/v1/ws?topics=cash") as ws:
+                ws.send_json({"action": "SUBSCRIBE", "data": {"topics": ["bogus"]}})
+                reply = ws.receive_json()
+                assert "bogus" in reply["payload"]["error"]
+                assert reply["payload"]["topics"] == ["cash"]
+
+    def test_ws_unknown_topic_in_query_rejected(self, app):
+        from starlette.testclient import TestClient
+        from starlette.websockets import WebSocketDisconnect
+
+        with TestClient(app) as client:
+            with pytest.raises(WebSocketDisconnect) as exc:
+                with client.websocket_connect("/api/v1/ws?topics=bogus"):
+                    pass
+            assert exc.value.code == 1008
+
+    def test_ws_resume_from_replays_missed_events(self, app):
+        from starlette.testclient import TestClient
+
+        with TestClient(app) as client:
+            ws_manager = app.state.ws_manager
+            for denom in (1, 5):
+                client.portal.call(
+                    ws_manager.broadcast,
+                    WSEvent(type=WSEventType.COIN_INSERTED, payload={"denom": denom}),
+                )
+
+            url = f"/api/v1/ws?resume_from=1&stream={ws_manager.stream_id}"
+            with client.websocket_connect(url) as ws:
+                replay = ws.receive_json()
+                entries = replay["payload"]["events"]
+                assert [e["payload"]["denom"] for e in entries] == [5]
+                hello = ws.receive_json()
+                assert hello["type"] == "HELLO"
+                assert hello["payload"]["seq"] == 2
+
+    def test_ws_state_topic_sends_snapshot_then_patches(self, app):
+        from starlette.testclient import TestClient
+
+        with TestClient(app) as client:
+            with client.websocket_connect("/api/v1/ws?topics=state") as ws:
+                snapshot = ws.receive_json()
+                assert snapshot["type"] == "STATE_SNAPSHOT"
+                version = snapshot["payload"]["version"]
+                assert "consumables" in snapshot["payload"]["state"]
+
+                client.portal.call(
+                    app.state.machine_status.update_security, False
+                )
+                patch = ws.receive_json()
+                assert patch["type"] == "STATE_PATCH"
+                assert patch["payload"]["version"] == version + 1
+                assert patch["payload"]["ops"] == [
+                    {"op": "replace", "path": "/security/locked", "value": False}
+                ]
+
+    def test_ws_subscribe_state_sends_snapshot(self, app):
+        from starlette.testclient import TestClient
+
+        with TestClient(app) as client:
+            with client.websocket_connect("/api/v1/ws") as ws:
+                ws.send_json({"action": "SUBSCRIBE", "data": {"topics": ["state"]}})
+                assert ws.receive_json()["type"] == "SUBSCRIPTIONS"
+                assert ws.receive_json()["type"] == "STATE_SNAPSHOT"
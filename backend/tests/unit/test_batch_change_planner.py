@@ -0,0 +1,93 @@
+"""Tests for the array-based batch change planner."""
+
+import random
+
+import pytest
+
+from app.core.errors import InsufficientInventoryError
+from app.services.batch_change_planner import (
+    PLANNER_DENOMINATIONS,
+    inventory_vector,
+    plan_change_batch,
+)
+from app.services.change_calculator import calculate_change
+
+
+def _calculator_items(amount, bills, coins):
+    try:
+        plan = calculate_change(amount, bills, coins)
+    except InsufficientInventoryError:
+        return None
+    return sum(item.count for item in plan.items)
+
+
+class TestInventoryVector:
+    def test_layout_follows_planner_denominations(self):
+        vector = inventory_vector({"PHP_100": 3}, {"PHP_5": 7})
+        counts = {
+            (key, kind): int(count)
+            for (key, kind, _value), count in zip(PLANNER_DENOMINATIONS, vector)
+        }
+        assert counts[("PHP_100", "bill")] == 3
+        assert counts[("PHP_5", "coin")] == 7
+        assert sum(counts.values()) == 10
+
+    def test_bill_and_coin_twenty_are_separate(self):
+        vector = inventory_vector({"PHP_20": 2}, {"PHP_20": 5})
+        by_key = {
+            (key, kind): int(count)
+            for (key, kind, _value), count in zip(PLANNER_DENOMINATIONS, vector)
+        }
+        assert by_key[("PHP_20", "bill")] == 2
+        assert by_key[("PHP_20", "coin")] == 5
+
+
+class TestPlanChangeBatch:
+    def test_feasibility_and_item_counts(self):
+        inventory = inventory_vector({"PHP_100": 2, "PHP_50": 1}, {"PHP_10": 3})
+        batch = plan_change_batch([0, 100, 250, 260, 5, 300], inventory)
+        assert batch.feasible.tolist() == [True, True, True, True, False, False]
+        assert batch.item_counts.tolist() == [0, 1, 3, 4, -1, -1]
+
+    def test_empty_batch(self):
+        batch = plan_change_batch([], inventory_vector({}, {}))
+        assert len(batch) == 0
+        assert batch.plans() == []
+
+    def test_wrong_inventory_length_rejected(self):
+        with pytest.raises(ValueError):
+            plan_change_batch([100], [1, 2, 3])
+
+    def test_plans_materialized_on_request(self):
+        inventory = inventory_vector({"PHP_50": 1}, {"PHP_20": 3, "PHP_1": 2})
+        batch = plan_change_batch([60, 3], inventory)
+        plan = batch.plan(0)
+        # Greedy would take the 50 bill and get stuck; exact plan uses 3 x 20
+        assert plan.is_exact
+        assert plan.total_amount == 60
+        assert [(i.denom, i.denom_type, i.count) for i in plan.items] == [
+            ("PHP_20", "coin", 3)
+        ]
+        assert batch.plan(1) is None
+
+    def test_matches_change_calculator(self):
+        rng = random.Random(42)
+        bills = {"PHP_1000": 2, "PHP_500": 1, "PHP_200": 3, "PHP_100": 0,
+                 "PHP_50": 4, "PHP_20": 2}
+        coins = {"PHP_20": 1, "PHP_10": 3, "PHP_5": 1, "PHP_1": 4}
+        amounts = [rng.randint(0, 4000) for _ in range(300)]
+        batch = plan_change_batch(amounts, inventory_vector(bills, coins))
+
+        for i, amount in enumerate(amounts):
+            expected = _calculator_items(amount, bills, coins)
+            assert batch.feasible[i] == (expected is not None), amount
+            if expected is None:
+                continue
+            # Batch planner minimizes items; never worse than the calculator
+            assert batch.item_counts[i] <= expected
+            plan = batch.plan(i)
+            assert sum(item.count * item.value for item in plan.items) == amount
+            assert sum(item.count for item in plan.items) == batch.item_counts[i]
+            for item in plan.items:
+                stock = bills if item.denom_type == "bill" else coins
+                assert item.count <= stock[item.denom]
@@ -645,3 +645,145 @@ class TestCurrencyValidation:
                 currency="php",
             )
 
+
+
+# ---------------------------------------------------------------------------
+# 12. Exact solver fallback when greedy falls short
+# ---------------------------------------------------------------------------
+
+
+class TestExactSolverFallback:
+    def test_no_100s_pays_with_50s_and_20s(self, empty_coins):
+        """Greedy takes 2 x 50 and is stuck at 10; exact uses 50 + 3 x 20."""
+        bills = {"PHP_50": 10, "PHP_20": 10}
+        plan = calculate_change(110, bills, empty_coins)
+        assert plan.is_exact
+        assert plan.total_amount == 110
+        denoms = {item.denom: item.count for item in plan.items}
+        assert denoms == {"PHP_50": 1, "PHP_20": 3}
+
+    def test_greedy_only_mode_still_raises(self, empty_coins):
+        bills = {"PHP_50": 10, "PHP_20": 10}
+        with pytest.raises(InsufficientInventoryError) as exc_info:
+            calculate_change(110, bills, empty_coins, exact_fallback=False)
+        assert exc_info.value.shortfall == 10
+
+    def test_infeasible_reports_greedy_shortfall(self, empty_coins):
+        bills = {"PHP_50": 10, "PHP_20": 10}
+        with pytest.raises(InsufficientInventoryError) as exc_info:
+            calculate_change(30, bills, empty_coins)
+        assert exc_info.value.requested == 30
+        assert exc_info.value.available == 20
+        assert exc_info.value.shortfall == 10
+
+    def test_preferred_denoms_break_ties(self, empty_coins):
+        """230 = 3 x 50 + 4 x 20 = 1 x 50 + 9 x 20; preference picks the latter."""
+        bills = {"PHP_50": 10, "PHP_20": 20}
+        plan = calculate_change(230, bills, empty_coins)
+        denoms = {item.denom: item.count for item in plan.items}
+        assert denoms == {"PHP_50": 3, "PHP_20": 4}
+
+        plan = calculate_change(230, bills, empty_coins, preferred_denoms=[20])
+        denoms = {item.denom: item.count for item in plan.items}
+        assert denoms == {"PHP_20": 9, "PHP_50": 1}
+
+    def test_mixes_bills_and_coins(self):
+        """Bill 20s cannot cover 30 alone; the 10-peso coin completes it."""
+        bills = {"PHP_50": 2, "PHP_20": 1}
+        coins = {"PHP_10": 1}
+        plan = calculate_change(80, bills, coins)
+        denoms = {(item.denom, item.denom_type): item.count for item in plan.items}
+        assert denoms == {
+            ("PHP_50", "bill"): 1,
+            ("PHP_20", "bill"): 1,
+            ("PHP_10", "coin"): 1,
+        }
+
+    def test_respects_inventory_limits(self):
+        bills = {"PHP_500": 1, "PHP_200": 3, "PHP_50": 2}
+        coins = {"PHP_20": 2, "PHP_5": 4}
+        plan = calculate_change(740, bills, coins)
+        assert plan.total_amount == 740
+        assert sum(i.count * i.value for i in plan.items) == 740
+        limits = {("bill", k): v for k, v in bills.items()}
+        limits.update({("coin", k): v for k, v in coins.items()})
+        for item in plan.items:
+            assert item.count <= limits[(item.denom_type, item.denom)]
+
+    def test_matches_brute_force_feasibility(self):
+        """Every amount that is payable by some combination gets a plan."""
+        bills = {"PHP_100": 1, "PHP_50": 3, "PHP_20": 4}
+        coins = {"PHP_10": 1, "PHP_5": 2}
+        payable = set()
+        for a in range(2):
+            for b in range(4):
+                for c in range(5):
+                    for d in range(2):
+                        for e in range(3):
+                            payable.add(100 * a + 50 * b + 20 * c + 10 * d + 5 * e)
+
+        for amount in range(1, 400):
+            if amount in payable:
+                plan = calculate_change(amount, bills, coins)
+                assert plan.total_amount == amount
+            else:
+                with pytest.raises(InsufficientInventoryError):
+                    calculate_change(amount, bills, coins)
+
+
+# ---------------------------------------------------------------------------
+# 13. Dispense policies
+# ---------------------------------------------------------------------------
+
+
+class TestDispensePolicies:
+    def test_unknown_policy_raises(self, full_bill_inventory, empty_coins):
+        with pytest.raises(ValueError, match="Unknown dispense policy"):
+            calculate_change(100, full_bill_inventory, empty_coins, policy="nope")
+
+    def test_policy_without_score_cannot_be_created(self):
+        from app.services.dispense_policy import DispensePolicy
+
+        class Incomplete(DispensePolicy):
+            name = "incomplete"
+
+        with pytest.raises(TypeError):
+            Incomplete()
+
+    def test_default_policy_is_greedy(self, empty_coins):
+        bills = {"PHP_1000": 1, "PHP_500": 20}
+        plan = calculate_change(1000, bills, empty_coins)
+        assert {i.denom: i.count for i in plan.items} == {"PHP_1000": 1}
+
+    def test_balance_spares_scarce_cassette(self, empty_coins):
+        """The last PHP_1000 would empty its cassette; two 500s drain 10%."""
+        bills = {"PHP_1000": 1, "PHP_500": 20}
+        plan = calculate_change(1000, bills, empty_coins, policy="balance")
+        assert {i.denom: i.count for i in plan.items} == {"PHP_500": 2}
+
+    def test_policy_needs_exact_fallback(self, full_bill_inventory, empty_coins):
+        with pytest.raises(ValueError, match="needs exact_fallback"):
+            calculate_change(
+                100,
+                full_bill_inventory,
+                empty_coins,
+                exact_fallback=False,
+                policy="balance",
+            )
+
+    def test_policy_keeps_preferred_denoms_first(self, empty_coins):
+        bills = {"PHP_1000": 1, "PHP_500": 20, "PHP_100": 20}
+        plan = calculate_change(
+            1000, bills, empty_coins, preferred_denoms=[1000], policy="balance"
+        )
+        assert {i.denom: i.count for i in plan.items} == {"PHP_1000": 1}
+
+    @pytest.mark.parametrize("policy", ["min_items", "balance"])
+    def test_every_policy_pays_exact_amount(
+        self, policy, full_bill_inventory, full_coin_inventory
+    ):
+        for amount in (1, 37, 480, 1999, 12345):
+            plan = calculate_change(
+                amount, full_bill_inventory, full_coin_inventory, policy=policy
+            )
+            assert sum(i.count * i.value for i in plan.items) == amount
@@ -0,0 +1,84 @@
+"""Tests for the incremental change-feasibility index."""
+
+import random
+
+import pytest
+
+from app.core.errors import InsufficientInventoryError
+from app.services.change_calculator import calculate_change
+from app.services.change_feasibility import ChangeFeasibilityIndex
+
+
+def _payable_by_calculator(amount, bills, coins):
+    try:
+        calculate_change(amount, bills, coins)
+        return True
+    except InsufficientInventoryError:
+        return False
+
+
+class TestChangeFeasibilityIndex:
+    def test_empty_inventory_only_zero_payable(self):
+        index = ChangeFeasibilityIndex(200)
+        assert index.is_payable(0)
+        assert not any(index.is_payable(a) for a in range(1, 201))
+
+    def test_single_denomination(self):
+        index = ChangeFeasibilityIndex(500)
+        index.set_count("bill", "PHP_100", 3)
+        payable = {a for a in range(501) if index.is_payable(a)}
+        assert payable == {0, 100, 200, 300}
+
+    def test_decrement_removes_amounts(self):
+        index = ChangeFeasibilityIndex(500)
+        index.set_count("bill", "PHP_100", 3)
+        index.set_count("bill", "PHP_100", 1)
+        assert index.is_payable(100)
+        assert not index.is_payable(200)
+
+    def test_bill_and_coin_of_same_value_are_separate(self):
+        index = ChangeFeasibilityIndex(100)
+        index.set_count("bill", "PHP_20", 1)
+        index.set_count("coin", "PHP_20", 1)
+        assert index.is_payable(40)
+        assert not index.is_payable(60)
+
+    def test_foreign_denominations_ignored(self):
+        index = ChangeFeasibilityIndex(100)
+        index.set_count("bill", "USD_10", 5)
+        assert not index.is_payable(10)
+
+    def test_out_of_range_raises(self):
+        index = ChangeFeasibilityIndex(100)
+        with pytest.raises(ValueError):
+            index.is_payable(101)
+
+    def test_payable_mask(self):
+        index = ChangeFeasibilityIndex(60)
+        index.set_count("coin", "PHP_20", 2)
+        mask = index.payable_mask()
+        assert len(mask) == 61
+        assert [a for a in range(61) if mask[a]] == [0, 20, 40]
+
+    def test_incremental_updates_match_calculator(self):
+        """Random increments/decrements stay consistent with calculate_change."""
+        rng = random.Random(7)
+        ceiling = 700
+        index = ChangeFeasibilityIndex(ceiling)
+        bills = {"PHP_20": 0, "PHP_50": 0, "PHP_100": 0, "PHP_200": 0, "PHP_500": 0}
+        coins = {"PHP_1": 0, "PHP_5": 0, "PHP_10": 0, "PHP_20": 0}
+
+        for _ in range(25):
+            if rng.random() < 0.5:
+                denom = rng.choice(list(bills))
+                bills[denom] = rng.randint(0, 4)
+                index.set_count("bill", denom, bills[denom])
+            else:
+                denom = rng.choice(list(coins))
+                coins[denom] = rng.randint(0, 4)
+                index.set_count("coin", denom, coins[denom])
+
+        for amount in range(1, ceiling + 1):
+            assert index.is_payable(amount) == _payable_by_calculator(
+                amount, bills, coins
+            ), amount
@@ -0,0 +1,75 @@
+"""Tests for the memoized change plan cache."""
+
+import pytest
+
+from app.core.errors import InsufficientInventoryError
+from app.services.change_plan_cache import ChangePlanCache
+
+BILLS = {"PHP_100": 10, "PHP_50": 10}
+COINS = {"PHP_10": 5}
+
+
+class TestChangePlanCache:
+    def test_repeat_lookup_hits(self):
+        cache = ChangePlanCache()
+        first = cache.get_plan(1000, BILLS, COINS, 1, preferred_denoms=[100])
+        second = cache.get_plan(1000, BILLS, COINS, 1, preferred_denoms=[100])
+        assert second is first
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_preferences_and_policy_are_part_of_key(self):
+        cache = ChangePlanCache()
+        by_100 = cache.get_plan(500, BILLS, COINS, 1, preferred_denoms=[100])
+        by_50 = cache.get_plan(500, BILLS, COINS, 1, preferred_denoms=[50])
+        cache.get_plan(500, BILLS, COINS, 1, preferred_denoms=[50], policy="balance")
+        assert {i.denom for i in by_100.items} == {"PHP_100"}
+        assert {i.denom for i in by_50.items} == {"PHP_50"}
+        assert cache.misses == 3
+
+    def test_empty_preferences_same_as_none(self):
+        cache = ChangePlanCache()
+        cache.get_plan(100, BILLS, COINS, 1, preferred_denoms=[])
+        cache.get_plan(100, BILLS, COINS, 1)
+        assert cache.hits == 1
+
+    def test_version_change_invalidates(self):
+        cache = ChangePlanCache()
+        cache.get_plan(100, BILLS, COINS, 1)
+        plan = cache.get_plan(100, {"PHP_50": 2}, {}, 2)
+        assert {i.denom for i in plan.items} == {"PHP_50"}
+        assert cache.misses == 2
+        assert cache.invalidations == 1
+        assert cache.stats()["size"] == 1
+
+    def test_infeasible_amount_cached(self):
+        cache = ChangePlanCache()
+        for _ in range(2):
+            with pytest.raises(InsufficientInventoryError) as exc_info:
+                cache.get_plan(5, BILLS, COINS, 1)
+        assert exc_info.value.shortfall == 5
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_lru_eviction(self):
+        cache = ChangePlanCache(maxsize=2)
+        cache.get_plan(100, BILLS, COINS, 1)
+        cache.get_plan(200, BILLS, COINS, 1)
+        cache.get_plan(100, BILLS, COINS, 1)  # 100 becomes most recent
+        cache.get_plan(300, BILLS, COINS, 1)  # evicts 200
+        cache.get_plan(100, BILLS, COINS, 1)
+        cache.get_plan(200, BILLS, COINS, 1)
+        assert cache.hits == 2
+        assert cache.misses == 4
+
+    def test_stats(self):
+        cache = ChangePlanCache(maxsize=8)
+        cache.get_plan(100, BILLS, COINS, 3)
+        cache.get_plan(100, BILLS, COINS, 3)
+        assert cache.stats() == {
+            "hits": 1,
+            "misses": 1,
+            "hit_rate": 0.5,
+            "invalidations": 0,
+            "size": 1,
+            "maxsize": 8,
+            "inventory_version": 3,
+        }
@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+
+from app.drivers.serial_manager import CommandScheduler
+
+
+def _deadline(seconds: float = 1.0) -> float:
+    return asyncio.get_running_loop().time() + seconds
+
+
+async def _admit_in_order(scheduler, commands):
+    """Queue `commands` behind a held slot and return the admission order."""
+    order = []
+
+    async def run(name, deadline):
+        await scheduler.acquire(name, deadline)
+        order.append(name)
+        scheduler.release()
+
+    tasks = [asyncio.create_task(run(name, deadline)) for name, deadline in commands]
+    await asyncio.sleep(0.01)
+    scheduler.release()
+    await asyncio.gather(*tasks)
+    return order
+
+
+class TestCommandScheduler:
+    async def test_free_slot_admits_immediately(self):
+        scheduler = CommandScheduler(max_in_flight=2)
+        await scheduler.acquire("PING", _deadline())
+        await scheduler.acquire("PING", _deadline())
+        assert scheduler.stats()["in_flight"] == 2
+        scheduler.release()
+        scheduler.release()
+        assert scheduler.stats()["in_flight"] == 0
+
+    async def test_priority_classes_admitted_highest_first(self):
+        scheduler = CommandScheduler(max_in_flight=1)
+        await scheduler.acquire("SORT_STATUS", _deadline())
+        order = await _admit_in_order(scheduler, [
+            ("PING", _deadline()),
+            ("SORT_STATUS", _deadline()),
+            ("SECURITY_STATUS", _deadline()),
+            ("DISPENSE", _deadline()),
+        ])
+        assert order == ["DISPENSE", "SECURITY_STATUS", "SORT_STATUS", "PING"]
+
+    async def test_earliest_deadline_first_within_class(self):
+        scheduler = CommandScheduler(max_in_flight=1)
+        await scheduler.acquire("PING", _deadline())
+        order = await _admit_in_order(scheduler, [
+            ("SORT", _deadline(5.0)),
+            ("DISPENSE", _deadline(1.0)),
+            ("COIN_CHANGE", _deadline(3.0)),
+        ])
+        assert order == ["DISPENSE", "COIN_CHANGE", "SORT"]
+
+    async def test_expired_waiter_times_out_and_frees_nothing(self):
+        scheduler = CommandScheduler(max_in_flight=1)
+        await scheduler.acquire("DISPENSE", _deadline())
+        with pytest.raises(asyncio.TimeoutError):
+            await scheduler.acquire("PING", _deadline(0.02))
+
+        stats = scheduler.stats()
+        assert stats["classes"]["diagnostics"]["expired"] == 1
+        assert stats["queued"] == 0
+        scheduler.release()
+        assert scheduler.stats()["in_flight"] == 0
+
+    async def test_slot_handed_over_as_deadline_expires_is_returned(
+        self, monkeypatch
+    ):
+        scheduler = CommandScheduler(max_in_flight=1)
+        await scheduler.acquire("DISPENSE", _deadline())
+
+        async def handoff_then_timeout(future, timeout):
+            # The holder releases in the same iteration the deadline fires
+            scheduler.release()
+            assert future.done()
+            raise asyncio.TimeoutError
+
+        monkeypatch.setattr(asyncio, "wait_for", handoff_then_timeout)
+        with pytest.raises(asyncio.TimeoutError):
+            await scheduler.acquire("PING", _deadline())
+
+        assert scheduler.stats()["in_flight"] == 0
+        assert scheduler.stats()["queued"] == 0
+
+    async def test_cancelled_waiter_is_skipped(self):
+        scheduler = CommandScheduler(max_in_flight=1)
+        await scheduler.acquire("DISPENSE", _deadline())
+        waiter = asyncio.create_task(scheduler.acquire("PING", _deadline()))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        scheduler.release()
+        await scheduler.acquire("PING", _deadline(0.1))
+        assert scheduler.stats()["in_flight"] == 1
+
+    async def test_wait_metrics_recorded(self):
+        scheduler = CommandScheduler(max_in_flight=1)
+        await scheduler.acquire("DISPENSE", _deadline())
+        waiter = asyncio.create_task(scheduler.acquire("PING", _deadline()))
+        await asyncio.sleep(0.05)
+        scheduler.release()
+        await waiter
+
+        diagnostics = scheduler.stats()["classes"]["diagnostics"]
+        assert diagnostics["admitted"] == 1
+        assert diagnostics["max_wait_ms"] >= 40
+        assert scheduler.stats()["classes"]["payout"]["max_wait_ms"] == 0.0
+
+    def test_unknown_command_scheduled_as_status(self):
+        assert CommandScheduler.priority_class("SELF_TEST") == "status"
+        assert CommandScheduler.priority_class("COIN_DISPENSE") == "payout"
@@ -17,6 +17,9 @@ class TestSettings:
         assert s.low_bill_threshold == 10
         assert s.low_coin_threshold == 50
         assert s.session_timeout == 180
+        # Opt-in: the WAL profiles convert the database file
+        assert s.sqlite_profile == "default"
+        assert s.sqlite_busy_timeout_ms is None
 
     def test_mock_serial_flag(self):
         s = Settings(
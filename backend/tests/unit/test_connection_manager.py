@@ -0,0 +1,369 @@
+import asyncio
+import json
+
+import pytest
+
+from app.api.ws import DEFAULT_TOPICS, ConnectionManager, parse_topics
+from app.models.events import WSEvent, WSEventType
+
+
+class FakeSocket:
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.received = []
+        self.closed_with = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message: str):
+        if self.fail:
+            raise RuntimeError("connection reset")
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.received.append(json.loads(message))
+
+    async def close(self, code: int = 1000):
+        self.closed_with = code
+
+
+def _event(total: int) -> WSEvent:
+    return WSEvent(type=WSEventType.COIN_INSERTED, payload={"total": total})
+
+
+async def _settle():
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+class TestConnectionManager:
+    async def test_broadcast_reaches_all_clients(self):
+        manager = ConnectionManager()
+        sockets = [FakeSocket(), FakeSocket()]
+        for socket in sockets:
+            await manager.connect(socket)
+
+        await manager.broadcast(_event(5))
+        await _settle()
+
+        assert [s.received[0]["payload"]["total"] for s in sockets] == [5, 5]
+        await manager.shutdown()
+
+    async def test_slow_client_does_not_block_others(self):
+        manager = ConnectionManager(send_timeout=5.0)
+        slow, fast = FakeSocket(delay=1.0), FakeSocket()
+        await manager.connect(slow)
+        await manager.connect(fast)
+
+        start = asyncio.get_running_loop().time()
+        for total in range(3):
+            await manager.broadcast(_event(total))
+        assert asyncio.get_running_loop().time() - start < 0.1
+        await _settle()
+
+        assert [m["payload"]["total"] for m in fast.received] == [0, 1, 2]
+        assert slow.received == []
+        await manager.shutdown()
+
+    async def test_full_queue_evicts_client(self):
+        manager = ConnectionManager(send_queue_size=2, send_timeout=5.0)
+        stuck = FakeSocket(delay=10.0)
+        await manager.connect(stuck)
+        await _settle()
+
+        for total in range(4):
+            await manager.broadcast(_event(total))
+        await _settle()
+
+        assert manager.client_count == 0
+        assert manager.evictions == 1
+        assert stuck.closed_with == 1013
+
+    async def test_drop_oldest_policy_keeps_newest(self):
+        manager = ConnectionManager(send_queue_size=2, slow_client_policy="drop_oldest")
+        socket = FakeSocket()
+        await manager.connect(socket)
+
+        # Nothing is sent until the writer task runs
+        for total in range(5):
+            await manager.broadcast(_event(total))
+        await _settle()
+
+        assert [m["payload"]["total"] for m in socket.received] == [3, 4]
+        assert manager.dropped == 3
+        assert manager.stats()["clients"][0]["dropped"] == 3
+        await manager.shutdown()
+
+    async def test_send_timeout_evicts_client(self):
+        manager = ConnectionManager(send_timeout=0.05)
+        socket = FakeSocket(delay=1.0)
+        await manager.connect(socket)
+
+        await manager.broadcast(_event(1))
+        await asyncio.sleep(0.1)
+
+        assert manager.client_count == 0
+        assert socket.closed_with == 1013
+
+    async def test_failed_send_removes_client(self):
+        manager = ConnectionManager()
+        await manager.connect(FakeSocket(fail=True))
+        await manager.broadcast(_event(1))
+        await _settle()
+        assert manager.client_count == 0
+        assert manager.evictions == 0
+
+    async def test_disconnect_stops_writer(self):
+        manager = ConnectionManager()
+        socket = FakeSocket()
+        await manager.connect(socket)
+        manager.disconnect(socket)
+        await manager.broadcast(_event(1))
+        await _settle()
+        assert socket.received == []
+        manager.disconnect(socket)  # idempotent
+
+    async def test_stats(self):
+        manager = ConnectionManager(send_queue_size=8)
+        await manager.connect(FakeSocket())
+        await manager.broadcast(_event(1))
+        stats = manager.stats()
+        assert stats["queue_size"] == 8
+        assert stats["broadcasts"] == 1
+        assert stats["clients"][0]["queued"] == 1
+        await _settle()
+        assert manager.stats()["clients"][0]["sent"] == 1
+        await manager.shutdown()
+
+    def test_unknown_policy_rejected(self):
+        with pytest.raises(ValueError, match="slow client policy"):
+            ConnectionManager(slow_client_policy="block")
+
+
+def _batch(*event_types: WSEventType) -> WSEvent:
+    return WSEvent(
+        type=WSEventType.EVENT_BATCH,
+        payload={"events": [
+            {"type": event_type.value, "payload": {"n": n}}
+            for n, event_type in enumerate(event_types)
+        ]},
+    )
+
+
+class TestTopicRouting:
+    async def test_clients_subscribe_to_default_topics(self):
+        manager = ConnectionManager()
+        socket = FakeSocket()
+        await manager.connect(socket)
+
+        await manager.broadcast(WSEvent(type=WSEventType.TAMPER))
+        await manager.broadcast(_event(1))
+        await _settle()
+
+        assert [m["type"] for m in socket.received] == ["TAMPER", "COIN_INSERTED"]
+        assert manager.stats()["clients"][0]["topics"] == sorted(DEFAULT_TOPICS)
+        await manager.shutdown()
+
+    async def test_opt_in_topics_not_subscribed_by_default(self):
+        manager = ConnectionManager()
+        socket = FakeSocket()
+        await manager.connect(socket)
+        await manager.broadcast(WSEvent(type=WSEventType.STATE_PATCH))
+        await _settle()
+        assert socket.received == []
+        await manager.shutdown()
+
+    async def test_event_only_reaches_subscribed_clients(self):
+        manager = ConnectionManager()
+        kiosk, admin = FakeSocket(), FakeSocket()
+        await manager.connect(kiosk, frozenset({"cash", "transaction"}))
+        await manager.connect(admin, frozenset({"security"}))
+
+        await manager.broadcast(_event(1))
+        await manager.broadcast(WSEvent(type=WSEventType.TAMPER))
+        await _settle()
+
+        assert [m["type"] for m in kiosk.received] == ["COIN_INSERTED"]
+        assert [m["type"] for m in admin.received] == ["TAMPER"]
+        assert manager.filtered == 2
+        await manager.shutdown()
+
+    async def test_subscribe_and_unsubscribe(self):
+        manager = ConnectionManager()
+        socket = FakeSocket()
+        await manager.connect(socket, frozenset())
+
+        assert manager.subscribe(socket, ["security"]) == ["security"]
+        await manager.broadcast(WSEvent(type=WSEventType.TAMPER))
+        assert manager.unsubscribe(socket, ["security"]) == []
+        await manager.broadcast(WSEvent(type=WSEventType.TAMPER))
+        await _settle()
+
+        assert len(socket.received) == 1
+        await manager.shutdown()
+
+    async def test_unknown_topic_rejected(self):
+        manager = ConnectionManager()
+        socket = FakeSocket()
+        await manager.connect(socket)
+        with pytest.raises(ValueError, match="Unknown WebSocket topic: bogus"):
+            manager.subscribe(socket, ["bogus"])
+        assert manager.stats()["clients"][0]["topics"] == sorted(DEFAULT_TOPICS)
+        await manager.shutdown()
+
+    async def test_batch_trimmed_per_subscription(self):
+        manager = ConnectionManager()
+        everything, cash, device = FakeSocket(), FakeSocket(), FakeSocket()
+        await manager.connect(everything)
+        await manager.connect(cash, frozenset({"cash"}))
+        await manager.connect(device, frozenset({"device"}))
+
+        await manager.broadcast(_batch(
+            WSEventType.COIN_INSERTED,
+            WSEventType.TAMPER,
+            WSEventType.COIN_INSERTED,
+        ))
+        await _settle()
+
+        assert len(everything.received[0]["payload"]["events"]) == 3
+        assert cash.received[0]["type"] == "EVENT_BATCH"
+        entries = cash.received[0]["payload"]["events"]
+        assert [e["payload"]["n"] for e in entries] == [0, 2]
+        assert device.received == []
+        await manager.shutdown()
+
+    async def test_batch_with_one_wanted_entry_sent_as_plain_event(self):
+        manager = ConnectionManager()
+        socket = FakeSocket()
+        await manager.connect(socket, frozenset({"security"}))
+
+        await manager.broadcast(
+            _batch(WSEventType.COIN_INSERTED, WSEventType.TAMPER)
+        )
+        await _settle()
+
+        assert socket.received[0]["type"] == "TAMPER"
+        assert socket.received[0]["payload"] == {"n": 1}
+        await manager.shutdown()
+
+    async def test_send_ignores_topics(self):
+        manager = ConnectionManager()
+        socket = FakeSocket()
+        await manager.connect(socket, frozenset())
+        await manager.send(socket, WSEvent(type=WSEventType.SUBSCRIPTIONS))
+        await _settle()
+        assert socket.received[0]["type"] == "SUBSCRIPTIONS"
+        await manager.shutdown()
+
+    def test_every_broadcast_event_type_has_a_topic(self):
+        from app.models.events import EVENT_TOPICS
+
+        unrouted = set(WSEventType) - set(EVENT_TOPICS)
+        assert unrouted == {
+            WSEventType.EVENT_BATCH,
+            WSEventType.SUBSCRIPTIONS,
+            WSEventType.HELLO,
+            WSEventType.STATE_SNAPSHOT,
+        }
+
+    def test_parse_topics(self):
+        assert parse_topics(["cash", "cash"]) == frozenset({"cash"})
+
+
+class TestReplay:
+    async def _history(self, manager, count):
+        for total in range(1, count + 1):
+            await manager.broadcast(_event(total))
+
+    async def test_broadcasts_are_stamped_with_increasing_seq(self):
+        manager = ConnectionManager()
+        socket = FakeSocket()
+        await manager.connect(socket)
+        await self._history(manager, 3)
+        await _settle()
+        assert [m["seq"] for m in socket.received] == [1, 2, 3]
+        await manager.shutdown()
+
+    async def test_resume_replays_missed_events_then_hello(self):
+        manager = ConnectionManager()
+        await self._history(manager, 5)
+
+        socket = FakeSocket()
+        await manager.connect(socket, resume_from=2, stream=manager.stream_id)
+        await manager.broadcast(_event(6))
+        await _settle()
+
+        replay, hello, live = socket.received
+        assert replay["type"] == "EVENT_BATCH"
+        assert replay["payload"]["replay"] is True
+        assert [e["seq"] for e in replay["payload"]["events"]] == [3, 4, 5]
+        assert hello["type"] == "HELLO"
+        assert hello["payload"] == {
+            "stream": manager.stream_id, "seq": 5, "replayed": 3, "gap": False,
+        }
+        assert live["seq"] == 6
+        await manager.shutdown()
+
+    async def test_resume_when_up_to_date_sends_only_hello(self):
+        manager = ConnectionManager()
+        await self._history(manager, 2)
+        socket = FakeSocket()
+        await manager.connect(socket, resume_from=2, stream=manager.stream_id)
+        await _settle()
+        assert [m["type"] for m in socket.received] == ["HELLO"]
+        assert socket.received[0]["payload"]["gap"] is False
+        await manager.shutdown()
+
+    async def test_buffer_overrun_reports_gap(self):
+        manager = ConnectionManager(replay_buffer_size=3)
+        await self._history(manager, 10)
+        socket = FakeSocket()
+        await manager.connect(socket, resume_from=2, stream=manager.stream_id)
+        await _settle()
+
+        replay, hello = socket.received
+        assert [e["seq"] for e in replay["payload"]["events"]] == [8, 9, 10]
+        assert hello["payload"]["gap"] is True
+
+    async def test_other_stream_is_not_replayed(self):
+        manager = ConnectionManager()
+        await self._history(manager, 3)
+        socket = FakeSocket()
+        # e.g. the backend restarted since the client's last event
+        await manager.connect(socket, resume_from=1, stream="0ld5tream")
+        await _settle()
+
+        (hello,) = socket.received
+        assert hello["payload"]["replayed"] == 0
+        assert hello["payload"]["gap"] is True
+        assert hello["payload"]["stream"] == manager.stream_id
+        await manager.shutdown()
+
+    async def test_replay_respects_topics(self):
+        manager = ConnectionManager()
+        await manager.broadcast(_event(1))
+        await manager.broadcast(WSEvent(type=WSEventType.TAMPER))
+        await manager.broadcast(_batch(WSEventType.TAMPER, WSEventType.COIN_INSERTED))
+
+        socket = FakeSocket()
+        await manager.connect(
+            socket, frozenset({"security"}), resume_from=0, stream=manager.stream_id
+        )
+        await _settle()
+
+        entries = socket.received[0]["payload"]["events"]
+        assert [(e["type"], e["seq"]) for e in entries] == [
+            ("TAMPER", 2),
+            ("TAMPER", 3),
+        ]
+        await manager.shutdown()
+
+    async def test_connect_without_resume_sends_nothing(self):
+        manager = ConnectionManager()
+        await self._history(manager, 3)
+        socket = FakeSocket()
+        await manager.connect(socket)
+        await _settle()
+        assert socket.received == []
+        await manager.shutdown()
@@ -0,0 +1,151 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.database import (
+    SQLITE_PROFILES,
+    apply_sqlite_pragmas,
+    checkpoint_wal,
+    sqlite_pragmas,
+)
+
+
+@pytest.fixture
+async def make_engine(tmp_path):
+    engines = []
+
+    def _make(profile: str, **overrides):
+        engine = create_async_engine(
+            f"sqlite+aiosqlite:///{tmp_path / f'{profile}.db'}"
+        )
+        apply_sqlite_pragmas(engine, sqlite_pragmas(profile, **overrides))
+        engines.append(engine)
+        return engine
+
+    yield _make
+    for engine in engines:
+        await engine.dispose()
+
+
+async def _pragma(engine, name: str):
+    async with engine.connect() as conn:
+        return (await conn.execute(text(f"PRAGMA {name}"))).scalar()
+
+
+class TestSqlitePragmas:
+    def test_unknown_profile_raises(self):
+        with pytest.raises(ValueError, match="Unknown SQLite profile"):
+            sqlite_pragmas("turbo")
+
+    def test_unknown_synchronous_mode_raises(self):
+        with pytest.raises(ValueError, match="Unknown SQLite synchronous mode"):
+            sqlite_pragmas("durable", synchronous="sometimes")
+
+    def test_overrides_replace_profile_values(self):
+        pragmas = sqlite_pragmas(
+            "balanced", synchronous="full", mmap_size=0, busy_timeout_ms=250
+        )
+        assert pragmas["journal_mode"] == "WAL"
+        assert pragmas["synchronous"] == "FULL"
+        assert pragmas["mmap_size"] == 0
+        assert pragmas["cache_size"] == SQLITE_PROFILES["balanced"]["cache_size"]
+        assert pragmas["busy_timeout"] == 250
+
+    def test_default_profile_sets_nothing(self):
+        assert sqlite_pragmas("default") == {}
+
+    def test_wal_profiles_wait_on_locks(self):
+        assert sqlite_pragmas("durable")["busy_timeout"] == 5000
+
+
+class TestApplySqlitePragmas:
+    async def test_wal_profile_applied_on_connect(self, make_engine):
+        engine = make_engine("balanced", busy_timeout_ms=1234)
+
+        assert await _pragma(engine, "journal_mode") == "wal"
+        # 0=OFF 1=NORMAL 2=FULL
+        assert await _pragma(engine, "synchronous") == 1
+        assert await _pragma(engine, "cache_size") == -8192
+        assert await _pragma(engine, "busy_timeout") == 1234
+
+    async def test_default_profile_keeps_rollback_journal(self, make_engine):
+        engine = make_engine("default")
+
+        assert await _pragma(engine, "journal_mode") == "delete"
+        assert await _pragma(engine, "synchronous") == 2
+
+
+class TestCheckpointWal:
+    async def test_checkpoints_wal(self, make_engine):
+        engine = make_engine("durable")
+        async with engine.begin() as conn:
+            await conn.execute(text("CREATE TABLE t (x INTEGER)"))
+            await conn.execute(text("INSERT INTO t VALUES (1)"))
+
+        busy, log, checkpointed = await checkpoint_wal(engine, "TRUNCATE")
+
+        assert busy == 0
+        assert log == checkpointed
+
+    async def test_none_without_wal(self, make_engine):
+        engine = make_engine("default")
+
+        assert await checkpoint_wal(engine) is None
+
+
+class TestWalEntryIndexes:
+    async def test_recovery_and_history_queries_use_indexes(self, make_engine):
+        from app.models.db_models import Base
+
+        engine = make_engine("default")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            pending = (await conn.execute(text(
+                "EXPLAIN QUERY PLAN SELECT * FROM wal_entries "
+                "WHERE status = 'PENDING'"
+            ))).all()
+            history = (await conn.execute(text(
+                "EXPLAIN QUERY PLAN SELECT * FROM wal_entries "
+                "WHERE transaction_id = 'tx' ORDER BY created_at"
+            ))).all()
+
+        assert "ix_wal_entries_status" in str(pending)
+        assert "ix_wal_entries_transaction_created" in str(history)
+
+
+class TestCheckpointTask:
+    @pytest.fixture
+    def init_with(self, tmp_path, monkeypatch):
+        from app.core import database
+        from app.core.config import Settings
+
+        def _configure(profile: str):
+            settings = Settings(
+                db_url=f"sqlite+aiosqlite:///{tmp_path / f'{profile}.db'}",
+                sqlite_profile=profile,
+                sqlite_checkpoint_interval=60,
+            )
+            monkeypatch.setattr(database, "get_settings", lambda: settings)
+            monkeypatch.setattr(database, "_engine", None)
+            monkeypatch.setattr(database, "_session_factory", None)
+            monkeypatch.setattr(database, "_checkpoint_task", None)
+            return database
+
+        return _configure
+
+    async def test_started_in_wal_mode(self, init_with):
+        database = init_with("durable")
+        await database.init_db()
+        try:
+            assert database._checkpoint_task is not None
+        finally:
+            await database.close_db()
+        assert database._checkpoint_task is None
+
+    async def test_not_started_without_wal(self, init_with):
+        database = init_with("default")
+        await database.init_db()
+        try:
+            assert database._checkpoint_task is None
+        finally:
+            await database.close_db()
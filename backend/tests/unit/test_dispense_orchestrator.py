@@ -4,6 +4,8 @@ Validates bill/coin dispensing coordination, partial dispense recovery
 with claim ticket generation, and progress event broadcasting.
 """
 
+import asyncio
+
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 
@@ -343,3 +345,310 @@ class TestProgressBroadcast:
         assert event.type == WSEventType.DISPENSE_COMPLETE
         assert event.payload["success"] is False
         assert event.payload["claim_ticket_code"] is not None
+
+
+# ---------------------------------------------------------------------------
+# Test: COIN_CHANGE offload
+# ---------------------------------------------------------------------------
+
+class TestCoinChangeOffload:
+    @pytest.fixture
+    def offload_orchestrator(
+        self, bill_controller, coin_controller, machine_status, ws_manager
+    ):
+        return DispenseOrchestrator(
+            bill_controller=bill_controller,
+            coin_controller=coin_controller,
+            machine_status=machine_status,
+            ws_manager=ws_manager,
+            coin_change_offload=True,
+        )
+
+    async def test_greedy_coin_portion_uses_single_command(
+        self, offload_orchestrator, bill_controller, coin_controller, machine_status
+    ):
+        bill_controller.dispense.return_value = MagicMock(dispensed=1)
+        coin_controller.coin_change.return_value = MagicMock(
+            breakdown={"20": 1, "5": 1, "1": 2}
+        )
+
+        plan = _mixed_plan(
+            {"PHP_100": (1, 100)},
+            {"PHP_20": (1, 20), "PHP_5": (1, 5), "PHP_1": (2, 1)},
+        )
+        result = await offload_orchestrator.execute_dispense(plan)
+
+        assert result.success is True
+        assert result.total_dispensed == 127
+        assert result.dispensed_coins == {"PHP_20": 1, "PHP_5": 1, "PHP_1": 2}
+        coin_controller.coin_change.assert_called_once_with(27)
+        coin_controller.coin_dispense.assert_not_called()
+        snap = machine_status.snapshot()
+        assert snap.consumables.coin_counts["PHP_1"] == 198
+
+    async def test_non_greedy_coin_portion_dispensed_per_denom(
+        self, offload_orchestrator, coin_controller
+    ):
+        coin_controller.coin_dispense.return_value = MagicMock(dispensed=3)
+
+        # Greedy firmware would pay 30 as 20 + 10
+        plan = _coin_plan({"PHP_10": (3, 10)})
+        result = await offload_orchestrator.execute_dispense(plan)
+
+        assert result.success is True
+        coin_controller.coin_change.assert_not_called()
+        coin_controller.coin_dispense.assert_called_once_with(10, 3)
+
+    async def test_disabled_by_default(self, orchestrator, coin_controller):
+        coin_controller.coin_dispense.return_value = MagicMock(dispensed=1)
+
+        plan = _coin_plan({"PHP_5": (1, 5)})
+        await orchestrator.execute_dispense(plan)
+
+        coin_controller.coin_change.assert_not_called()
+
+    async def test_partial_breakdown_falls_back_for_remainder(
+        self, offload_orchestrator, coin_controller
+    ):
+        coin_controller.coin_change.return_value = MagicMock(
+            breakdown={"20": 2, "5": 1}
+        )
+        coin_controller.coin_dispense.return_value = MagicMock(dispensed=3)
+
+        plan = _coin_plan({"PHP_20": (2, 20), "PHP_5": (1, 5), "PHP_1": (3, 1)})
+        result = await offload_orchestrator.execute_dispense(plan)
+
+        assert result.success is True
+        assert result.total_dispensed == 48
+        assert result.dispensed_coins == {"PHP_20": 2, "PHP_5": 1, "PHP_1": 3}
+        coin_controller.coin_dispense.assert_called_once_with(1, 3)
+
+    async def test_substituted_coins_are_not_paid_again(
+        self, offload_orchestrator, coin_controller, machine_status
+    ):
+        # Planned 10 + 1; the firmware paid 5 + 5 + 1 instead
+        coin_controller.coin_change.return_value = MagicMock(
+            breakdown={"5": 2, "1": 1}
+        )
+
+        plan = _coin_plan({"PHP_10": (1, 10), "PHP_1": (1, 1)})
+        result = await offload_orchestrator.execute_dispense(plan)
+
+        assert result.success is True
+        assert result.total_dispensed == 11
+        assert result.dispensed_coins == {"PHP_5": 2, "PHP_1": 1}
+        coin_controller.coin_dispense.assert_not_called()
+        snap = machine_status.snapshot()
+        assert snap.consumables.coin_counts["PHP_10"] == 200
+        assert snap.consumables.coin_counts["PHP_5"] == 198
+        assert snap.consumables.coin_counts["PHP_1"] == 199
+
+    async def test_substituted_remainder_never_overpays(
+        self, offload_orchestrator, coin_controller
+    ):
+        # 6 of 11 paid with a substituted 5; the reserved 10 would overpay
+        coin_controller.coin_change.return_value = MagicMock(
+            breakdown={"5": 1, "1": 1}
+        )
+
+        plan = _coin_plan({"PHP_10": (1, 10), "PHP_1": (1, 1)})
+        result = await offload_orchestrator.execute_dispense(plan)
+
+        assert result.success is False
+        assert result.total_dispensed == 6
+        assert result.shortfall == 5
+        assert result.claim_ticket_code is not None
+        coin_controller.coin_dispense.assert_not_called()
+
+    async def test_overpay_reports_no_negative_shortfall(
+        self, offload_orchestrator, coin_controller, ws_manager
+    ):
+        coin_controller.coin_change.return_value = MagicMock(
+            breakdown={"10": 1, "5": 2}
+        )
+
+        plan = _coin_plan({"PHP_10": (1, 10), "PHP_5": (1, 5)})
+        result = await offload_orchestrator.execute_dispense(plan)
+
+        assert result.success is False
+        assert result.error == "Coin change overpaid by 5"
+        assert result.total_dispensed == 20
+        assert result.shortfall == 0
+        assert result.claim_ticket_code is None
+        complete = ws_manager.broadcast.call_args_list[-1].args[0]
+        assert complete.payload["shortfall"] == 0
+
+    async def test_progress_counts_only_paid_items(
+        self, offload_orchestrator, coin_controller, ws_manager
+    ):
+        # 6 of 11 paid; the 10 is neither paid nor retried
+        coin_controller.coin_change.return_value = MagicMock(
+            breakdown={"5": 1, "1": 1}
+        )
+
+        plan = _coin_plan({"PHP_10": (1, 10), "PHP_1": (1, 1)})
+        await offload_orchestrator.execute_dispense(plan)
+
+        progress = [
+            call.args[0]
+            for call in ws_manager.broadcast.call_args_list
+            if call.args[0].type == WSEventType.DISPENSE_PROGRESS
+        ]
+        assert progress[-1].payload["completed_items"] == 0
+        assert progress[-1].payload["dispensed_amount"] == 6
+
+    async def test_jam_attributes_coins_largest_first(
+        self, offload_orchestrator, coin_controller, machine_status
+    ):
+        # 3 coins out before the jam: both 20s and the 5
+        coin_controller.coin_change.side_effect = HardwareError(
+            code="JAM", message="Coin stuck", dispensed=3
+        )
+        coin_controller.coin_dispense.side_effect = HardwareError(
+            code="JAM", message="Coin stuck", dispensed=0
+        )
+
+        plan = _coin_plan({"PHP_20": (2, 20), "PHP_5": (1, 5), "PHP_1": (3, 1)})
+        result = await offload_orchestrator.execute_dispense(plan)
+
+        assert result.success is False
+        assert result.dispensed_coins == {"PHP_20": 2, "PHP_5": 1, "PHP_1": 0}
+        assert result.total_dispensed == 45
+        assert result.shortfall == 3
+        assert result.claim_ticket_code is not None
+        coin_controller.coin_dispense.assert_called_once_with(1, 3)
+        # Undispensed PHP_1 coins are returned to inventory
+        snap = machine_status.snapshot()
+        assert snap.consumables.coin_counts["PHP_1"] == 200
+        assert snap.consumables.coin_counts["PHP_20"] == 198
+
+    async def test_progress_reported_for_offloaded_items(
+        self, offload_orchestrator, coin_controller, ws_manager
+    ):
+        coin_controller.coin_change.return_value = MagicMock(
+            breakdown={"10": 1, "5": 1}
+        )
+
+        plan = _coin_plan({"PHP_10": (1, 10), "PHP_5": (1, 5)})
+        await offload_orchestrator.execute_dispense(plan)
+
+        progress = [
+            call.args[0]
+            for call in ws_manager.broadcast.call_args_list
+            if call.args[0].type == WSEventType.DISPENSE_PROGRESS
+        ]
+        assert len(progress) == 1
+        assert progress[0].payload["completed_items"] == 2
+        assert progress[0].payload["total_items"] == 2
+
+
+# ---------------------------------------------------------------------------
+# Test: Parallel bill + coin dispensing
+# ---------------------------------------------------------------------------
+
+class TestParallelDispense:
+    @pytest.fixture
+    def parallel_orchestrator(
+        self, bill_controller, coin_controller, machine_status, ws_manager
+    ):
+        return DispenseOrchestrator(
+            bill_controller=bill_controller,
+            coin_controller=coin_controller,
+            machine_status=machine_status,
+            ws_manager=ws_manager,
+            parallel_dispense=True,
+        )
+
+    async def test_bills_and_coins_overlap(
+        self, parallel_orchestrator, bill_controller, coin_controller
+    ):
+        calls = []
+
+        async def slow_bill(denom, count):
+            calls.append("bill-start")
+            await asyncio.sleep(0.05)
+            calls.append("bill-end")
+            return MagicMock(dispensed=count)
+
+        async def slow_coin(denom, count):
+            calls.append("coin-start")
+            await asyncio.sleep(0.05)
+            calls.append("coin-end")
+            return MagicMock(dispensed=count)
+
+        bill_controller.dispense.side_effect = slow_bill
+        coin_controller.coin_dispense.side_effect = slow_coin
+
+        plan = _mixed_plan({"PHP_100": (2, 100)}, {"PHP_5": (3, 5)})
+        result = await parallel_orchestrator.execute_dispense(plan)
+
+        assert result.success is True
+        assert result.total_dispensed == 215
+        assert calls[:2] == ["bill-start", "coin-start"]
+
+    async def test_bill_jam_does_not_stop_coins(
+        self, parallel_orchestrator, bill_controller, coin_controller, machine_status
+    ):
+        bill_controller.dispense.side_effect = HardwareError(
+            code="JAM", message="Jam on first bill", dispensed=1
+        )
+        coin_controller.coin_dispense.return_value = MagicMock(dispensed=5)
+
+        plan = _mixed_plan({"PHP_100": (2, 100)}, {"PHP_10": (5, 10)})
+        result = await parallel_orchestrator.execute_dispense(plan)
+
+        assert result.success is False
+        assert result.dispensed_bills == {"PHP_100": 1}
+        assert result.dispensed_coins == {"PHP_10": 5}
+        assert result.total_dispensed == 150
+        assert result.shortfall == 100
+        assert result.claim_ticket_code is not None
+        assert "Partial bill dispense" in result.error
+        snap = machine_status.snapshot()
+        assert snap.consumables.bill_dispenser_counts["PHP_100"] == 49
+        assert snap.consumables.coin_counts["PHP_10"] == 195
+
+    async def test_errors_from_both_sides_reported(
+        self, parallel_orchestrator, bill_controller, coin_controller
+    ):
+        bill_controller.dispense.side_effect = HardwareError(
+            code="JAM", message="Jam", dispensed=0
+        )
+        coin_controller.coin_dispense.side_effect = RuntimeError("port closed")
+
+        plan = _mixed_plan({"PHP_50": (1, 50)}, {"PHP_1": (2, 1)})
+        result = await parallel_orchestrator.execute_dispense(plan)
+
+        assert result.success is False
+        assert result.shortfall == 52
+        assert "Partial bill dispense" in result.error
+        assert "port closed" in result.error
+
+    async def test_progress_counts_all_items(
+        self, parallel_orchestrator, bill_controller, coin_controller, ws_manager
+    ):
+        bill_controller.dispense.return_value = MagicMock(dispensed=1)
+        coin_controller.coin_dispense.return_value = MagicMock(dispensed=1)
+
+        plan = _mixed_plan(
+            {"PHP_100": (1, 100), "PHP_50": (1, 50)}, {"PHP_5": (1, 5)}
+        )
+        await parallel_orchestrator.execute_dispense(plan)
+
+        progress = [
+            call.args[0].payload["completed_items"]
+            for call in ws_manager.broadcast.call_args_list
+            if call.args[0].type == WSEventType.DISPENSE_PROGRESS
+        ]
+        assert sorted(progress) == [1, 2, 3]
+
+    async def test_single_kind_plan_runs_sequentially(
+        self, parallel_orchestrator, coin_controller
+    ):
+        coin_controller.coin_dispense.return_value = MagicMock(dispensed=2)
+
+        plan = _coin_plan({"PHP_5": (2, 5)})
+        result = await parallel_orchestrator.execute_dispense(plan)
+
+        assert result.success is True
+        assert result.total_dispensed == 10
@@ -148,3 +148,123 @@ class TestReadyEvent:
 
         call_args = ws_manager.broadcast.call_args[0][0]
         assert call_args.type == WSEventType.DEVICE_CONNECTED
+
+
+class TestLinkEvents:
+    async def test_disconnect_updates_device(
+        self, dispatcher, event_queue, machine_status, ws_manager
+    ):
+        event_data = {
+            "event": "DEVICE_DISCONNECTED", "controller": "BILL",
+            "reason": "read failed: device disconnected",
+            "_controller": "BILL",
+        }
+        await dispatcher._handle_event(event_data)
+
+        snap = machine_status.snapshot()
+        assert snap.bill_device.connection.value == "disconnected"
+        assert snap.bill_device.last_error == "read failed: device disconnected"
+        call_args = ws_manager.broadcast.call_args[0][0]
+        assert call_args.type == WSEventType.DEVICE_DISCONNECTED
+        assert call_args.payload["controller"] == "BILL"
+
+    async def test_reconnect_updates_device(
+        self, dispatcher, event_queue, machine_status, ws_manager
+    ):
+        await dispatcher._handle_event({
+            "event": "DEVICE_DISCONNECTED", "controller": "COIN_SECURITY",
+            "_controller": "COIN_SECURITY",
+        })
+        await dispatcher._handle_event({
+            "event": "DEVICE_CONNECTED", "controller": "COIN_SECURITY",
+            "attempts": 3, "_controller": "COIN_SECURITY",
+        })
+
+        snap = machine_status.snapshot()
+        assert snap.coin_device.connection.value == "connected"
+        call_args = ws_manager.broadcast.call_args[0][0]
+        assert call_args.type == WSEventType.DEVICE_CONNECTED
+        assert call_args.payload["attempts"] == 3
+
+
+class TestBatchMode:
+    @pytest.fixture
+    def batch_dispatcher(self, event_queue, machine_status, ws_manager):
+        return EventDispatcher(
+            event_queue, machine_status, ws_manager, batch_size=64
+        )
+
+    async def test_batch_sends_one_coalesced_message(
+        self, batch_dispatcher, machine_status, ws_manager
+    ):
+        await batch_dispatcher._handle_batch([
+            {"event": "COIN_IN", "denom": 5, "total": 5, "_controller": "COIN_SECURITY"},
+            {"event": "COIN_IN", "denom": 10, "total": 15, "_controller": "COIN_SECURITY"},
+            {"event": "KEYPAD", "key": "1", "_controller": "COIN_SECURITY"},
+            {"event": "DOOR_STATE", "locked": False, "_controller": "COIN_SECURITY"},
+        ])
+
+        ws_manager.broadcast.assert_called_once()
+        event = ws_manager.broadcast.call_args[0][0]
+        assert event.type == WSEventType.EVENT_BATCH
+        assert event.payload["events"] == [
+            {"type": "COIN_INSERTED", "payload": {"denom": 5, "total": 5}},
+            {"type": "COIN_INSERTED", "payload": {"denom": 10, "total": 15}},
+            {"type": "STATE_CHANGE", "payload": {"door_locked": False}},
+        ]
+        snap = machine_status.snapshot()
+        assert snap.consumables.coin_counts["PHP_5"] == 1
+        assert snap.consumables.coin_counts["PHP_10"] == 1
+        assert snap.security.locked is False
+
+    async def test_single_event_batch_sent_unwrapped(
+        self, batch_dispatcher, ws_manager
+    ):
+        await batch_dispatcher._handle_batch([
+            {"event": "TAMPER", "sensor": "B", "_controller": "COIN_SECURITY"},
+        ])
+        event = ws_manager.broadcast.call_args[0][0]
+        assert event.type == WSEventType.TAMPER
+        assert event.payload == {"sensor": "B"}
+
+    async def test_malformed_event_does_not_drop_batch(
+        self, batch_dispatcher, machine_status, ws_manager
+    ):
+        await batch_dispatcher._handle_batch([
+            {"event": "COIN_IN", "denom": "five", "_controller": "COIN_SECURITY"},
+            {"event": "COIN_IN", "denom": 5, "total": 5, "_controller": "COIN_SECURITY"},
+        ])
+        assert machine_status.snapshot().consumables.coin_counts["PHP_5"] == 1
+        assert ws_manager.broadcast.call_args[0][0].type == WSEventType.COIN_INSERTED
+
+    async def test_run_drains_ready_events_per_wakeup(
+        self, batch_dispatcher, event_queue, machine_status, ws_manager
+    ):
+        for total in range(1, 11):
+            event_queue.put_nowait({
+                "event": "COIN_IN", "denom": 1, "total": total,
+                "_controller": "COIN_SECURITY",
+            })
+        await batch_dispatcher.start()
+        try:
+            for _ in range(100):
+                if batch_dispatcher.events_handled == 10:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await batch_dispatcher.stop()
+
+        assert batch_dispatcher.broadcasts == 1
+        assert len(ws_manager.broadcast.call_args[0][0].payload["events"]) == 10
+        assert machine_status.snapshot().consumables.coin_counts["PHP_1"] == 10
+
+    async def test_batch_size_caps_drain(
+        self, event_queue, machine_status, ws_manager
+    ):
+        dispatcher = EventDispatcher(
+            event_queue, machine_status, ws_manager, batch_size=4
+        )
+        for _ in range(10):
+            event_queue.put_nowait({"event": "KEYPAD", "key": "1"})
+        assert len(await dispatcher._next_batch()) == 4
+        assert event_queue.qsize() == 6
@@ -0,0 +1,92 @@
+import asyncio
+
+from app.drivers.event_queue import POLICY_DROP, BoundedEventQueue
+
+
+def _coin(total):
+    return {"event": "COIN_IN", "denom": 1, "total": total, "_controller": "COIN_SECURITY"}
+
+
+def _keypad(key):
+    return {"event": "KEYPAD", "key": key, "_controller": "COIN_SECURITY"}
+
+
+def _drain(queue):
+    items = []
+    while not queue.empty():
+        items.append(queue.get_nowait())
+    return items
+
+
+class TestBoundedEventQueue:
+    def test_coin_in_never_dropped(self):
+        queue = BoundedEventQueue(capacity=3)
+        for total in range(10):
+            queue.put_nowait(_coin(total))
+
+        assert [e["total"] for e in _drain(queue)] == list(range(10))
+        assert queue.over_capacity["COIN_IN"] == 7
+        assert queue.high_watermark == 10
+
+    def test_keypad_dropped_when_full(self):
+        queue = BoundedEventQueue(capacity=2)
+        queue.put_nowait(_keypad("1"))
+        queue.put_nowait(_keypad("2"))
+        queue.put_nowait(_keypad("3"))
+
+        assert [e["key"] for e in _drain(queue)] == ["1", "2"]
+        assert queue.dropped["KEYPAD"] == 1
+        queue.put_nowait(_keypad("4"))
+        assert queue.get_nowait()["key"] == "4"
+
+    def test_door_state_repeats_coalesce_in_place(self):
+        queue = BoundedEventQueue(capacity=10)
+        queue.put_nowait({"event": "DOOR_STATE", "locked": False, "_controller": "COIN_SECURITY"})
+        queue.put_nowait(_coin(5))
+        queue.put_nowait({"event": "DOOR_STATE", "locked": True, "_controller": "COIN_SECURITY"})
+
+        events = _drain(queue)
+        assert [e["event"] for e in events] == ["DOOR_STATE", "COIN_IN"]
+        assert events[0]["locked"] is True
+        assert queue.coalesced["DOOR_STATE"] == 1
+
+    def test_tamper_coalesces_per_sensor(self):
+        queue = BoundedEventQueue(capacity=10)
+        for sensor in ("A", "B", "A", "A"):
+            queue.put_nowait({"event": "TAMPER", "sensor": sensor, "_controller": "COIN_SECURITY"})
+
+        assert [e["sensor"] for e in _drain(queue)] == ["A", "B"]
+        assert queue.coalesced["TAMPER"] == 2
+
+    def test_dequeued_event_no_longer_coalesced(self):
+        queue = BoundedEventQueue(capacity=10)
+        queue.put_nowait({"event": "TAMPER", "sensor": "A"})
+        first = queue.get_nowait()
+        queue.put_nowait({"event": "TAMPER", "sensor": "A", "seq": 2})
+
+        assert "seq" not in first
+        assert queue.get_nowait()["seq"] == 2
+
+    def test_policy_override(self):
+        queue = BoundedEventQueue(capacity=1, policies={"COIN_IN": POLICY_DROP})
+        queue.put_nowait(_coin(1))
+        queue.put_nowait(_coin(2))
+        assert queue.dropped["COIN_IN"] == 1
+
+    async def test_async_get_wakes_on_put(self):
+        queue = BoundedEventQueue(capacity=5)
+        getter = asyncio.create_task(queue.get())
+        await asyncio.sleep(0)
+        asyncio.get_running_loop().call_soon(queue.put_nowait, _coin(1))
+        assert (await asyncio.wait_for(getter, 1.0))["total"] == 1
+
+    def test_stats(self):
+        queue = BoundedEventQueue(capacity=1)
+        queue.put_nowait(_coin(1))
+        queue.put_nowait(_keypad("1"))
+        stats = queue.stats()
+        assert stats["capacity"] == 1
+        assert stats["size"] == 1
+        assert stats["high_watermark"] == 1
+        assert stats["enqueued"] == {"COIN_IN": 1}
+        assert stats["dropped"] == {"KEYPAD": 1}
@@ -0,0 +1,245 @@
+import json
+import os
+import threading
+import time
+
+from app.core.config import Settings
+from app.services.inventory_ledger import (
+    CHECKPOINT_FILE,
+    LEDGER_FILE,
+    InventoryLedger,
+)
+from app.services.machine_status import MachineStatus
+
+
+def _status(directory, checkpoint_every=1000) -> MachineStatus:
+    ledger = InventoryLedger(
+        str(directory), checkpoint_every=checkpoint_every, fsync=False
+    )
+    return MachineStatus(Settings(use_mock_serial=True), ledger=ledger)
+
+
+def _wait_for(predicate, timeout=1.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert predicate()
+
+
+def _lines(directory, name=LEDGER_FILE):
+    with open(os.path.join(directory, name)) as f:
+        return [json.loads(line) for line in f]
+
+
+class TestInventoryLedger:
+    def test_empty_directory_loads_nothing(self, tmp_path):
+        ledger = InventoryLedger(str(tmp_path))
+        assert ledger.load() == {
+            "bill_storage": {}, "bill_dispenser": {}, "coin": {},
+        }
+        assert ledger.seq == 0
+
+    def test_records_replayed_on_load(self, tmp_path):
+        ledger = InventoryLedger(str(tmp_path), fsync=False)
+        ledger.load()
+        ledger.record("coin", "PHP_5", 3, 3, "tx-1")
+        ledger.record("coin", "PHP_5", -1, 2, "tx-1")
+        ledger.close()
+
+        reopened = InventoryLedger(str(tmp_path))
+        assert reopened.load()["coin"] == {"PHP_5": 2}
+        assert reopened.seq == 2
+
+    def test_checkpoint_rolls_segment(self, tmp_path):
+        ledger = InventoryLedger(str(tmp_path), fsync=False)
+        ledger.load()
+        ledger.record("coin", "PHP_1", 7, 7)
+        ledger.checkpoint({"coin": {"PHP_1": 7}})
+        ledger.record("coin", "PHP_1", 1, 8)
+        ledger.close()
+
+        assert [r["seq"] for r in _lines(tmp_path)] == [2]
+        reopened = InventoryLedger(str(tmp_path))
+        assert reopened.load()["coin"] == {"PHP_1": 8}
+
+    def test_records_covered_by_checkpoint_are_skipped(self, tmp_path):
+        # Crash after writing the checkpoint but before rolling the segment
+        with open(tmp_path / CHECKPOINT_FILE, "w") as f:
+            json.dump({"seq": 2, "counts": {"coin": {"PHP_1": 10}}}, f)
+        with open(tmp_path / LEDGER_FILE, "w") as f:
+            for seq, count in ((1, 4), (2, 10), (3, 11)):
+                f.write(json.dumps({
+                    "seq": seq, "tx": None, "counter": "coin",
+                    "denom": "PHP_1", "delta": 1, "count": count,
+                }) + "\n")
+
+        ledger = InventoryLedger(str(tmp_path))
+        assert ledger.load()["coin"] == {"PHP_1": 11}
+        assert ledger.seq == 3
+
+    def test_torn_last_line_is_cut(self, tmp_path):
+        ledger = InventoryLedger(str(tmp_path), fsync=False)
+        ledger.load()
+        ledger.record("coin", "PHP_10", 2, 2)
+        ledger.close()
+        with open(tmp_path / LEDGER_FILE, "a") as f:
+            f.write('{"seq": 2, "counter": "co')
+
+        reopened = InventoryLedger(str(tmp_path), fsync=False)
+        assert reopened.load()["coin"] == {"PHP_10": 2}
+        reopened.record("coin", "PHP_10", 1, 3)
+        reopened.close()
+        assert [r["count"] for r in _lines(tmp_path)] == [2, 3]
+
+    def test_fsyncs_grouped_off_the_calling_thread(self, tmp_path, monkeypatch):
+        import threading
+
+        fsync_threads = []
+        real_fsync = os.fsync
+
+        def tracking_fsync(fd):
+            fsync_threads.append(threading.current_thread().name)
+            real_fsync(fd)
+
+        monkeypatch.setattr(os, "fsync", tracking_fsync)
+        ledger = InventoryLedger(str(tmp_path), fsync_interval=0.01)
+        ledger.load()
+        for count in range(1, 51):
+            ledger.record("coin", "PHP_1", 1, count)
+        assert fsync_threads == []
+
+        for _ in range(100):
+            if ledger.syncs:
+                break
+            time.sleep(0.01)
+        ledger.close()
+
+        assert 1 <= ledger.syncs < 50
+        assert "inventory-ledger-fsync" in fsync_threads
+        reopened = InventoryLedger(str(tmp_path), fsync=False)
+        assert reopened.load()["coin"] == {"PHP_1": 50}
+
+    def test_requested_checkpoint_written_off_the_calling_thread(
+        self, tmp_path, monkeypatch
+    ):
+        ledger = InventoryLedger(str(tmp_path), fsync=False)
+        ledger.load()
+        writers = []
+        release = threading.Event()
+        real_write = ledger._write_checkpoint
+
+        def slow_write(seq, counts):
+            writers.append(threading.current_thread().name)
+            release.wait(1.0)
+            real_write(seq, counts)
+
+        monkeypatch.setattr(ledger, "_write_checkpoint", slow_write)
+        ledger.record("coin", "PHP_1", 5, 5, "tx-1")
+        ledger.request_checkpoint({"coin": {"PHP_1": 5}})
+        _wait_for(lambda: writers)
+        # Recorded while the checkpoint is being written
+        ledger.record("coin", "PHP_1", 1, 6, "tx-1")
+        release.set()
+        _wait_for(lambda: ledger.checkpoints == 1)
+
+        assert writers == ["inventory-ledger-fsync"]
+        assert [r["seq"] for r in _lines(tmp_path)] == [2]
+        assert ledger.transaction_deltas("tx-1") == {("coin", "PHP_1"): 6}
+        ledger.close()
+        reopened = InventoryLedger(str(tmp_path), fsync=False)
+        assert reopened.load()["coin"] == {"PHP_1": 6}
+        reopened.close()
+
+    def test_transaction_deltas_span_previous_segment(self, tmp_path):
+        ledger = InventoryLedger(str(tmp_path), fsync=False)
+        ledger.load()
+        ledger.record("bill_dispenser", "PHP_100", -2, 8, "tx-1")
+        ledger.checkpoint({"bill_dispenser": {"PHP_100": 8}})
+        ledger.record("bill_dispenser", "PHP_100", 1, 9, "tx-1")
+        ledger.record("coin", "PHP_5", 1, 1, "tx-2")
+
+        assert ledger.transaction_deltas("tx-1") == {
+            ("bill_dispenser", "PHP_100"): -1,
+        }
+        ledger.close()
+
+
+class TestMachineStatusLedger:
+    def test_counts_survive_restart(self, tmp_path):
+        status = _status(tmp_path)
+        status.set_dispenser_counts({"PHP_100": 20})
+        status.increment_coin("PHP_5", 4)
+        status.decrement_bill_dispenser("PHP_100", 3)
+        status.increment_bill_storage("USD_10")
+
+        restarted = _status(tmp_path)
+        consumables = restarted.snapshot().consumables
+        assert consumables.bill_dispenser_counts["PHP_100"] == 17
+        assert consumables.coin_counts["PHP_5"] == 4
+        assert consumables.bill_storage_counts["USD"] == 1
+        # Derived state is rebuilt from the restored counts
+        assert restarted.is_payable(105) is True
+        assert "EMPTY_COIN:PHP_1" in consumables.alerts
+
+    def test_records_tagged_with_active_transaction(self, tmp_path):
+        status = _status(tmp_path)
+        status.increment_coin("PHP_1")
+        status.set_active_transaction("tx-9")
+        status.increment_coin("PHP_1")
+        status.set_active_transaction(None)
+
+        assert [r["tx"] for r in _lines(tmp_path)] == [None, "tx-9"]
+        assert status.transaction_inventory_deltas("tx-9") == {"coin:PHP_1": 1}
+
+    def test_reverted_transaction_nets_to_zero(self, tmp_path):
+        status = _status(tmp_path)
+        status.set_coin_counts({"PHP_5": 10})
+        status.set_active_transaction("tx-1")
+        status.decrement_coin("PHP_5", 3)
+        status.set_active_transaction(None)
+
+        status.revert_transaction_deltas(
+            "tx-1", status.transaction_inventory_deltas("tx-1")
+        )
+
+        assert status.snapshot().consumables.coin_counts["PHP_5"] == 10
+        assert status.transaction_inventory_deltas("tx-1") == {}
+        assert status.is_payable(50) is True
+
+    def test_noop_changes_not_recorded(self, tmp_path):
+        status = _status(tmp_path)
+        status.decrement_coin("PHP_1")  # already 0
+        status.set_coin_counts({"PHP_1": 0})
+        assert _lines(tmp_path) == []
+
+    def test_periodic_checkpoint(self, tmp_path):
+        status = _status(tmp_path, checkpoint_every=3)
+        for _ in range(7):
+            status.increment_coin("PHP_20")
+        ledger = status._ledger
+        _wait_for(
+            lambda: ledger.checkpoints and ledger._pending_checkpoint is None
+        )
+
+        with open(tmp_path / CHECKPOINT_FILE) as f:
+            checkpoint_seq = json.load(f)["seq"]
+        assert checkpoint_seq >= 3
+        assert [r["seq"] for r in _lines(tmp_path)] == list(
+            range(checkpoint_seq + 1, 8)
+        )
+        restarted = _status(tmp_path, checkpoint_every=3)
+        assert restarted.snapshot().consumables.coin_counts["PHP_20"] == 7
+
+    def test_close_writes_checkpoint(self, tmp_path):
+        status = _status(tmp_path)
+        status.increment_coin("PHP_10", 2)
+        status.close()
+        assert _lines(tmp_path) == []
+        assert _status(tmp_path).snapshot().consumables.coin_counts["PHP_10"] == 2
+
+    def test_without_ledger_nothing_is_written(self, tmp_path):
+        status = MachineStatus(Settings(use_mock_serial=True))
+        status.increment_coin("PHP_1")
+        status.close()
+        assert status.transaction_inventory_deltas("tx") == {}
+        assert os.listdir(tmp_path) == []
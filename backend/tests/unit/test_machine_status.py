@@ -1,4 +1,5 @@
 import pytest
+from pydantic import ValidationError
 
 from app.core.config import Settings
 from app.services.machine_status import MachineStatus
@@ -32,6 +33,48 @@ class TestSnapshot:
         assert snap1.sorter.homed is False
         assert snap2.sorter.homed is True
 
+    def test_snapshot_reused_until_change(self, status):
+        snap1 = status.snapshot()
+        assert status.snapshot() is snap1
+        status.increment_coin("PHP_5")
+        snap2 = status.snapshot()
+        assert snap2 is not snap1
+        assert snap2.version == snap1.version + 1 == status.version
+
+    def test_snapshot_does_not_alias_live_state(self, status):
+        snap = status.snapshot()
+        status.increment_coin("PHP_5", 3)
+        status.update_security(sensor="DOOR")
+        assert snap.consumables.coin_counts["PHP_5"] == 0
+        assert snap.security.last_tamper_sensor is None
+
+    def test_snapshot_is_frozen(self, status):
+        snap = status.snapshot()
+        with pytest.raises(ValidationError):
+            snap.version = 99
+
+    def test_nested_state_is_frozen(self, status):
+        status.increment_coin("PHP_5", 2)
+        snap = status.snapshot()
+        with pytest.raises(TypeError):
+            snap.consumables.coin_counts["PHP_5"] = 99
+        with pytest.raises(TypeError):
+            snap.consumables.alerts.append("FAKE")
+        with pytest.raises(ValidationError):
+            snap.security.locked = False
+        assert status.snapshot().consumables.coin_counts["PHP_5"] == 2
+
+    def test_deep_copy_is_mutable(self, status):
+        copy = status.snapshot().model_copy(deep=True)
+        copy.consumables.coin_counts["PHP_5"] = 7
+        assert status.snapshot().consumables.coin_counts["PHP_5"] == 0
+
+    def test_batch_update_bumps_version_per_change(self, status):
+        with status.batch_update():
+            status.increment_coin("PHP_1")
+            status.increment_coin("PHP_5")
+        assert status.snapshot().version == 2
+
 
 class TestDeviceUpdates:
     def test_update_bill_device(self, status):
@@ -109,6 +152,127 @@ class TestConsumables:
         assert snap.consumables.coin_counts["PHP_5"] == 15
 
 
+class TestPayableIndex:
+    def test_empty_inventory_not_payable(self, status):
+        assert status.is_payable(0) is True
+        assert status.is_payable(100) is False
+
+    def test_tracks_dispenser_counts(self, status):
+        status.set_dispenser_counts({"PHP_100": 2})
+        assert status.is_payable(200) is True
+        status.decrement_bill_dispenser("PHP_100", 1)
+        assert status.is_payable(200) is False
+        assert status.is_payable(100) is True
+
+    def test_tracks_coin_counts(self, status):
+        status.set_coin_counts({"PHP_5": 1})
+        status.increment_coin("PHP_1", 2)
+        assert status.is_payable(7) is True
+        status.decrement_coin("PHP_5", 1)
+        assert status.is_payable(7) is False
+        assert status.is_payable(2) is True
+
+    def test_above_ceiling_returns_none(self, status):
+        assert status.is_payable(10**6) is None
+
+    def test_dispense_inventory_is_versioned_copy(self, status):
+        status.set_dispenser_counts({"PHP_100": 2})
+        version, bills, coins = status.dispense_inventory()
+        assert version == status.inventory_version
+        assert bills["PHP_100"] == 2
+        bills["PHP_100"] = 0
+        status.increment_coin("PHP_5")
+        new_version, bills, coins = status.dispense_inventory()
+        assert new_version == version + 1
+        assert bills["PHP_100"] == 2
+        assert coins["PHP_5"] == 1
+
+
+class TestBatchUpdate:
+    def test_index_updated_once_at_batch_exit(self, status, monkeypatch):
+        calls = []
+        index = status._payable_index
+        original = index.set_count
+        monkeypatch.setattr(
+            index, "set_count",
+            lambda *args: calls.append(args) or original(*args),
+        )
+        with status.batch_update():
+            for _ in range(5):
+                status.increment_coin("PHP_5")
+            status.increment_coin("PHP_1", 2)
+            assert calls == []
+
+        assert sorted(calls) == [("coin", "PHP_1", 2), ("coin", "PHP_5", 5)]
+        assert status.is_payable(27) is True
+        assert status.inventory_version == 6
+
+    def test_change_callback_fires_once(self, status):
+        changes = []
+        status.set_on_change(lambda: changes.append(1))
+        with status.batch_update():
+            status.increment_coin("PHP_5")
+            status.update_security(locked=False)
+            with status.batch_update():
+                status.update_security(tamper_active=True)
+            assert changes == []
+        assert changes == [1]
+
+    def test_no_callback_without_changes(self, status):
+        changes = []
+        status.set_on_change(lambda: changes.append(1))
+        with status.batch_update():
+            pass
+        assert changes == []
+
+
+class TestPayableRange:
+    def test_max_payable_and_blocked(self, status):
+        status.set_dispenser_counts({"PHP_50": 1, "PHP_20": 2})
+        result = status.get_payable_range(step=10, limit=200)
+        assert result.max_payable == 90
+        assert result.blocked_amounts == [10, 30, 60, 80]
+
+    def test_not_cached_inside_batch(self, status):
+        status.set_dispenser_counts({"PHP_50": 1})
+        with status.batch_update():
+            status.set_dispenser_counts({"PHP_50": 1, "PHP_20": 2})
+            assert status.get_payable_range(step=10, limit=200).max_payable == 50
+
+        result = status.get_payable_range(step=10, limit=200)
+        assert result.max_payable == 90
+        assert result.inventory_version == status.inventory_version
+
+    def test_step_aware(self, status):
+        status.set_dispenser_counts({"PHP_50": 1, "PHP_20": 2})
+        result = status.get_payable_range(step=20, limit=200)
+        assert result.max_payable == 40
+        assert result.blocked_amounts == []
+
+    def test_empty_inventory(self, status):
+        result = status.get_payable_range(step=20, limit=100)
+        assert result.max_payable == 0
+        assert result.blocked_amounts == []
+
+    def test_cached_until_inventory_changes(self, status):
+        status.set_dispenser_counts({"PHP_100": 2})
+        first = status.get_payable_range(step=100, limit=1000)
+        assert status.get_payable_range(step=100, limit=1000) is first
+
+        status.update_sorter(homed=True)
+        assert status.get_payable_range(step=100, limit=1000) is first
+
+        status.decrement_bill_dispenser("PHP_100", 1)
+        second = status.get_payable_range(step=100, limit=1000)
+        assert second is not first
+        assert second.max_payable == 100
+        assert second.inventory_version > first.inventory_version
+
+    def test_limit_capped_at_ceiling(self, status):
+        result = status.get_payable_range(step=1000, limit=10**9)
+        assert result.limit == status._payable_index.ceiling
+
+
 class TestAlerts:
     def test_low_bill_alert(self, status):
         status.set_dispenser_counts({"PHP_100": 5})
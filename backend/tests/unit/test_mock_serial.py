@@ -1,8 +1,12 @@
 import json
+import select
+import threading
+import time
 
 import pytest
 
 from app.drivers.mock_serial import MockSerial
+from app.drivers.serial_framing import FrameDecoder, encode_frame
 
 
 class TestMockSerialSimpleMode:
@@ -149,6 +153,16 @@ class TestMockSerialSimpleMode:
         assert resp["status"] == "ERROR"
         assert resp["code"] == "UNKNOWN_CMD"
 
+    def test_echoes_correlation_id(self, bill_mock):
+        resp = self._send_and_read(bill_mock, {"cmd": "PING", "id": 42})
+        assert resp["id"] == 42
+        resp = self._send_and_read(bill_mock, {"cmd": "NONEXISTENT", "id": 43})
+        assert resp["id"] == 43
+
+    def test_no_id_without_correlation_id(self, bill_mock):
+        resp = self._send_and_read(bill_mock, {"cmd": "PING"})
+        assert "id" not in resp
+
     def test_invalid_json(self, bill_mock):
         bill_mock.write(b"not json\n")
         line = bill_mock.readline()
@@ -232,3 +246,109 @@ class TestMockSerialRealisticState:
         mock.write((json.dumps({"cmd": "SORT_STATUS"}) + "\n").encode())
         resp = json.loads(mock.readline().decode())
         assert resp["homed"] is False
+
+
+class TestMockSerialBlockingReads:
+    def test_readline_wakes_when_data_arrives(self):
+        mock = MockSerial(port="MOCK_BILL", timeout=2.0)
+        timer = threading.Timer(
+            0.05, mock.inject_event, args=({"event": "KEYPAD", "key": "1"},)
+        )
+        timer.start()
+        start = time.monotonic()
+        line = mock.readline()
+        assert json.loads(line)["key"] == "1"
+        assert time.monotonic() - start < 1.0
+
+    def test_readline_times_out_empty(self):
+        mock = MockSerial(port="MOCK_BILL", timeout=0.05)
+        assert mock.readline() == b""
+
+    def test_zero_timeout_does_not_block(self):
+        mock = MockSerial(port="MOCK_BILL", timeout=0)
+        assert mock.read(10) == b""
+        mock.inject_event({"event": "KEYPAD", "key": "1"})
+        assert mock.read(1) == b"{"
+
+    def test_cancel_read_wakes_reader(self):
+        mock = MockSerial(port="MOCK_BILL", timeout=5.0)
+        threading.Timer(0.05, mock.cancel_read).start()
+        start = time.monotonic()
+        assert mock.read(1) == b""
+        assert time.monotonic() - start < 1.0
+
+    def test_fileno_readable_only_while_data_buffered(self):
+        mock = MockSerial(port="MOCK_BILL", timeout=0)
+        fd = mock.fileno()
+        assert select.select([fd], [], [], 0)[0] == []
+        mock.write(b'{"cmd": "PING"}\n')
+        assert select.select([fd], [], [], 0)[0] == [fd]
+        mock.read(mock.in_waiting)
+        assert select.select([fd], [], [], 0)[0] == []
+        mock.close()
+
+
+class TestMockSerialDisconnect:
+    def test_inject_disconnect_fails_reads_and_writes(self):
+        mock = MockSerial(port="MOCK_BILL", timeout=0)
+        mock.inject_disconnect()
+        with pytest.raises(OSError, match="disconnected"):
+            mock.read(1)
+        with pytest.raises(OSError, match="disconnected"):
+            mock.write(b'{"cmd": "PING"}\n')
+        with pytest.raises(OSError):
+            mock.in_waiting
+
+    def test_inject_disconnect_wakes_blocked_reader(self):
+        mock = MockSerial(port="MOCK_BILL", timeout=5.0)
+        threading.Timer(0.05, mock.inject_disconnect).start()
+        start = time.monotonic()
+        with pytest.raises(OSError):
+            mock.read(1)
+        assert time.monotonic() - start < 1.0
+
+    def test_inject_disconnect_makes_fileno_readable(self):
+        mock = MockSerial(port="MOCK_BILL", timeout=0)
+        fd = mock.fileno()
+        mock.inject_disconnect()
+        assert select.select([fd], [], [], 0)[0] == [fd]
+        mock.close()
+
+    def test_unplugged_port_fails_to_open(self):
+        MockSerial.unplug("MOCK_BILL")
+        try:
+            with pytest.raises(OSError, match="unplugged"):
+                MockSerial(port="MOCK_BILL")
+            MockSerial(port="MOCK_COIN")
+        finally:
+            MockSerial.replug("MOCK_BILL")
+        assert MockSerial(port="MOCK_BILL").is_open
+
+
+class TestMockSerialFraming:
+    def test_version_advertises_msgpack(self):
+        mock = MockSerial(port="MOCK_COIN", timeout=1.0)
+        mock.write(b'{"cmd": "VERSION"}\n')
+        assert "msgpack" in json.loads(mock.readline())["caps"]
+
+    def test_framing_switches_after_response(self):
+        mock = MockSerial(port="MOCK_COIN", timeout=1.0)
+        mock.write(b'{"cmd": "FRAMING", "mode": "msgpack", "id": 1}\n')
+        assert json.loads(mock.readline()) == {"status": "OK", "mode": "msgpack", "id": 1}
+
+        mock.write(encode_frame({"cmd": "PING", "id": 2}))
+        decoder = FrameDecoder()
+        assert decoder.feed(mock.read(mock.in_waiting)) == [
+            {"status": "OK", "message": "PONG", "id": 2}
+        ]
+
+        mock.inject_event({"event": "KEYPAD", "key": "9"})
+        assert decoder.feed(mock.read(mock.in_waiting)) == [
+            {"event": "KEYPAD", "key": "9"}
+        ]
+
+    def test_unknown_framing_rejected(self):
+        mock = MockSerial(port="MOCK_COIN", timeout=1.0)
+        mock.write(b'{"cmd": "FRAMING", "mode": "cbor"}\n')
+        resp = json.loads(mock.readline())
+        assert resp["code"] == "INVALID_MODE"
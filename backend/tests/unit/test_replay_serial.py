@@ -0,0 +1,76 @@
+import time
+
+import pytest
+
+from app.drivers.replay_serial import ReplaySerial
+from app.drivers.serial_recorder import DIRECTION_RX, DIRECTION_TX, SerialRecorder
+
+
+def _capture(tmp_path, steps):
+    """Record (direction, data, sleep_before) steps and return the file."""
+    recorder = SerialRecorder(str(tmp_path), "BILL")
+    for direction, data, pause in steps:
+        time.sleep(pause)
+        recorder.record(direction, data)
+    recorder.close()
+    return recorder.path
+
+
+PING = b'{"cmd": "PING", "id": 1}\n'
+PONG = b'{"status": "OK", "message": "PONG", "id": 1}\n'
+
+
+class TestReplaySerial:
+    def test_responses_wait_for_host_write(self, tmp_path):
+        path = _capture(tmp_path, [
+            (DIRECTION_RX, b'{"event": "READY"}\n', 0),
+            (DIRECTION_TX, PING, 0),
+            (DIRECTION_RX, PONG, 0),
+        ])
+        port = ReplaySerial(path, speed=0, timeout=0)
+
+        assert port.readline() == b'{"event": "READY"}\n'
+        assert port.readline() == b""
+        port.write(PING)
+        assert port.readline() == PONG
+        assert port.finished
+        assert port.mismatches == 0
+
+    def test_original_timing_scaled_by_speed(self, tmp_path):
+        path = _capture(tmp_path, [
+            (DIRECTION_TX, PING, 0),
+            (DIRECTION_RX, PONG, 0.2),
+        ])
+        port = ReplaySerial(path, speed=4.0, timeout=1.0)
+        port.write(PING)
+        start = time.monotonic()
+        assert port.readline() == PONG
+        elapsed = time.monotonic() - start
+        assert 0.04 <= elapsed < 0.15
+
+    def test_read_times_out_when_capture_exhausted(self, tmp_path):
+        path = _capture(tmp_path, [(DIRECTION_TX, PING, 0), (DIRECTION_RX, PONG, 0)])
+        port = ReplaySerial(path, speed=0, timeout=0.05)
+        port.write(PING)
+        assert port.read(len(PONG)) == PONG
+        port.write(PING)
+        assert port.read(1) == b""
+        assert port.mismatches == 1
+
+    def test_divergent_writes_counted(self, tmp_path):
+        path = _capture(tmp_path, [(DIRECTION_TX, PING, 0), (DIRECTION_RX, PONG, 0)])
+        port = ReplaySerial(path, speed=0, timeout=0)
+        port.write(b'{"cmd": "VERSION", "id": 1}\n')
+        assert port.mismatches == 1
+        # Playback still follows the recording
+        assert port.readline() == PONG
+
+    def test_closed_port_raises(self, tmp_path):
+        port = ReplaySerial(_capture(tmp_path, []), timeout=0)
+        port.close()
+        with pytest.raises(OSError):
+            port.read(1)
+
+    def test_negative_speed_rejected(self, tmp_path):
+        with pytest.raises(ValueError, match="speed"):
+            ReplaySerial(_capture(tmp_path, []), speed=-1)
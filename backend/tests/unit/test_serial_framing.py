@@ -0,0 +1,49 @@
+"""Tests for binary serial framing (MessagePack + CRC16)."""
+
+import pytest
+
+from app.drivers.serial_framing import (
+    FRAME_MAGIC,
+    MAX_PAYLOAD,
+    FrameDecoder,
+    crc16,
+    encode_frame,
+)
+
+
+class TestFraming:
+    def test_crc16_ccitt_false_check_value(self):
+        assert crc16(b"123456789") == 0x29B1
+
+    def test_round_trip(self):
+        message = {"status": "OK", "breakdown": {"20": 2, "5": 1}, "id": 7}
+        frame = encode_frame(message)
+        assert frame[0] == FRAME_MAGIC
+        assert FrameDecoder().feed(frame) == [message]
+
+    def test_frames_split_across_chunks(self):
+        frames = encode_frame({"event": "COIN_IN", "denom": 5, "total": 5}) * 2
+        decoder = FrameDecoder()
+        messages = []
+        for i in range(len(frames)):
+            messages.extend(decoder.feed(frames[i:i + 1]))
+        assert len(messages) == 2
+        assert messages[0]["denom"] == 5
+
+    def test_corrupt_frame_skipped(self):
+        good = encode_frame({"event": "KEYPAD", "key": "1"})
+        bad = bytearray(encode_frame({"event": "KEYPAD", "key": "2"}))
+        bad[-1] ^= 0xFF
+        decoder = FrameDecoder()
+        assert decoder.feed(bytes(bad) + good) == [{"event": "KEYPAD", "key": "1"}]
+        assert decoder.dropped_bytes > 0
+
+    def test_line_noise_before_frame_dropped(self):
+        frame = encode_frame({"status": "OK"})
+        decoder = FrameDecoder()
+        assert decoder.feed(b"\x00garbage\n" + frame) == [{"status": "OK"}]
+        assert decoder.dropped_bytes == 9
+
+    def test_oversized_payload_rejected(self):
+        with pytest.raises(ValueError):
+            encode_frame({"blob": "x" * (MAX_PAYLOAD + 1)})
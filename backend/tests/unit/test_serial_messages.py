@@ -9,6 +9,7 @@ from app.models.serial_messages import (
     DoorStateEvent,
     ErrorResponse,
     HomeResponse,
+    PingCommand,
     PingResponse,
     ReadyEvent,
     SortCommand,
@@ -47,6 +48,10 @@ class TestCommands:
         d = cmd.model_dump()
         assert d == {"cmd": "COIN_DISPENSE", "denom": 5, "count": 3}
 
+    def test_correlation_id_omitted_when_unset(self):
+        assert "id" not in PingCommand().model_dump()
+        assert PingCommand(id=7).model_dump() == {"id": 7, "cmd": "PING"}
+
 
 class TestResponses:
     def test_sort_response(self):
@@ -83,6 +88,11 @@ class TestResponses:
         resp = ErrorResponse(status="ERROR", code="JAM", dispensed=1)
         assert resp.dispensed == 1
 
+    def test_response_with_correlation_id(self):
+        resp = PingResponse(status="OK", id=7)
+        assert resp.id == 7
+        assert ErrorResponse(status="ERROR", code="JAM").id is None
+
     def test_ping_response(self):
         resp = PingResponse(status="OK")
         assert resp.message == "PONG"
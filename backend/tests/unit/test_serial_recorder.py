@@ -0,0 +1,93 @@
+import os
+import time
+
+import pytest
+
+from app.drivers.serial_recorder import (
+    DIRECTION_RX,
+    DIRECTION_TX,
+    SerialRecorder,
+    capture_files,
+    read_capture,
+    read_captures,
+)
+
+
+class TestSerialRecorder:
+    def test_records_round_trip(self, tmp_path):
+        recorder = SerialRecorder(str(tmp_path), "BILL")
+        recorder.record(DIRECTION_TX, b'{"cmd": "PING", "id": 1}\n')
+        recorder.record(DIRECTION_RX, b'{"status": "OK", "id": 1}\n')
+        recorder.close()
+
+        capture = read_capture(recorder.path)
+        assert capture.controller == "BILL"
+        assert [(r.direction, r.data) for r in capture.records] == [
+            (DIRECTION_TX, b'{"cmd": "PING", "id": 1}\n'),
+            (DIRECTION_RX, b'{"status": "OK", "id": 1}\n'),
+        ]
+        assert capture.records[0].offset_ns <= capture.records[1].offset_ns
+        assert recorder.records == 2
+
+    def test_idle_tail_flushed_by_timer(self, tmp_path):
+        recorder = SerialRecorder(str(tmp_path), "BILL", flush_interval=0.05)
+        try:
+            recorder.record(DIRECTION_TX, b"first\n")
+            recorder.record(DIRECTION_RX, b"last\n")
+            for _ in range(50):
+                # File header, two record headers and both payloads
+                if os.path.getsize(recorder.path) >= 32 + 2 * 13 + 11:
+                    break
+                time.sleep(0.01)
+            # Nothing recorded since, and the recorder is still open
+            assert [r.data for r in read_capture(recorder.path).records] == [
+                b"first\n", b"last\n",
+            ]
+        finally:
+            recorder.close()
+
+    def test_rotates_and_prunes_old_files(self, tmp_path):
+        recorder = SerialRecorder(str(tmp_path), "BILL", max_bytes=200, max_files=3)
+        for i in range(20):
+            recorder.record(DIRECTION_RX, b"x" * 40 + bytes([i]))
+        recorder.close()
+
+        files = capture_files(str(tmp_path), "BILL")
+        assert len(files) == 3
+        assert files[-1] == recorder.path
+        assert all(os.path.getsize(path) <= 200 for path in files)
+        # Oldest records were pruned along with their files
+        records = read_captures(files)
+        assert records[-1].data[-1] == 19
+        assert len(records) < 20
+
+    def test_truncated_record_dropped(self, tmp_path):
+        recorder = SerialRecorder(str(tmp_path), "COIN_SECURITY")
+        recorder.record(DIRECTION_RX, b"complete\n")
+        recorder.record(DIRECTION_RX, b"cut short\n")
+        recorder.close()
+        with open(recorder.path, "r+b") as f:
+            f.truncate(os.path.getsize(recorder.path) - 4)
+
+        records = read_capture(recorder.path).records
+        assert [r.data for r in records] == [b"complete\n"]
+
+    def test_rejects_non_capture(self, tmp_path):
+        path = tmp_path / "bill-x-0001.cnrec"
+        path.write_bytes(b"not a capture at all, just text")
+        with pytest.raises(ValueError, match="Not a serial capture"):
+            read_capture(str(path))
+
+    def test_capture_files_returns_latest_session(self, tmp_path):
+        for name in (
+            "bill-20260101-000000000-0001.cnrec",
+            "bill-20260101-000000000-0002.cnrec",
+            "bill-20260102-000000000-0001.cnrec",
+            "coin_security-20260103-000000000-0001.cnrec",
+        ):
+            (tmp_path / name).write_bytes(b"")
+        files = capture_files(str(tmp_path), "BILL")
+        assert [os.path.basename(f) for f in files] == [
+            "bill-20260102-000000000-0001.cnrec"
+        ]
+        assert capture_files(str(tmp_path), "UNKNOWN") == []
@@ -0,0 +1,222 @@
+import asyncio
+import json
+
+import pytest
+
+from app.api.ws import ConnectionManager
+from app.core.config import Settings
+from app.services.machine_status import MachineStatus
+from app.services.state_sync import StateSync, diff_state
+
+
+class FakeSocket:
+    def __init__(self):
+        self.received = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message: str):
+        self.received.append(json.loads(message))
+
+
+async def _settle():
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+def _apply(state: dict, ops: list) -> dict:
+    """Minimal JSON Patch applier for the ops diff_state() emits."""
+    state = json.loads(json.dumps(state))
+    for op in ops:
+        *parents, last = [
+            t.replace("~1", "/").replace("~0", "~")
+            for t in op["path"].split("/")[1:]
+        ]
+        target = state
+        for token in parents:
+            target = target[token]
+        if op["op"] == "remove":
+            del target[last]
+        else:
+            target[last] = op["value"]
+    return state
+
+
+def _state(status: MachineStatus) -> dict:
+    return status.snapshot().model_dump(
+        mode="json", exclude={"timestamp", "version"}
+    )
+
+
+@pytest.fixture
+def status():
+    return MachineStatus(Settings(use_mock_serial=True))
+
+
+@pytest.fixture
+async def sync(status):
+    manager = ConnectionManager()
+    state_sync = StateSync(status, manager)
+    state_sync.start()
+    socket = FakeSocket()
+    await manager.connect(socket, frozenset({"state"}))
+    yield state_sync, socket
+    state_sync.stop()
+    await manager.shutdown()
+
+
+class TestDiffState:
+    def test_no_changes(self):
+        assert diff_state({"a": {"b": 1}}, {"a": {"b": 1}}) == []
+
+    def test_nested_replace_add_remove(self):
+        old = {"a": {"b": 1, "gone": 2}, "c": [1]}
+        new = {"a": {"b": 3, "new": 4}, "c": [1, 2]}
+        ops = diff_state(old, new)
+        assert {"op": "replace", "path": "/a/b", "value": 3} in ops
+        assert {"op": "remove", "path": "/a/gone"} in ops
+        assert {"op": "add", "path": "/a/new", "value": 4} in ops
+        assert {"op": "replace", "path": "/c", "value": [1, 2]} in ops
+        assert _apply(old, ops) == new
+
+    def test_pointer_tokens_escaped(self):
+        ops = diff_state({"a/b": 1, "c~d": 1}, {"a/b": 2, "c~d": 2})
+        assert [op["path"] for op in ops] == ["/a~1b", "/c~0d"]
+
+    def test_type_change_is_replace(self):
+        assert diff_state({"a": 1}, {"a": True}) == [
+            {"op": "replace", "path": "/a", "value": True}
+        ]
+
+
+class TestStateSync:
+    async def test_snapshot_then_patches_reproduce_state(self, status, sync):
+        state_sync, socket = sync
+        status.update_security(locked=False)
+        await _settle()
+        status.increment_coin("PHP_5", 3)
+        await _settle()
+
+        patches = [m["payload"] for m in socket.received]
+        assert [p["version"] for p in patches] == [1, 2]
+        state = _state(MachineStatus(Settings(use_mock_serial=True)))
+        for patch in patches:
+            state = _apply(state, patch["ops"])
+        assert state == _state(status)
+
+    async def test_patch_only_carries_changed_fields(self, status, sync):
+        _, socket = sync
+        status.increment_coin("PHP_5", 2)
+        await _settle()
+        (patch,) = socket.received
+        assert patch["type"] == "STATE_PATCH"
+        assert patch["payload"]["ops"] == [{
+            "op": "replace", "path": "/consumables/coin_counts/PHP_5", "value": 2,
+        }]
+
+    async def test_burst_of_changes_coalesced_into_one_patch(self, status, sync):
+        state_sync, socket = sync
+        for _ in range(5):
+            status.increment_coin("PHP_1")
+        status.update_sorter(homed=True)
+        await _settle()
+        assert len(socket.received) == 1
+        assert state_sync.version == 1
+
+    async def test_change_from_other_thread(self, status, sync):
+        _, socket = sync
+        await asyncio.to_thread(status.update_security, tamper_active=True)
+        await _settle()
+        assert socket.received[0]["payload"]["ops"] == [{
+            "op": "replace", "path": "/security/tamper_active", "value": True,
+        }]
+
+    async def test_send_snapshot_matches_published_version(self, status, sync):
+        state_sync, socket = sync
+        status.increment_coin("PHP_10", 4)
+        await _settle()
+        await state_sync.send_snapshot(socket)
+        await _settle()
+
+        snapshot = socket.received[-1]
+        assert snapshot["type"] == "STATE_SNAPSHOT"
+        assert snapshot["payload"]["version"] == 1
+        assert snapshot["payload"]["state"] == _state(status)
+
+    async def test_new_subscriber_gets_snapshot_before_any_patch(
+        self, status, sync
+    ):
+        state_sync, socket = sync
+        status.increment_coin("PHP_5")
+        newcomer = FakeSocket()
+        await state_sync._ws.connect(newcomer, frozenset())
+
+        # The pending change is flushed before the snapshot is queued
+        await state_sync.send_snapshot(newcomer)
+        status.increment_coin("PHP_10")
+        await _settle()
+
+        assert [m["type"] for m in newcomer.received] == [
+            "STATE_SNAPSHOT", "STATE_PATCH",
+        ]
+        assert newcomer.received[0]["payload"]["version"] == 1
+        assert newcomer.received[1]["payload"]["version"] == 2
+        assert [m["payload"]["version"] for m in socket.received] == [1, 2]
+
+    async def test_resubscribe_gets_no_patch_before_snapshot(self, status, sync):
+        state_sync, socket = sync
+        status.increment_coin("PHP_5")
+
+        await state_sync.send_snapshot(socket)
+        await _settle()
+
+        assert [m["type"] for m in socket.received] == ["STATE_SNAPSHOT"]
+        assert socket.received[0]["payload"]["state"] == _state(status)
+
+    async def test_nothing_published_without_state_subscribers(self, status):
+        manager = ConnectionManager()
+        state_sync = StateSync(status, manager)
+        state_sync.start()
+        socket = FakeSocket()
+        await manager.connect(socket)
+        try:
+            status.increment_coin("PHP_5", 2)
+            await _settle()
+            assert state_sync.patches == 0
+            assert manager.stats()["seq"] == 0
+
+            # A later subscriber still gets the current state
+            manager.subscribe(socket, ["state"])
+            await state_sync.send_snapshot(socket)
+            await _settle()
+            snapshot = socket.received[-1]
+            assert snapshot["type"] == "STATE_SNAPSHOT"
+            assert snapshot["payload"]["version"] == 1
+            assert snapshot["payload"]["state"] == _state(status)
+        finally:
+            state_sync.stop()
+            await manager.shutdown()
+
+    async def test_patches_not_numbered_or_replayed(self, status):
+        manager = ConnectionManager()
+        state_sync = StateSync(status, manager)
+        state_sync.start()
+        socket = FakeSocket()
+        await manager.connect(socket, frozenset({"state"}))
+        try:
+            status.increment_coin("PHP_5")
+            await _settle()
+            assert socket.received[0]["type"] == "STATE_PATCH"
+            assert socket.received[0].get("seq") is None
+            assert manager.stats()["replay_buffered"] == 0
+        finally:
+            state_sync.stop()
+            await manager.shutdown()
+
+    async def test_stop_detaches(self, status, sync):
+        state_sync, socket = sync
+        state_sync.stop()
+        status.increment_coin("PHP_1")
+        await _settle()
+        assert socket.received == []
@@ -195,6 +195,13 @@ class TestStartTransaction:
         assert orchestrator.has_active_transaction is True
         assert orchestrator.active_transaction_id == state["transaction_id"]
 
+    async def test_tags_inventory_ledger_with_transaction(
+        self, orchestrator, machine_status
+    ):
+        """Inventory changes are attributed to the active transaction."""
+        state = await _start_default_transaction(orchestrator)
+        assert machine_status.active_transaction_id == state["transaction_id"]
+
     async def test_raises_if_already_active(self, orchestrator):
         """Starting a second transaction while one is active raises TransactionError."""
         await _start_default_transaction(orchestrator)
@@ -525,6 +532,79 @@ class TestConfirmTransaction:
         assert orchestrator.has_active_transaction is False
         assert orchestrator.active_transaction_id is None
 
+    async def test_uses_configured_dispense_policy(
+        self,
+        mock_bill_acceptor,
+        mock_dispense_orchestrator,
+        machine_status,
+        ws_manager,
+        db_session_factory,
+    ):
+        """The plan handed to the dispenser is chosen by the configured policy."""
+        machine_status.set_dispenser_counts({"PHP_100": 1})
+        orchestrator = TransactionOrchestrator(
+            bill_acceptor=mock_bill_acceptor,
+            dispense_orchestrator=mock_dispense_orchestrator,
+            machine_status=machine_status,
+            ws_manager=ws_manager,
+            db_session_factory=db_session_factory,
+            dispense_policy="balance",
+        )
+
+        await orchestrator.start_transaction(
+            transaction_type="bill-to-bill",
+            target_amount=100,
+            fee=0,
+            selected_dispense_denoms=[],
+        )
+        await orchestrator.handle_bill_inserted()
+        await orchestrator.confirm_transaction()
+
+        # The last PHP_100 would empty its cassette
+        plan = mock_dispense_orchestrator.execute_dispense.call_args.args[0]
+        assert {i.denom: i.count for i in plan.items} == {"PHP_50": 2}
+
+    async def test_plan_served_from_cache_until_inventory_changes(
+        self, orchestrator, mock_bill_acceptor, mock_dispense_orchestrator,
+        machine_status,
+    ):
+        """The start pre-check plan is reused at confirm; inventory changes
+        invalidate it."""
+        mock_dispense_orchestrator.execute_dispense.return_value = DispenseResult(
+            success=True,
+            dispensed_bills={"PHP_100": 1},
+            dispensed_coins={},
+            total_dispensed=100,
+            shortfall=0,
+        )
+
+        await self._start_and_fill(orchestrator, mock_bill_acceptor)
+        await orchestrator.confirm_transaction()
+        assert orchestrator.plan_cache.hits == 1
+        assert orchestrator.plan_cache.misses == 1
+
+        machine_status.decrement_bill_dispenser("PHP_100", 1)
+        await self._start_and_fill(orchestrator, mock_bill_acceptor)
+        assert orchestrator.plan_cache.misses == 2
+
+    def test_unknown_dispense_policy_rejected(
+        self,
+        mock_bill_acceptor,
+        mock_dispense_orchestrator,
+        machine_status,
+        ws_manager,
+        db_session_factory,
+    ):
+        with pytest.raises(ValueError, match="Unknown dispense policy"):
+            TransactionOrchestrator(
+                bill_acceptor=mock_bill_acceptor,
+                dispense_orchestrator=mock_dispense_orchestrator,
+                machine_status=machine_status,
+                ws_manager=ws_manager,
+                db_session_factory=db_session_factory,
+                dispense_policy="largest_first",
+            )
+
 
 # ---------------------------------------------------------------------------
 # TestCancelTransaction
@@ -550,6 +630,7 @@ class TestCancelTransaction:
 
         assert orchestrator.has_active_transaction is False
         assert orchestrator.active_transaction_id is None
+        assert orchestrator._status.active_transaction_id is None
 
     async def test_raises_if_no_active_transaction(self, orchestrator):
         """cancel_transaction raises TransactionError when there is
@@ -638,6 +719,111 @@ class TestRecoverPendingTransactions:
             wal = await session.get(WALEntry, wal_id)
             assert wal.status == WALStatus.ROLLED_BACK.value
 
+    async def test_recovery_notes_ledger_inventory_changes(
+        self, orchestrator, machine_status, db_session_factory
+    ):
+        """Inventory changes recorded for an interrupted transaction are
+        kept and noted on the recovered record."""
+        tx_id = str(uuid.uuid4())
+        machine_status.transaction_inventory_deltas = lambda t: (
+            {"bill_dispenser:PHP_100": -2} if t == tx_id else {}
+        )
+        async with db_session_factory() as session:
+            session.add(TransactionRecord(
+                id=tx_id,
+                type="bill-to-bill",
+                state=TransactionState.DISPENSING.value,
+                target_amount=200,
+                fee=0,
+                total_due=200,
+            ))
+            session.add(WALEntry(
+                transaction_id=tx_id,
+                action="DISPENSE_START",
+                data={},
+                status=WALStatus.PENDING.value,
+            ))
+            await session.commit()
+
+        await orchestrator.recover_pending_transactions()
+
+        async with db_session_factory() as session:
+            record = await session.get(TransactionRecord, tx_id)
+            assert "bill_dispenser:PHP_100': -2" in record.error_message
+
+    async def test_recovery_reverts_reservations_before_dispensing(
+        self, orchestrator, machine_status, db_session_factory
+    ):
+        """Nothing was dispensed yet, so reserved items go back to stock
+        while the accepted bill stays counted."""
+        tx_id = str(uuid.uuid4())
+        machine_status.transaction_inventory_deltas = lambda t: (
+            {"bill_dispenser:PHP_100": -2, "bill_storage:PHP_200": 1}
+            if t == tx_id else {}
+        )
+        async with db_session_factory() as session:
+            session.add(TransactionRecord(
+                id=tx_id,
+                type="bill-to-bill",
+                state=TransactionState.WAITING_FOR_CONFIRMATION.value,
+                target_amount=200,
+                fee=0,
+                total_due=200,
+            ))
+            session.add(WALEntry(
+                transaction_id=tx_id,
+                action="STATE_WAITING_FOR_CONFIRMATION_TO_DISPENSING",
+                data={},
+                status=WALStatus.PENDING.value,
+            ))
+            await session.commit()
+
+        await orchestrator.recover_pending_transactions()
+
+        counts = machine_status.snapshot().consumables.bill_dispenser_counts
+        assert counts["PHP_100"] == 52
+        async with db_session_factory() as session:
+            record = await session.get(TransactionRecord, tx_id)
+            assert "reverted: {'bill_dispenser:PHP_100': -2}" in record.error_message
+            assert "kept: {'bill_storage:PHP_200': 1}" in record.error_message
+
+    async def test_recovers_group_commit_transaction_cut_off_mid_flight(
+        self,
+        mock_bill_acceptor,
+        mock_dispense_orchestrator,
+        machine_status,
+        ws_manager,
+        db_session_factory,
+    ):
+        """Group mode commits each transition atomically, but its PENDING
+        marker still lets recovery find an unfinished transaction."""
+        crashed = TransactionOrchestrator(
+            bill_acceptor=mock_bill_acceptor,
+            dispense_orchestrator=mock_dispense_orchestrator,
+            machine_status=machine_status,
+            ws_manager=ws_manager,
+            db_session_factory=db_session_factory,
+            commit_mode="group",
+        )
+        tx_id = (await _start_default_transaction(crashed))["transaction_id"]
+        crashed._active_tx._cancel_timeout()
+
+        restarted = TransactionOrchestrator(
+            bill_acceptor=mock_bill_acceptor,
+            dispense_orchestrator=mock_dispense_orchestrator,
+            machine_status=machine_status,
+            ws_manager=ws_manager,
+            db_session_factory=db_session_factory,
+            commit_mode="group",
+        )
+        await restarted.recover_pending_transactions()
+
+        async with db_session_factory() as session:
+            record = await session.get(TransactionRecord, tx_id)
+            assert record.state == TransactionState.ERROR.value
+            assert record.error_code == "CRASH_RECOVERY"
+            assert "TRANSACTION_CREATED" in record.error_message
+
     async def test_recovery_handles_multiple_entries(
         self, orchestrator, db_session_factory
     ):
@@ -287,3 +287,115 @@ class TestWriteAheadLog:
         result = await db_session.execute(select(WALEntry))
         entries = result.scalars().all()
         assert len(entries) == 3
+
+
+# ---------------------------------------------------------------------------
+# Test: Group commit mode
+# ---------------------------------------------------------------------------
+
+@pytest.fixture
+def group_state_machine(ws_manager, db_session):
+    """TransactionStateMachine committing each transition once."""
+    return TransactionStateMachine(
+        transaction_id="test-tx-001",
+        transaction_type="bill-to-bill",
+        ws_manager=ws_manager,
+        db_session=db_session,
+        commit_mode="group",
+    )
+
+
+class TestGroupCommit:
+    async def test_unknown_commit_mode_raises(self, ws_manager, db_session):
+        with pytest.raises(ValueError, match="Unknown commit mode"):
+            TransactionStateMachine(
+                transaction_id="test-tx-001",
+                transaction_type="bill-to-bill",
+                ws_manager=ws_manager,
+                db_session=db_session,
+                commit_mode="eventual",
+            )
+
+    async def test_one_commit_per_transition(self, group_state_machine, db_session):
+        commit = AsyncMock(wraps=db_session.commit)
+        db_session.commit = commit
+
+        await group_state_machine.transition_to(TransactionState.WAITING_FOR_BILL)
+        await group_state_machine.transition_to(TransactionState.AUTHENTICATING)
+
+        assert commit.await_count == 2
+
+    async def test_two_phase_commits_twice_per_transition(
+        self, state_machine, db_session
+    ):
+        commit = AsyncMock(wraps=db_session.commit)
+        db_session.commit = commit
+
+        await state_machine.transition_to(TransactionState.WAITING_FOR_BILL)
+
+        assert commit.await_count == 2
+
+    async def test_record_is_not_reselected(self, group_state_machine, db_session):
+        execute = AsyncMock(wraps=db_session.execute)
+        db_session.execute = execute
+
+        await group_state_machine.transition_to(TransactionState.WAITING_FOR_BILL)
+        await group_state_machine.transition_to(TransactionState.AUTHENTICATING)
+        await group_state_machine.transition_to(TransactionState.SORTING)
+
+        execute.assert_not_awaited()
+
+    async def test_persists_record_and_completed_wal_entries(
+        self, group_state_machine, db_session
+    ):
+        from sqlalchemy import select
+        from app.models.db_models import WALEntry
+
+        await group_state_machine.transition_to(TransactionState.WAITING_FOR_BILL)
+        await group_state_machine.transition_to(
+            TransactionState.AUTHENTICATING, {"inserted_amount": 100}
+        )
+        await group_state_machine.transition_to(TransactionState.ERROR)
+
+        db_session.expunge_all()
+        record = await db_session.get(TransactionRecord, "test-tx-001")
+        assert record.state == TransactionState.ERROR.value
+        assert record.inserted_amount == 100
+        assert record.completed_at is not None
+
+        result = await db_session.execute(select(WALEntry))
+        entries = result.scalars().all()
+        # Three transitions plus the transaction's marker
+        assert len(entries) == 4
+        assert {entry.status for entry in entries} == {"COMPLETED"}
+
+    async def test_in_progress_transaction_leaves_pending_marker(
+        self, group_state_machine, db_session
+    ):
+        from sqlalchemy import select
+        from app.models.db_models import WALEntry
+
+        await group_state_machine.transition_to(TransactionState.WAITING_FOR_BILL)
+        await group_state_machine.transition_to(TransactionState.AUTHENTICATING)
+
+        # What recovery would find after a crash now
+        result = await db_session.execute(
+            select(WALEntry).where(WALEntry.status == "PENDING")
+        )
+        (marker,) = result.scalars().all()
+        assert marker.transaction_id == "test-tx-001"
+        assert marker.action == "TRANSACTION_CREATED"
+
+    async def test_terminal_state_completes_marker(
+        self, group_state_machine, db_session
+    ):
+        from sqlalchemy import select
+        from app.models.db_models import WALEntry
+
+        await group_state_machine.transition_to(TransactionState.WAITING_FOR_BILL)
+        await group_state_machine.cancel()
+
+        result = await db_session.execute(
+            select(WALEntry).where(WALEntry.status == "PENDING")
+        )
+        assert result.scalars().all() == []
@@ -0,0 +1,180 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.models.db_models import Base, TransactionRecord, WALEntry
+from app.services.wal_compactor import WALCompactor
+
+NOW = datetime(2026, 6, 1)
+
+
+@pytest.fixture
+async def session_factory():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+async def _add_transaction(
+    factory, tx_id: str, state: str, ended_days_ago=None, statuses=("COMPLETED",)
+):
+    async with factory() as session:
+        session.add(TransactionRecord(
+            id=tx_id,
+            type="bill-to-bill",
+            state=state,
+            completed_at=(
+                NOW - timedelta(days=ended_days_ago)
+                if ended_days_ago is not None else None
+            ),
+        ))
+        for i, status in enumerate(statuses):
+            session.add(WALEntry(
+                transaction_id=tx_id,
+                action=f"STEP_{i}",
+                data={"i": i},
+                status=status,
+                created_at=NOW - timedelta(days=60),
+            ))
+        await session.commit()
+
+
+async def _remaining(factory):
+    async with factory() as session:
+        result = await session.execute(select(WALEntry))
+        return {(e.transaction_id, e.status) for e in result.scalars().all()}
+
+
+class TestWALCompactor:
+    async def test_deletes_completed_entries_of_old_terminal_transactions(
+        self, session_factory
+    ):
+        await _add_transaction(
+            session_factory, "old-done", "COMPLETE", 40, ("COMPLETED",) * 3
+        )
+        await _add_transaction(session_factory, "old-cancelled", "CANCELLED", 31)
+        compactor = WALCompactor(session_factory, retention_days=30)
+
+        assert await compactor.compact(NOW) == 4
+        assert await _remaining(session_factory) == set()
+        assert compactor.compacted == 4
+
+    async def test_keeps_recent_and_active_transactions(self, session_factory):
+        await _add_transaction(session_factory, "recent", "COMPLETE", 5)
+        await _add_transaction(session_factory, "active", "WAITING_FOR_BILL")
+        compactor = WALCompactor(session_factory, retention_days=30)
+
+        assert await compactor.compact(NOW) == 0
+        assert await _remaining(session_factory) == {
+            ("recent", "COMPLETED"),
+            ("active", "COMPLETED"),
+        }
+
+    async def test_keeps_pending_and_rolled_back_entries(self, session_factory):
+        await _add_transaction(
+            session_factory,
+            "crashed",
+            "ERROR",
+            90,
+            ("COMPLETED", "ROLLED_BACK", "PENDING"),
+        )
+        compactor = WALCompactor(session_factory, retention_days=30)
+
+        assert await compactor.compact(NOW) == 1
+        assert await _remaining(session_factory) == {
+            ("crashed", "ROLLED_BACK"),
+            ("crashed", "PENDING"),
+        }
+
+    async def test_deletes_in_batches(self, session_factory):
+        await _add_transaction(
+            session_factory, "old", "COMPLETE", 40, ("COMPLETED",) * 7
+        )
+        compactor = WALCompactor(session_factory, retention_days=30, batch_size=3)
+
+        assert await compactor.compact(NOW) == 7
+        assert await _remaining(session_factory) == set()
+
+    async def test_archives_before_deleting(self, session_factory, tmp_path):
+        await _add_transaction(
+            session_factory, "old", "COMPLETE", 40, ("COMPLETED",) * 2
+        )
+        archive = tmp_path / "archive" / "wal.jsonl"
+        compactor = WALCompactor(
+            session_factory, retention_days=30, archive_path=str(archive)
+        )
+
+        await compactor.compact(NOW)
+
+        lines = [json.loads(line) for line in archive.read_text().splitlines()]
+        assert [line["action"] for line in lines] == ["STEP_0", "STEP_1"]
+        assert lines[0]["transaction_id"] == "old"
+        assert lines[1]["data"] == {"i": 1}
+
+    async def test_failed_delete_does_not_archive_twice(
+        self, session_factory, tmp_path
+    ):
+        await _add_transaction(
+            session_factory, "old", "COMPLETE", 40, ("COMPLETED",) * 2
+        )
+        archive = tmp_path / "wal.jsonl"
+        failures = [RuntimeError("database is locked")]
+
+        def flaky_factory():
+            session = session_factory()
+            commit = session.commit
+
+            async def failing_commit():
+                if failures:
+                    raise failures.pop()
+                await commit()
+
+            session.commit = failing_commit
+            return session
+
+        compactor = WALCompactor(
+            flaky_factory, retention_days=30, archive_path=str(archive)
+        )
+
+        with pytest.raises(RuntimeError):
+            await compactor.compact(NOW)
+        assert await compactor.compact(NOW) == 2
+
+        lines = [json.loads(line) for line in archive.read_text().splitlines()]
+        assert [line["action"] for line in lines] == ["STEP_0", "STEP_1"]
+        assert await _remaining(session_factory) == set()
+
+    async def test_disabled_by_default(self, session_factory):
+        compactor = WALCompactor(session_factory)
+
+        await compactor.start()
+        await compactor.stop()
+
+        assert compactor.passes == 0
+
+    async def test_zero_interval_never_starts(self, session_factory):
+        compactor = WALCompactor(session_factory, interval=0)
+
+        await compactor.start()
+        await compactor.stop()
+
+        assert compactor.passes == 0
+
+    async def test_start_compacts_immediately(self, session_factory):
+        await _add_transaction(session_factory, "ancient", "COMPLETE", 3650)
+        compactor = WALCompactor(session_factory, retention_days=30, interval=60)
+
+        await compactor.start()
+        for _ in range(50):
+            if compactor.passes:
+                break
+            await asyncio.sleep(0.01)
+        await compactor.stop()
+
+        assert compactor.compacted == 1
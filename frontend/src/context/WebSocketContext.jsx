@@ -30,10 +30,20 @@ export function WebSocketProvider({ children }) {
   const reconnectAttemptRef = useRef(0);
   const reconnectTimerRef = useRef(null);
   const heartbeatTimerRef = useRef(null);
+  // Last event seq seen and the backend stream it belongs to; sent on
+  // reconnect so the backend replays what was missed
+  const lastSeqRef = useRef(0);
+  const streamRef = useRef(null);
 
   const connect = useCallback(() => {
     try {
-      const ws = new WebSocket(WS_URL);
+      const params = new URLSearchParams({
+        resume_from: String(lastSeqRef.current),
+      });
+      if (streamRef.current) {
+        params.set("stream", streamRef.current);
+      }
+      const ws = new WebSocket(`${WS_URL}?${params}`);
       wsRef.current = ws;
 
       ws.onopen = () => {
@@ -48,33 +58,53 @@ export function WebSocketProvider({ children }) {
         }, HEARTBEAT_INTERVAL);
       };
 
+      const dispatch = (data) => {
+        // Notify all listeners for this event type
+        const callbacks = listenersRef.current.get(data.type);
+        if (callbacks) {
+          callbacks.forEach((cb) => {
+            try {
+              cb(data);
+            } catch (err) {
+              console.error("WebSocket listener error:", err);
+            }
+          });
+        }
+
+        // Also notify wildcard listeners
+        const wildcardCallbacks = listenersRef.current.get("*");
+        if (wildcardCallbacks) {
+          wildcardCallbacks.forEach((cb) => {
+            try {
+              cb(data);
+            } catch (err) {
+              console.error("WebSocket wildcard listener error:", err);
+            }
+          });
+        }
+      };
+
       ws.onmessage = (event) => {
         try {
           const data = JSON.parse(event.data);
-          const eventType = data.type;
-
-          // Notify all listeners for this event type
-          const callbacks = listenersRef.current.get(eventType);
-          if (callbacks) {
-            callbacks.forEach((cb) => {
-              try {
-                cb(data);
-              } catch (err) {
-                console.error("WebSocket listener error:", err);
-              }
-            });
+
+          if (data.seq != null) {
+            lastSeqRef.current = data.seq;
+          }
+          // HELLO answers the resume handshake; listeners can refetch
+          // state over REST when payload.gap is true
+          if (data.type === "HELLO") {
+            streamRef.current = data.payload?.stream ?? null;
+            lastSeqRef.current = data.payload?.seq ?? 0;
           }
 
-          // Also notify wildcard listeners
-          const wildcardCallbacks = listenersRef.current.get("*");
-          if (wildcardCallbacks) {
-            wildcardCallbacks.forEach((cb) => {
-              try {
-                cb(data);
-              } catch (err) {
-                console.error("WebSocket wildcard listener error:", err);
-              }
-            });
+          // Batched events are delivered to listeners one by one, in order
+          if (data.type === "EVENT_BATCH") {
+            (data.payload?.events || []).forEach((inner) =>
+              dispatch({ ...inner, timestamp: data.timestamp }),
+            );
+          } else {
+            dispatch(data);
           }
         } catch {
           // Ignore non-JSON messages